@@ -21,6 +21,10 @@ def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # orjson-backed JSON responses (unless JSON_COMPAT_MODE)
+    from app.json_provider import init_json
+    init_json(app)
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -72,6 +76,10 @@ def create_app(config_name='default'):
     # Register CLI commands
     register_cli_commands(app)
     
+    # Background sender for queued subscription/interest emails
+    from app.notifications import init_notifications
+    init_notifications(app)
+    
     # Create database tables if they don't exist
     # Using inspector to check if tables exist first (avoids race conditions with multiple workers)
     with app.app_context():
@@ -198,3 +206,109 @@ def register_cli_commands(app):
         except Exception as e:
             db.session.rollback()
             click.echo(f'❌ Error making admin: {e}')
+    
+    @app.cli.command()
+    @click.option('--prefix', default='', help='Only clear entries for endpoints starting with this path')
+    def clear_api_cache(prefix):
+        """Clear the Orion API response cache"""
+        from app.api.cache import get_response_cache
+        
+        cache = get_response_cache(app.config['API_CACHE_PATH'])
+        removed = cache.invalidate(f'GET {prefix}' if prefix else '')
+        click.echo(f'✅ Removed {removed} cached response(s)')
+    
+    @app.cli.command()
+    @click.option('--athlete', 'athletes', multiple=True, help='Athlete tessera to sync (repeatable, default: all tracked athletes)')
+    @click.option('--stale-only', is_flag=True, help='Skip athletes synced within RESULTS_WAREHOUSE_MAX_AGE')
+    @click.option('--every', type=int, default=0, help='Keep running and sync again every N seconds')
+    def sync_results(athletes, stale_only, every):
+        """Sync athlete results from the Orion API into the local results table"""
+        from app.api import OrionAPIClient
+        from app.results_warehouse import get_tracked_athletes, sync_athletes, run_sync_loop
+        
+        client = OrionAPIClient()
+        stale_after = app.config['RESULTS_WAREHOUSE_MAX_AGE'] if stale_only else None
+        
+        if every > 0:
+            click.echo(f'🔄 Syncing results every {every}s (Ctrl+C to stop)')
+            run_sync_loop(client, every, stale_after, echo=click.echo)
+            return
+        
+        athlete_ids = list(athletes) or get_tracked_athletes(stale_after)
+        totals = sync_athletes(client, athlete_ids)
+        click.echo(f'✅ Synced {totals["athletes"]} athlete(s): {totals["inserted"]} new, '
+                   f'{totals["updated"]} updated, {totals["unchanged"]} unchanged, {totals["deleted"]} deleted, '
+                   f'{totals["failed"]} failed')
+    
+    @app.cli.command()
+    @click.option('--every', type=int, default=0, help='Keep running and dispatch again every N seconds')
+    def dispatch_notifications(every):
+        """Send queued subscription/interest notification emails"""
+        import time
+        from app.api import OrionAPIClient
+        from app.notifications import dispatch_all
+        
+        while True:
+            processed = dispatch_all(OrionAPIClient())
+            click.echo(f'✅ Processed {processed} notification(s)')
+            if every <= 0:
+                return
+            time.sleep(every)
+    
+    @app.cli.command()
+    @click.option('--all', 'load_all', is_flag=True, help='Also load past competitions (full /api/gare list)')
+    @click.option('--every', type=int, default=0, help='Keep running and refresh again every N seconds')
+    def sync_competitions(load_all, every):
+        """Refresh the local competition/turn catalogue from the Orion API"""
+        import time
+        from app.api import OrionAPIClient
+        from app.competition_catalog import refresh_catalog, store_competitions
+        
+        client = OrionAPIClient()
+        if load_all:
+            counts = store_competitions(client.get_competitions(future=False, limit=1000) or [])
+            click.echo(f'✅ Loaded {counts["inserted"]} new, {counts["updated"]} updated competition(s)')
+        
+        while True:
+            counts = refresh_catalog(client, app.config['COMPETITION_CATALOG_REFRESH_SECONDS'])
+            click.echo(f'✅ Upcoming competitions: {counts["inserted"]} new, {counts["updated"]} updated, '
+                       f'{counts["unchanged"]} unchanged; {counts["turns"]} turn list(s) re-read')
+            if every <= 0:
+                return
+            time.sleep(every)
+    
+    @app.cli.command()
+    @click.option('--stale-only', is_flag=True, help='Skip snapshots fetched within RANKING_SNAPSHOT_MAX_AGE')
+    @click.option('--all', 'sweep', is_flag=True, help='Fetch every individual ranking (populates the athlete index)')
+    @click.option('--every', type=int, default=0, help='Keep running and refresh again every N seconds')
+    def refresh_rankings(stale_only, sweep, every):
+        """Re-fetch cached official ranking snapshots from the Orion API"""
+        import time
+        from app.api import OrionAPIClient
+        from app.ranking_snapshots import refresh_snapshots, sweep_snapshots
+        
+        client = OrionAPIClient()
+        stale_after = app.config['RANKING_SNAPSHOT_MAX_AGE'] if stale_only else None
+        while True:
+            totals = sweep_snapshots(client) if sweep else refresh_snapshots(client, stale_after)
+            click.echo(f'✅ Refreshed {totals["refreshed"]} ranking snapshot(s), {totals["failed"]} failed')
+            if every <= 0:
+                return
+            time.sleep(every)
+    
+    @app.cli.command()
+    @click.option('--every', type=int, default=0, help='Keep running and sync again every N seconds')
+    def sync_components(every):
+        """Sync the local electronics component replica from the Orion API"""
+        import time
+        from app.api import OrionAPIClient
+        from app.component_catalog import sync_components as sync_catalog
+        
+        client = OrionAPIClient()
+        while True:
+            counts = sync_catalog(client)
+            click.echo(f'✅ Components: {counts["inserted"]} new, {counts["updated"]} updated, '
+                       f'{counts["deleted"]} deleted, {counts["unchanged"]} unchanged')
+            if every <= 0:
+                return
+            time.sleep(every)
@@ -2,11 +2,34 @@
 API Client for Cloudflare-protected external API
 """
 import requests
+import threading
+from urllib.parse import urlencode
 from flask import current_app
 import logging
+from app.api.transport import get_session, get_timeout
+from app.api.cache import get_response_cache
+from app.api.streaming import CHUNK_SIZE
+from app.json_provider import loads as json_loads
+from app.api.resilience import (
+    CircuitOpenError, endpoint_family, get_circuit_breaker, guarded_request, upstream_gets
+)
 
 logger = logging.getLogger(__name__)
 
+# Cache policies for read-only endpoints: path -> (fresh seconds, stale seconds)
+# Entries past the fresh window are served immediately while one worker refreshes them.
+CACHE_POLICIES = {
+    '/api/event_types': (3600, 86400),
+    '/api/qualifiche': (1800, 86400),
+    '/api/atleti': (3600, 86400),
+    '/api/gare': (600, 3600),
+    '/api/turni': (600, 3600),
+    '/api/inviti': (600, 3600),
+    # Our own writes invalidate these, so a short TTL only covers external changes
+    '/api/iscrizioni': (30, 120),
+    '/api/interesse': (30, 120),
+}
+
 class OrionAPIClient:
     """Client for interacting with Archery API via Cloudflare Access"""
     
@@ -42,7 +65,18 @@ class OrionAPIClient:
             ''
         ))
         
-        logger.info(f"API Client initialized with base URL: {self.base_url}")
+        logger.debug(f"API Client initialized with base URL: {self.base_url}")
+        
+        # Shared pooled session (one per worker) and config for per-endpoint timeouts
+        self.config = current_app.config
+        self.session = get_session(self.config)
+        
+        # Shared response cache for read-only endpoints (None if disabled)
+        self.cache = None
+        if self.config.get('API_CACHE_ENABLED', True):
+            self.cache = get_response_cache(self.config['API_CACHE_PATH'])
+        self.cache_policies = dict(CACHE_POLICIES)
+        self.cache_policies.update(self.config.get('API_CACHE_POLICIES') or {})
         
         self.headers = {
             'CF-Access-Client-Id': current_app.config['CF_ACCESS_ID'],
@@ -51,17 +85,110 @@ class OrionAPIClient:
         }
     
     def _make_request(self, method, endpoint, data=None, params=None):
-        """Make HTTP request to API"""
+        """Make HTTP request to API
+        
+        GET requests on cacheable endpoints are served from the response cache;
+        concurrent identical GETs share one upstream request. Successful writes
+        invalidate the cached reads of the same resource.
+        """
+        if method == 'GET':
+            policy = self.cache_policies.get(endpoint.split('?', 1)[0]) if self.cache is not None else None
+            if policy:
+                return self._cached_request(endpoint, params, policy)
+            return self._coalesced_get(endpoint, params)
+        
+        result = self._send_request(method, endpoint, data=data, params=params)
+        
+        if method != 'GET' and self.cache is not None:
+            self.invalidate_cache(self._resource_prefix(endpoint))
+        
+        return result
+    
+    @staticmethod
+    def _cache_key(endpoint, params):
+        """Build a cache key from endpoint and (sorted) query params"""
+        key = f"GET {endpoint}"
+        if params:
+            key += '?' + urlencode(sorted(params.items()), doseq=True)
+        return key
+    
+    @staticmethod
+    def _resource_prefix(endpoint):
+        """Get the resource path for an endpoint (e.g. /api/iscrizioni/12 -> /api/iscrizioni)"""
+        path = endpoint.split('?', 1)[0]
+        return '/'.join(path.split('/')[:3])
+    
+    def _coalesced_get(self, endpoint, params):
+        """GET shared with concurrent identical requests in this worker"""
+        key = f"{self.base_url} {self._cache_key(endpoint, params)}"
+        return upstream_gets.do(key, lambda: self._send_request('GET', endpoint, params=params))
+    
+    def _cached_request(self, endpoint, params, policy):
+        """GET through the response cache with stale-while-revalidate
+        
+        If the upstream is unavailable (circuit open, connection error), an
+        expired copy is served rather than failing.
+        """
+        key = self._cache_key(endpoint, params)
+        ttl, stale_ttl = policy
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            value, is_fresh = cached
+            circuit_open = get_circuit_breaker(endpoint_family(endpoint), self.config).is_open
+            if not is_fresh and not circuit_open and self.cache.claim_refresh(key):
+                threading.Thread(
+                    target=self._refresh_cache_entry,
+                    args=(key, endpoint, params, policy),
+                    daemon=True
+                ).start()
+            return value
+        
+        try:
+            value = self._coalesced_get(endpoint, params)
+        except requests.exceptions.RequestException as e:
+            expired = self.cache.get(key, allow_expired=True)
+            if expired is None:
+                raise
+            logger.warning(f"Serving expired cache entry for {key}: {e}")
+            return expired[0]
+        
+        self.cache.set(key, value, ttl, stale_ttl)
+        return value
+    
+    def _refresh_cache_entry(self, key, endpoint, params, policy):
+        """Background refresh of a stale cache entry"""
+        try:
+            value = self._send_request('GET', endpoint, params=params)
+            self.cache.set(key, value, *policy)
+            logger.debug(f"Cache refreshed: {key}")
+        except Exception as e:
+            # Keep serving the stale copy; the claim expires and a later request retries
+            logger.warning(f"Background cache refresh failed for {key}: {e}")
+    
+    def invalidate_cache(self, endpoint_prefix):
+        """Drop cached GET responses for endpoints starting with endpoint_prefix
+        
+        Args:
+            endpoint_prefix: Endpoint path prefix (e.g., '/api/iscrizioni')
+        """
+        if self.cache is not None:
+            self.cache.invalidate(f"GET {endpoint_prefix}")
+    
+    def _send_request(self, method, endpoint, data=None, params=None):
+        """Send HTTP request to API and parse the JSON response"""
         url = f"{self.base_url}{endpoint}"
         try:
-            response = requests.request(
-                method=method,
-                url=url,
+            response = guarded_request(
+                self.session, method, url, endpoint, self.config,
                 headers=self.headers,
                 json=data,
                 params=params,
-                timeout=30
+                timeout=get_timeout(endpoint, self.config)
             )
+        except CircuitOpenError as e:
+            logger.warning(f"API request skipped for {method} {url}: {e}")
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed for {method} {url}: {e}")
             raise
@@ -81,12 +208,15 @@ class OrionAPIClient:
 
         # Try to parse JSON; if it's not JSON, log and raise informative error
         try:
-            parsed = response.json()
+            parsed = json_loads(response.content)
         except ValueError as e:
             text_preview = (response.text[:2000] + '...') if response.text and len(response.text) > 2000 else response.text
             logger.error(f"Failed to parse JSON from API {method} {url}: {e}")
             logger.error(f"Response text (truncated): {text_preview}")
-            raise
+            # Same type response.json() raised, so callers catching RequestException still handle it
+            raise requests.exceptions.JSONDecodeError(
+                getattr(e, 'msg', str(e)), getattr(e, 'doc', ''), getattr(e, 'pos', 0)
+            ) from e
 
         # If API returned a primitive (string/number) instead of expected dict/list, log it
         if not isinstance(parsed, (dict, list)):
@@ -94,6 +224,43 @@ class OrionAPIClient:
 
         return parsed
     
+    def stream_request(self, endpoint, params=None, chunk_size=CHUNK_SIZE):
+        """GET an endpoint without buffering its body (bypasses the response cache)
+        
+        The status is checked before returning, so HTTP and connection errors
+        are raised here rather than halfway through a streamed response.
+        
+        Returns:
+            Iterator of body byte chunks (closes the connection when exhausted)
+        """
+        url = f"{self.base_url}{endpoint}"
+        try:
+            response = guarded_request(
+                self.session, 'GET', url, endpoint, self.config,
+                headers=self.headers,
+                params=params,
+                timeout=get_timeout(endpoint, self.config),
+                stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"API stream failed for GET {url}: {e}")
+            raise
+        
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"API HTTP error for GET {url}: {e}")
+            response.close()
+            raise
+        
+        def chunks():
+            try:
+                yield from response.iter_content(chunk_size)
+            finally:
+                response.close()
+        
+        return chunks()
+    
     def get_athlete(self, athlete_id):
         """Get athlete information by ID"""
         return self._make_request('GET', f'/api/atleti?q={athlete_id}')
@@ -233,6 +400,10 @@ class OrionAPIClient:
         # Use export=full parameter as per API spec
         return self._make_request('GET', '/api/iscrizioni', params={'export': 'full'})
     
+    def stream_all_subscriptions(self):
+        """Stream all subscriptions (mass export) as body chunks of a JSON array"""
+        return self.stream_request('/api/iscrizioni', params={'export': 'full'})
+    
     def create_subscription(self, codice_gara, tessera_atleta, categoria, turno, classe='', stato='confermato', note=''):
         """Create a new subscription (iscrizione)"""
         data = {
@@ -283,6 +454,10 @@ class OrionAPIClient:
         # Call without filters to get all (both params are optional per API spec)
         return self._make_request('GET', '/api/interesse')
     
+    def stream_all_interests(self):
+        """Stream all interest expressions (mass export) as body chunks of a JSON array"""
+        return self.stream_request('/api/interesse')
+    
     def create_interest(self, codice_gara, tessera_atleta, categoria, classe='', note=''):
         """Create a new interest expression"""
         from datetime import date
@@ -0,0 +1,183 @@
+"""
+Response cache for read-only Orion API endpoints
+
+Entries live in a small SQLite file so every gunicorn worker shares them.
+Each entry has a fresh window (served as-is) and a stale window (served
+immediately while a single background refresh fetches a new copy).
+"""
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+from app.json_provider import dumps as json_dumps, loads as json_loads
+
+logger = logging.getLogger(__name__)
+
+# How long a stale entry is "claimed" by the worker refreshing it
+REFRESH_CLAIM_SECONDS = 30
+
+
+class ResponseCache:
+    """SQLite-backed TTL cache with stale-while-revalidate support"""
+
+    def __init__(self, path):
+        """Initialize cache
+
+        Args:
+            path: Path to the SQLite cache file (shared by all workers)
+        """
+        self.path = path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self):
+        """Get a connection for the current thread (and process)"""
+        conn = getattr(self._local, 'conn', None)
+        pid = getattr(self._local, 'pid', None)
+        if conn is None or pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        """Create cache table if needed"""
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS api_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                fresh_until REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                refresh_claimed_until REAL
+            )
+        """)
+
+    def get(self, key, allow_expired=False):
+        """Get a cached entry
+
+        Args:
+            key: Cache key
+            allow_expired: Also return entries past the stale window (used when
+                the upstream is unavailable)
+
+        Returns:
+            Tuple (value, is_fresh) or None if missing or past the stale window
+        """
+        now = time.time()
+        try:
+            row = self._connect().execute(
+                'SELECT value, fresh_until, stale_until FROM api_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        value, fresh_until, stale_until = row
+        if now > stale_until and not allow_expired:
+            return None
+
+        return json_loads(value), now <= fresh_until
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        """Store an entry
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Seconds the entry is fresh
+            stale_ttl: Extra seconds the entry may be served stale while refreshing
+        """
+        now = time.time()
+        try:
+            payload = json_dumps(value, sort_keys=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching {key}: value is not JSON-serializable ({e})")
+            return
+
+        try:
+            self._connect().execute(
+                """
+                INSERT OR REPLACE INTO api_cache
+                    (key, value, stored_at, fresh_until, stale_until, refresh_claimed_until)
+                VALUES (?, ?, ?, ?, ?, NULL)
+                """,
+                (key, payload, now, now + ttl, now + ttl + stale_ttl)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    def claim_refresh(self, key):
+        """Claim the right to refresh a stale entry
+
+        Only one worker (across processes) wins the claim, so a stale entry
+        triggers a single upstream request instead of one per worker.
+
+        Returns:
+            True if the caller should refresh the entry
+        """
+        now = time.time()
+        try:
+            cursor = self._connect().execute(
+                """
+                UPDATE api_cache SET refresh_claimed_until = ?
+                WHERE key = ? AND (refresh_claimed_until IS NULL OR refresh_claimed_until < ?)
+                """,
+                (now + REFRESH_CLAIM_SECONDS, key, now)
+            )
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logger.warning(f"Cache refresh claim failed for {key}: {e}")
+            return False
+
+    def invalidate(self, prefix):
+        """Remove every entry whose key starts with prefix
+
+        Returns:
+            Number of removed entries
+        """
+        try:
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            cursor = self._connect().execute(
+                "DELETE FROM api_cache WHERE key LIKE ? ESCAPE '\\'",
+                (escaped + '%',)
+            )
+            if cursor.rowcount:
+                logger.info(f"Cache invalidated {cursor.rowcount} entr(y/ies) for {prefix}")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Cache invalidation failed for {prefix}: {e}")
+            return 0
+
+    def clear(self):
+        """Remove all entries"""
+        return self.invalidate('')
+
+
+# Global instances, one per cache file
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(path):
+    """Get the ResponseCache for a given file (singleton per path)"""
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(path)
+            if cache is None:
+                cache = ResponseCache(path)
+                _caches[path] = cache
+    return cache
@@ -0,0 +1,211 @@
+"""
+Circuit breakers and request coalescing for upstream API calls
+
+Each endpoint family (archery, elec, mail, materiali) has its own breaker per
+worker process. After a run of consecutive failures (connection errors,
+timeouts, 5xx) the breaker opens and calls fail immediately with
+CircuitOpenError instead of tying up the worker for the full timeout. After
+a cool-down one probe request is let through; its outcome closes the
+breaker or opens it again.
+
+SingleFlight lets concurrent identical GETs share one upstream request.
+"""
+import copy
+import threading
+import time
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5   # Consecutive failures before opening
+DEFAULT_RESET_SECONDS = 30      # Time open before a probe request is allowed
+
+# Endpoint prefix -> family (anything else is archery data)
+ENDPOINT_FAMILIES = (
+    ('/api/elec', 'elec'),
+    ('/api/mail', 'mail'),       # also matches /api/mailer
+    ('/api/materiali', 'materiali'),
+)
+DEFAULT_FAMILY = 'archery'
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling an upstream whose circuit is open
+
+    Subclasses ConnectionError so existing RequestException handlers treat it
+    like any other unreachable upstream.
+    """
+
+    def __init__(self, family):
+        super().__init__(f"Circuit open for '{family}' API, failing fast")
+        self.family = family
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (thread-safe, per process)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_seconds=DEFAULT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Check whether a request may be sent now
+
+        While half-open only a single probe request is allowed.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, sending probe request")
+                return True
+            return False
+
+    def record_success(self):
+        """Record a successful call (closes the circuit)"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Record a failed call (may open the circuit)"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failure(s), "
+                                   f"failing fast for {self.reset_seconds}s")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        """True if requests are currently being rejected"""
+        with self._lock:
+            return self.state != self.CLOSED and not (
+                self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds
+            )
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def endpoint_family(endpoint):
+    """Get the breaker family for an endpoint path"""
+    for prefix, family in ENDPOINT_FAMILIES:
+        if endpoint.startswith(prefix):
+            return family
+    return DEFAULT_FAMILY
+
+
+def get_circuit_breaker(family, config):
+    """Get the breaker for a family (created on first use from the app config)"""
+    breaker = _breakers.get(family)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(family)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    family,
+                    failure_threshold=int(config.get('API_CIRCUIT_FAILURE_THRESHOLD', DEFAULT_FAILURE_THRESHOLD)),
+                    reset_seconds=float(config.get('API_CIRCUIT_RESET_SECONDS', DEFAULT_RESET_SECONDS))
+                )
+                _breakers[family] = breaker
+    return breaker
+
+
+def guarded_request(session, method, url, endpoint, config, **kwargs):
+    """session.request() guarded by the circuit breaker of the endpoint's family
+
+    Connection errors, timeouts and 5xx responses count as failures; any other
+    response closes the circuit.
+
+    Raises:
+        CircuitOpenError: If the family's circuit is open
+    """
+    breaker = get_circuit_breaker(endpoint_family(endpoint), config)
+    if not breaker.allow_request():
+        raise CircuitOpenError(breaker.name)
+
+    try:
+        response = session.request(method, url, **kwargs)
+    except BaseException:
+        breaker.record_failure()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+class _Call:
+    """In-flight call shared by SingleFlight waiters"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """Run func once for all concurrent callers with the same key
+
+        When the result was shared, every caller gets its own deep copy
+        (waiters also get the leader's exception), so no two requests share
+        mutable data.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+
+        return copy.deepcopy(call.result) if shared else call.result
+
+
+# Shared by every client in this worker process
+upstream_gets = SingleFlight()
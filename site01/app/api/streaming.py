@@ -0,0 +1,165 @@
+"""
+Streaming mass exports
+
+/api/iscrizioni?export=full and /api/interesse used to be loaded whole with
+response.json() and re-serialized with jsonify, holding the full history in
+memory twice. Exports are now forwarded in chunks as they arrive:
+
+- json without filters: the upstream body is passed through untouched
+- filters or ndjson/csv output: the upstream array is parsed one record at
+  a time (iter_json_array) and re-encoded on the fly
+
+Memory stays bounded by the chunk size plus the largest single record.
+"""
+import codecs
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import Response
+
+from app.json_provider import dumps as json_dumps
+
+CHUNK_SIZE = 64 * 1024
+FORMATS = ('json', 'ndjson', 'csv')
+MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+# Fields accepted as equality filters on exported records
+FILTER_FIELDS = ('codice_gara', 'tessera_atleta', 'categoria', 'classe', 'turno', 'stato')
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = 'utf-8') -> Iterator:
+    """Yield the items of a JSON array read incrementally from byte chunks
+
+    Raises:
+        ValueError: If the body is not a JSON array
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder(encoding)()
+    buffer = ''
+    state = 'start'  # start -> first -> (item -> sep)* -> end
+
+    def parse(final):
+        nonlocal buffer, state
+        pos = 0
+        length = len(buffer)
+        while True:
+            while pos < length and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == length:
+                break
+
+            char = buffer[pos]
+            if state == 'start':
+                if char != '[':
+                    raise ValueError('Expected a JSON array')
+                pos += 1
+                state = 'first'
+            elif state == 'sep':
+                if char not in ',]':
+                    raise ValueError(f"Expected ',' or ']' at offset {pos}")
+                pos += 1
+                state = 'item' if char == ',' else 'end'
+            elif state == 'end':
+                raise ValueError('Unexpected data after the JSON array')
+            elif state == 'first' and char == ']':
+                pos += 1
+                state = 'end'
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # Item continues in the next chunk
+                if not final:
+                    # Only trust an item once its separator arrived ("12" may be "123", "4e" "4e3")
+                    after = end
+                    while after < length and buffer[after] in _WHITESPACE:
+                        after += 1
+                    if after == length or buffer[after] not in ',]':
+                        break
+                yield item
+                pos = end
+                state = 'sep'
+        buffer = buffer[pos:]
+
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        yield from parse(final=False)
+    buffer += text.decode(b'', final=True)
+    yield from parse(final=True)
+
+    if state != 'end':
+        raise ValueError('Truncated JSON array')
+
+
+def filter_items(items: Iterable, filters: Optional[Dict[str, str]]) -> Iterator:
+    """Keep records whose fields equal every filter value (compared as strings)"""
+    if not filters:
+        yield from items
+        return
+    for item in items:
+        if isinstance(item, dict) and all(str(item.get(k, '')) == v for k, v in filters.items()):
+            yield item
+
+
+def encode_json(items: Iterable) -> Iterator[str]:
+    yield '['
+    for i, item in enumerate(items):
+        yield (',' if i else '') + json_dumps(item, sort_keys=False)
+    yield ']'
+
+
+def encode_ndjson(items: Iterable) -> Iterator[str]:
+    for item in items:
+        yield json_dumps(item, sort_keys=False) + '\n'
+
+
+def encode_csv(items: Iterable) -> Iterator[str]:
+    """CSV with the columns of the first record (later extra fields are dropped)"""
+    out = io.StringIO()
+    writer = None
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=list(item), extrasaction='ignore', lineterminator='\n')
+            writer.writeheader()
+        writer.writerow({
+            k: json_dumps(v, sort_keys=False) if isinstance(v, (dict, list)) else ('' if v is None else v)
+            for k, v in item.items()
+        })
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+
+
+ENCODERS = {'json': encode_json, 'ndjson': encode_ndjson, 'csv': encode_csv}
+
+
+def export_response(chunks: Iterable[bytes], fmt: str = 'json', filters: Optional[Dict[str, str]] = None,
+                    filename: Optional[str] = None) -> Response:
+    """Streamed Flask response for an upstream JSON array export
+
+    Args:
+        chunks: Upstream body (OrionAPIClient.stream_request)
+        fmt: 'json', 'ndjson' or 'csv'
+        filters: Field -> value equality filters (see FILTER_FIELDS)
+        filename: Attachment name without extension (csv only)
+    """
+    if fmt == 'json' and not filters:
+        body = chunks
+    else:
+        body = ENCODERS[fmt](filter_items(iter_json_array(chunks), filters))
+
+    response = Response(body, mimetype=MIMETYPES[fmt])
+    if fmt == 'csv' and filename:
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}.csv'
+    return response
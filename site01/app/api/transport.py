@@ -0,0 +1,125 @@
+"""
+Shared HTTP transport for upstream API calls
+
+One pooled requests.Session per worker process, so calls to the Orion API,
+the electronics storage server and LCSC reuse keep-alive connections instead
+of paying a fresh TCP/TLS handshake every time.
+"""
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when the app config does not override them
+DEFAULT_POOL_CONNECTIONS = 4   # Number of distinct hosts kept in the pool
+DEFAULT_POOL_MAXSIZE = 8       # Connections kept alive per host
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+
+# Read timeouts per endpoint prefix (longest prefix wins)
+DEFAULT_ENDPOINT_TIMEOUTS = {
+    '/api/mail': 10,
+    '/api/mailer': 10,
+    '/api/elec': 15,
+    '/api/atleti': 10,
+    '/api/event_types': 10,
+    '/api/qualifiche': 10,
+}
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _build_session(config):
+    """Create a pooled session configured from the app config"""
+    pool_connections = int(config.get('API_POOL_CONNECTIONS', DEFAULT_POOL_CONNECTIONS))
+    pool_maxsize = int(config.get('API_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE))
+
+    # Retry only connection errors on idempotent requests: a keep-alive socket
+    # closed by Cloudflare between two calls should not surface as an error
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        backoff_factor=0.2,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        pool_block=False
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+
+    logger.info(f"HTTP transport initialized (pid={os.getpid()}, pool_connections={pool_connections}, pool_maxsize={pool_maxsize})")
+    return session
+
+
+def get_session(config):
+    """Get the shared session for this worker process
+
+    Gunicorn forks workers, so the session is rebuilt if the PID changes to
+    avoid sharing sockets between processes.
+
+    Args:
+        config: Flask app config (only read when the session is created)
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session(config)
+            _session_pid = pid
+    return _session
+
+
+def get_timeout(endpoint, config):
+    """Get (connect, read) timeout tuple for an endpoint
+
+    Args:
+        endpoint: Endpoint path (e.g., '/api/elec/components') or full URL
+        config: Flask app config
+    """
+    connect_timeout = config.get('API_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)
+    read_timeout = config.get('API_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)
+
+    timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS)
+    timeouts.update(config.get('API_ENDPOINT_TIMEOUTS') or {})
+
+    best_match = ''
+    for prefix in timeouts:
+        if prefix in endpoint and len(prefix) > len(best_match):
+            best_match = prefix
+    if best_match:
+        read_timeout = timeouts[best_match]
+
+    return (connect_timeout, read_timeout)
+
+
+def close_session():
+    """Close the shared session (used on shutdown and in tests)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
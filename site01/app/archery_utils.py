@@ -2,33 +2,22 @@
 Archery analysis utility functions
 """
 import csv
+import heapq
+import math
 import os
-from datetime import datetime
+from array import array
+from datetime import date
+from types import MappingProxyType
 from typing import Dict, List, Optional
 
+from app.dates import date_ordinal, to_iso_date
+
 def parse_date_safely(date_str, default='2000-01-01'):
     """
     Safely parse date strings in various formats.
     Returns YYYY-MM-DD format or default if parsing fails.
     """
-    if not date_str:
-        return default
-    
-    try:
-        # Try common date formats
-        for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%m/%d/%Y']:
-            try:
-                date_obj = datetime.strptime(date_str, fmt)
-                return date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-        
-        # If no format matches, try parsing as ISO format
-        date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        return date_obj.strftime('%Y-%m-%d')
-    except (ValueError, AttributeError):
-        print(f"Warning: Could not parse date '{date_str}', using default")
-        return default
+    return to_iso_date(date_str) or default
 
 # Get the data directory path
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
@@ -83,24 +72,84 @@ def load_competition_data() -> List[Dict]:
     
     return competition_data
 
-def get_competition_info(competition_type: str) -> Optional[Dict]:
-    """Get competition information by type"""
-    data = load_competition_data()
+def normalize_competition_type(competition_type: str) -> str:
+    """Normalize a competition type name for lookups (case and whitespace insensitive)"""
+    return ''.join(competition_type.split()).casefold()
+
+
+class CompetitionIndex:
+    """Immutable lookup tables built once from the competition CSV
+    
+    Attributes:
+        by_type: type -> info dict (first CSV row wins on duplicates)
+        by_normalized_type: normalized type -> info dict
+        category_by_type: type -> category
+        types_by_category: category -> sorted tuple of types
+        categories: sorted tuple of unique categories
+        category_codes: category -> position in categories
+    """
     
-    for comp in data:
-        if comp['type'] == competition_type:
-            return comp
+    def __init__(self, competition_data: List[Dict]):
+        by_type = {}
+        by_normalized_type = {}
+        types_by_category = {}
+        
+        for comp in competition_data:
+            info = MappingProxyType(dict(comp))
+            by_type.setdefault(comp['type'], info)
+            by_normalized_type.setdefault(normalize_competition_type(comp['type']), info)
+            types_by_category.setdefault(comp['category'], []).append(comp['type'])
+        
+        self.by_type = MappingProxyType(by_type)
+        self.by_normalized_type = MappingProxyType(by_normalized_type)
+        self.category_by_type = MappingProxyType({t: info['category'] for t, info in by_type.items()})
+        self.types_by_category = MappingProxyType({c: tuple(sorted(types)) for c, types in types_by_category.items()})
+        self.categories = tuple(sorted(types_by_category))
+        self.category_codes = MappingProxyType({c: code for code, c in enumerate(self.categories)})
     
-    return None
+    def lookup(self, competition_type: str):
+        """Get info for a type: exact match first, then normalized-name match"""
+        if not competition_type:
+            return None
+        info = self.by_type.get(competition_type)
+        if info is None:
+            info = self.by_normalized_type.get(normalize_competition_type(competition_type))
+        return info
+    
+    def category_of(self, competition_type: str) -> str:
+        """Get category for a type, 'unknown' if not in the CSV"""
+        info = self.lookup(competition_type)
+        return info['category'] if info else 'unknown'
+
+
+_competition_index = None
+
+def get_competition_index() -> CompetitionIndex:
+    """Get the competition index (built on first use from load_competition_data)"""
+    global _competition_index
+    
+    if _competition_index is None:
+        data = load_competition_data()
+        index = CompetitionIndex(data)
+        # Only keep the index once the CSV actually loaded (mirrors the data cache)
+        if _competition_data_cache is not None:
+            _competition_index = index
+        return index
+    
+    return _competition_index
+
+def get_competition_info(competition_type: str) -> Optional[Dict]:
+    """Get competition information by type"""
+    info = get_competition_index().lookup(competition_type)
+    return dict(info) if info is not None else None
 
 def get_competition_category(competition_type: str) -> str:
     """Get category (indoor/outdoor) for a competition type"""
-    info = get_competition_info(competition_type)
-    return info['category'] if info else 'unknown'
+    return get_competition_index().category_of(competition_type)
 
 def get_arrow_count(competition_type: str) -> Optional[int]:
     """Get arrow count for a competition type"""
-    info = get_competition_info(competition_type)
+    info = get_competition_index().lookup(competition_type)
     return info['arrow_count'] if info else None
 
 def calculate_average_score(score: int, competition_type: str) -> Optional[float]:
@@ -114,65 +163,177 @@ def calculate_average_score(score: int, competition_type: str) -> Optional[float
 
 def get_categories() -> List[str]:
     """Get list of unique categories"""
-    data = load_competition_data()
-    categories = set(comp['category'] for comp in data)
-    return sorted(list(categories))
+    return list(get_competition_index().categories)
 
 def get_competition_types_by_category(category: str) -> List[str]:
     """Get all competition types for a specific category"""
-    data = load_competition_data()
-    types = [comp['type'] for comp in data if comp['category'] == category]
-    return sorted(types)
+    return list(get_competition_index().types_by_category.get(category, ()))
 
-def calculate_medal_count(results: List[Dict]) -> Dict:
-    """Calculate medal distribution from results"""
-    medals = {
-        'gold': 0,
-        'silver': 0,
-        'bronze': 0,
-        'total': 0
-    }
+NO_CATEGORY = -1  # Category code for results without a competition type
+DEFAULT_DATE_ORDINAL = date(2000, 1, 1).toordinal()
+
+class ResultColumns:
+    """Column-oriented view of a result list used by the statistics functions
     
-    for result in results:
-        position = result.get('position')
-        if position == 1:
-            medals['gold'] += 1
-        elif position == 2:
-            medals['silver'] += 1
-        elif position == 3:
-            medals['bronze'] += 1
+    The result dicts are read once; scores, positions, date ordinals and
+    category codes are stored in typed arrays and every statistic is computed
+    from those columns in a single pass. Missing scores are NaN, missing
+    positions are 0.
+    
+    Attributes:
+        results: Original result dicts (used to report the winning rows)
+        categories: Category names by code; the last one is 'unknown'
+    """
+    
+    def __init__(self, results: List[Dict]):
+        index = get_competition_index()
+        codes = index.category_codes
+        unknown_code = len(index.categories)
+        
+        self.results = results
+        self.categories = index.categories + ('unknown',)
+        self.scores = array('d')
+        self.positions = array('l')
+        self.date_ordinals = array('l')
+        self.category_codes = array('h')
+        self._aggregates = None
+        
+        for result in results:
+            score = result.get('score')
+            self.scores.append(math.nan if score is None else score)
+            self.positions.append(result.get('position') or 0)
+            
+            ordinal = date_ordinal(result.get('date'))
+            self.date_ordinals.append(ordinal if ordinal is not None else DEFAULT_DATE_ORDINAL)
+            
+            comp_type = result.get('competition_type')
+            if not comp_type:
+                self.category_codes.append(NO_CATEGORY)
+            else:
+                info = index.lookup(comp_type)
+                self.category_codes.append(codes[info['category']] if info else unknown_code)
     
-    medals['total'] = len(results)
+    def __len__(self):
+        return len(self.results)
     
-    return medals
+    def _aggregate(self):
+        """Single pass over the columns computing every per-row aggregate"""
+        if self._aggregates is not None:
+            return self._aggregates
+        
+        category_count = len(self.categories)
+        counts = [0] * category_count
+        best_in_category = [None] * category_count   # code -> row index of best score (None scores ignored)
+        best_row_by_category = {}                     # code -> row index of best non-zero score
+        best_row = None                               # Row index of best positive score overall
+        scores = self.scores
+        
+        for i, (code, score) in enumerate(zip(self.category_codes, scores)):
+            if score > 0 and (best_row is None or score > scores[best_row]):
+                best_row = i
+            if code == NO_CATEGORY:
+                continue
+            counts[code] += 1
+            if score != score:  # NaN: missing score
+                continue
+            current = best_in_category[code]
+            if current is None or score > scores[current]:
+                best_in_category[code] = i
+            if score != 0:
+                current = best_row_by_category.get(code)
+                if current is None or score > scores[current]:
+                    best_row_by_category[code] = i
+        
+        self._aggregates = (counts, best_in_category, best_row_by_category, best_row)
+        return self._aggregates
+    
+    def medal_counts(self) -> Dict:
+        """Gold/silver/bronze counts and total number of results"""
+        positions = self.positions
+        return {
+            'gold': positions.count(1),
+            'silver': positions.count(2),
+            'bronze': positions.count(3),
+            'total': len(self)
+        }
+    
+    def recent_rows(self, last_n: int) -> List[int]:
+        """Row indices of the last_n most recent results (ties keep input order)"""
+        return heapq.nlargest(last_n, range(len(self)), key=self.date_ordinals.__getitem__)
+    
+    def category_breakdown(self) -> Dict:
+        """Result count and best score for every known category"""
+        counts, best_in_category, _, _ = self._aggregate()
+        unknown_code = len(self.categories) - 1
+        
+        breakdown = {}
+        for code in range(unknown_code):
+            best_row = best_in_category[code]
+            breakdown[self.categories[code]] = {
+                'count': counts[code],
+                'best_score': self.results[best_row].get('score') if best_row is not None else 0
+            }
+        return breakdown
+    
+    def best_scores_by_category(self) -> Dict:
+        """Best non-zero score per category (including 'unknown') with its competition"""
+        _, _, best_row_by_category, _ = self._aggregate()
+        
+        best_scores = {}
+        for code, row in best_row_by_category.items():
+            result = self.results[row]
+            best_scores[self.categories[code]] = {
+                'score': result.get('score'),
+                'competition': result.get('competition_name'),
+                'date': result.get('date'),
+                'type': result.get('competition_type')
+            }
+        return best_scores
+    
+    def best_result(self) -> Optional[Dict]:
+        """Result dict with the best positive score (first one on ties)"""
+        _, _, _, best_row = self._aggregate()
+        return self.results[best_row] if best_row is not None else None
+
+def as_columns(results) -> ResultColumns:
+    """Get a ResultColumns for a list of results (or pass one through)"""
+    return results if isinstance(results, ResultColumns) else ResultColumns(results)
 
-def calculate_percentile_stats(results: List[Dict], last_n: int = 10) -> Dict:
+def calculate_medal_count(results) -> Dict:
+    """Calculate medal distribution from results"""
+    return as_columns(results).medal_counts()
+
+def calculate_percentile_stats(results, last_n: int = 10) -> Dict:
     """Calculate percentile statistics for recent competitions"""
-    if not results:
+    columns = as_columns(results)
+    
+    if not len(columns):
         return {
             'avg_position': None,
             'avg_percentile': None,
             'top_finishes': 0
         }
     
-    # Sort by date (most recent first) - handle None/missing dates safely
-    sorted_results = sorted(
-        results, 
-        key=lambda x: parse_date_safely(x.get('date') or '', '2000-01-01') or '2000-01-01',
-        reverse=True
-    )
+    # Take last N competitions (most recent first)
+    recent = columns.recent_rows(last_n)
     
-    # Take last N competitions
-    recent = sorted_results[:last_n]
+    all_positions = columns.positions
+    return summarize_recent_positions([all_positions[i] for i in recent])
+
+def summarize_recent_positions(recent_positions: List[Optional[int]]) -> Dict:
+    """Percentile statistics from the positions of the recent competitions
     
-    positions = [r.get('position') for r in recent if r.get('position')]
+    Args:
+        recent_positions: Positions of the last N competitions (None/0 when unknown)
+    """
+    positions = [p for p in recent_positions if p]
     
-    if not positions or len(positions) == 0:
+    if not positions:
         return {
             'avg_position': None,
             'avg_percentile': None,
             'top_finishes': 0,
-            'competitions_analyzed': len(recent)
+            'competitions_analyzed': len(recent_positions)
         }
     
     avg_position = sum(positions) / len(positions)
@@ -188,46 +349,18 @@ def calculate_percentile_stats(results: List[Dict], last_n: int = 10) -> Dict:
         'avg_position': round(avg_position, 1),
         'avg_percentile': round(estimated_percentile, 1),
         'top_finishes': top_finishes,
-        'competitions_analyzed': len(recent)
+        'competitions_analyzed': len(recent_positions)
     }
 
-def get_best_score_by_category(results: List[Dict]) -> Dict:
+def get_best_score_by_category(results) -> Dict:
     """Get best scores grouped by category"""
-    data = load_competition_data()
-    category_scores = {}
-    
-    for result in results:
-        comp_type = result.get('competition_type')
-        score = result.get('score')
-        
-        # Skip if missing data or score is None/0
-        if not comp_type or score is None or score == 0:
-            continue
-        
-        # Find category for this competition type
-        category = get_competition_category(comp_type)
-        
-        if category not in category_scores:
-            category_scores[category] = {
-                'score': score,
-                'competition': result.get('competition_name'),
-                'date': result.get('date'),
-                'type': comp_type
-            }
-        elif score > category_scores[category]['score']:
-            category_scores[category] = {
-                'score': score,
-                'competition': result.get('competition_name'),
-                'date': result.get('date'),
-                'type': comp_type
-            }
-    
-    return category_scores
+    return as_columns(results).best_scores_by_category()
 
 def calculate_average_per_competition(results: List[Dict], include_average: bool = True) -> List[Dict]:
     """
     Process results and optionally add average score per arrow
     """
+    index = get_competition_index()
     processed_results = []
     
     for result in results:
@@ -238,9 +371,10 @@ def calculate_average_per_competition(results: List[Dict], include_average: bool
             comp_type = result.get('competition_type')
             
             if score and comp_type:
-                avg = calculate_average_score(score, comp_type)
-                processed['average_per_arrow'] = avg
-                processed['arrow_count'] = get_arrow_count(comp_type)
+                info = index.lookup(comp_type)
+                arrow_count = info['arrow_count'] if info else None
+                processed['average_per_arrow'] = round(score / arrow_count, 2) if arrow_count and arrow_count > 0 else None
+                processed['arrow_count'] = arrow_count
         
         processed_results.append(processed)
     
@@ -248,20 +382,22 @@ def calculate_average_per_competition(results: List[Dict], include_average: bool
 
 def filter_by_category(results: List[Dict], category: str) -> List[Dict]:
     """Filter results by category (indoor/outdoor)"""
-    filtered = []
+    index = get_competition_index()
     
-    for result in results:
-        comp_type = result.get('competition_type')
-        if comp_type and get_competition_category(comp_type) == category:
-            filtered.append(result)
-    
-    return filtered
+    return [
+        result for result in results
+        if result.get('competition_type') and index.category_of(result['competition_type']) == category
+    ]
 
-def get_statistics_summary(results: List[Dict], last_n: int = 10) -> Dict:
+def get_statistics_summary(results, last_n: int = 10) -> Dict:
     """
     Generate comprehensive statistics summary
+    
+    Args:
+        results: List of result dicts or a ResultColumns built from them
+        last_n: Number of recent competitions used for percentile stats
     """
-    if not results:
+    if not len(results):
         return {
             'total_competitions': 0,
             'medals': {'gold': 0, 'silver': 0, 'bronze': 0},
@@ -270,30 +406,12 @@ def get_statistics_summary(results: List[Dict], last_n: int = 10) -> Dict:
             'categories': {}
         }
     
-    # Calculate medals
-    medals = calculate_medal_count(results)
-    
-    # Calculate percentile stats
-    percentile_stats = calculate_percentile_stats(results, last_n)
-    
-    # Get best scores by category
-    best_scores = get_best_score_by_category(results)
-    
-    # Get category breakdown
-    categories = {}
-    for category in get_categories():
-        cat_results = filter_by_category(results, category)
-        # Filter out None scores before finding max
-        valid_scores = [r.get('score', 0) for r in cat_results if r.get('score') is not None]
-        categories[category] = {
-            'count': len(cat_results),
-            'best_score': max(valid_scores, default=0) if valid_scores else 0
-        }
+    columns = as_columns(results)
     
     return {
-        'total_competitions': len(results),
-        'medals': medals,
-        'best_scores': best_scores,
-        'percentile_stats': percentile_stats,
-        'categories': categories
+        'total_competitions': len(columns),
+        'medals': columns.medal_counts(),
+        'best_scores': columns.best_scores_by_category(),
+        'percentile_stats': calculate_percentile_stats(columns, last_n),
+        'categories': columns.category_breakdown()
     }
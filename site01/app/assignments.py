@@ -0,0 +1,107 @@
+"""
+Read model for admin user -> athlete assignments
+
+Assignments are read with a single joined query (users x authorized_athletes)
+and serialized straight from row tuples; pages are keyset-paginated on
+user id, so listing stays one query however many users the club has.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import AuthorizedAthlete, User
+
+# Largest page accepted from clients
+MAX_PAGE_SIZE = 500
+
+ATHLETE_COLUMNS = (
+    AuthorizedAthlete.id,
+    AuthorizedAthlete.tessera_atleta,
+    AuthorizedAthlete.nome_atleta,
+    AuthorizedAthlete.cognome_atleta,
+    AuthorizedAthlete.categoria,
+    AuthorizedAthlete.classe,
+    AuthorizedAthlete.data_nascita,
+    AuthorizedAthlete.added_at,
+)
+
+
+def _athlete_dict(athlete_id, tessera, nome, cognome, categoria, classe, data_nascita, added_at) -> Dict:
+    return {
+        'id': athlete_id,
+        'tessera': tessera,
+        'nome_completo': f"{nome} {cognome}",
+        'categoria': categoria,
+        'classe': classe,
+        'data_nascita': data_nascita.isoformat() if data_nascita else None,
+        'added_at': added_at.isoformat() if added_at else None
+    }
+
+
+def get_user_athletes(user_id: int) -> List[Dict]:
+    """Athletes assigned to one user (oldest assignment first)"""
+    rows = db.session.execute(
+        select(*ATHLETE_COLUMNS)
+        .where(AuthorizedAthlete.user_id == user_id)
+        .order_by(AuthorizedAthlete.id)
+    )
+    return [_athlete_dict(*row) for row in rows]
+
+
+def list_assignments(after: Optional[int] = None, limit: Optional[int] = None,
+                     tessera: Optional[str] = None, username: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+    """Users with assigned athletes, grouped by user, ordered by user id
+
+    Args:
+        after: Keyset cursor - only users with id greater than this
+        limit: Maximum number of users (None: all)
+        tessera: Only assignments of this athlete
+        username: Only users whose username contains this (case-insensitive)
+
+    Returns:
+        Tuple (assignments, next cursor or None on the last page)
+    """
+    # Page of user ids, chosen inside the same statement as the join
+    page = (select(AuthorizedAthlete.user_id)
+            .join(User, User.id == AuthorizedAthlete.user_id)
+            .group_by(AuthorizedAthlete.user_id)
+            .order_by(AuthorizedAthlete.user_id))
+    if after is not None:
+        page = page.where(AuthorizedAthlete.user_id > after)
+    if tessera:
+        page = page.where(AuthorizedAthlete.tessera_atleta == tessera)
+    if username:
+        page = page.where(func.lower(User.username).contains(username.lower(), autoescape=True))
+    if limit is not None:
+        # One extra user tells whether there is a next page
+        page = page.limit(limit + 1)
+    page = page.subquery()
+
+    query = (select(User.id, User.username, User.email, User.first_name, User.last_name, *ATHLETE_COLUMNS)
+             .join(AuthorizedAthlete, AuthorizedAthlete.user_id == User.id)
+             .join(page, page.c.user_id == User.id)
+             .order_by(User.id, AuthorizedAthlete.id))
+    if tessera:
+        query = query.where(AuthorizedAthlete.tessera_atleta == tessera)
+
+    assignments = []
+    current = None
+    for user_id, user_name, email, first_name, last_name, *athlete in db.session.execute(query):
+        if current is None or current['user_id'] != user_id:
+            current = {
+                'user_id': user_id,
+                'username': user_name,
+                'email': email,
+                'first_name': first_name,
+                'last_name': last_name,
+                'athletes': []
+            }
+            assignments.append(current)
+        current['athletes'].append(_athlete_dict(*athlete))
+
+    next_after = None
+    if limit is not None and len(assignments) > limit:
+        assignments = assignments[:limit]
+        next_after = assignments[-1]['user_id']
+    return assignments, next_after
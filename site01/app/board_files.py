@@ -0,0 +1,117 @@
+"""
+Aggregated file index across all boards
+
+The File Manager lists files of every board, which the API only exposes per
+board (/api/elec/boards/{id}/files): the proxy used to read the board list
+and then each board's files one after the other. The aggregated list is now
+built with a bounded concurrent fan-out and kept in the shared response
+cache (app.api.cache), so every worker serves it until it expires or one of
+our own board/file writes invalidates it. Stale copies are served while a
+single background rebuild runs.
+
+Category and filename search filters and pagination are applied to the
+cached index.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Not under "GET /api/elec": component stock writes must not drop it
+INDEX_KEY = 'electronics board files'
+TTL_SECONDS = 300           # Fresh window (our own writes invalidate it earlier)
+STALE_SECONDS = 3600        # Extra window served while one worker rebuilds
+CONCURRENCY = 8             # Concurrent per-board requests while building
+
+
+def _board_files(client, board) -> Optional[List[Dict]]:
+    """Files of one board annotated with board name/version, None if they could not be read"""
+    try:
+        files = client._make_request('GET', f'/api/elec/boards/{board["id"]}/files')
+    except Exception as e:
+        logger.warning(f"Could not read files of board {board.get('id')}: {e}")
+        return None
+    if not isinstance(files, list):
+        return []
+    for file in files:
+        file['board_name'] = board.get('name', 'Unknown')
+        file['board_version'] = board.get('version', '')
+    return files
+
+
+def build_index(client, concurrency: int = CONCURRENCY) -> Tuple[List[Dict], bool]:
+    """Read every board's files
+
+    Returns:
+        Tuple (files in board order, complete). Boards whose files could not
+        be read are left out and the index is marked incomplete.
+    """
+    boards = client._make_request('GET', '/api/elec/boards')
+    if not isinstance(boards, list) or not boards:
+        return [], isinstance(boards, list)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(boards)))) as pool:
+        per_board = list(pool.map(lambda board: _board_files(client, board), boards))
+
+    files = []
+    for board_files in per_board:
+        files.extend(board_files or [])
+    return files, all(board_files is not None for board_files in per_board)
+
+
+def _store(client, files):
+    client.cache.set(INDEX_KEY, files, TTL_SECONDS, STALE_SECONDS)
+
+
+def _rebuild_in_background(client, concurrency):
+    try:
+        files, complete = build_index(client, concurrency)
+        if complete:
+            _store(client, files)
+    except Exception as e:
+        logger.warning(f"Board file index rebuild failed: {e}")
+
+
+def get_index(client, concurrency: int = CONCURRENCY) -> List[Dict]:
+    """All files of all boards (cached when the client has a response cache)"""
+    if client.cache is None:
+        return build_index(client, concurrency)[0]
+
+    cached = client.cache.get(INDEX_KEY)
+    if cached is not None:
+        files, is_fresh = cached
+        if not is_fresh and client.cache.claim_refresh(INDEX_KEY):
+            threading.Thread(target=_rebuild_in_background, args=(client, concurrency), daemon=True).start()
+        return files
+
+    files, complete = build_index(client, concurrency)
+    if complete:
+        _store(client, files)  # A partial index is served once but not cached
+    return files
+
+
+def invalidate_index(client):
+    """Drop the cached index after a board or file change"""
+    if client.cache is not None:
+        client.cache.invalidate(INDEX_KEY)
+
+
+def filter_files(files: List[Dict], category=None, q=None) -> List[Dict]:
+    """Files matching every given filter
+
+    Args:
+        category: File type (e.g. 'gerber', 'ibom')
+        q: Case-insensitive search in filename, display name, version tag, notes and board name
+    """
+    if category:
+        files = [f for f in files if str(f.get('file_type') or '').lower() == category.lower()]
+    if q:
+        needle = q.strip().lower()
+        files = [
+            f for f in files
+            if any(needle in str(f.get(field) or '').lower()
+                   for field in ('filename', 'display_name', 'version_tag', 'notes', 'board_name'))
+        ]
+    return files
@@ -0,0 +1,190 @@
+"""
+Materialized career statistics
+
+athlete_career_stats holds the career block of /archery/api/athlete/<id>/statistics
+for every athlete in the results warehouse. New results are merged into the
+running aggregates (counts, best scores, recent-results window) as they are
+ingested; a changed result triggers a rebuild of that athlete from the
+results table, since a max cannot be un-merged.
+
+Ties are broken by the order the warehouse returns results in (date desc,
+competition_id, competition_type), so merged and recomputed statistics are
+identical.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from app import db
+from app.archery_utils import DEFAULT_DATE_ORDINAL, get_competition_index, summarize_recent_positions
+from app.models import AthleteCareerStats, Result
+
+# Number of recent competitions used for average position / percentile
+RECENT_WINDOW = 10
+
+MEDAL_COLUMNS = {1: 'gold_medals', 2: 'silver_medals', 3: 'bronze_medals'}
+
+
+def _row_view(row) -> Dict:
+    """Normalize a Result (or a dict of results column values) for aggregation"""
+    get = row.get if isinstance(row, dict) else lambda key: getattr(row, key)
+    row_date = get('date')
+    competition_type = get('competition_type') or ''
+    ordinal = row_date.toordinal() if row_date else None
+
+    return {
+        'competition_name': get('competition_name'),
+        'competition_type': competition_type or None,
+        'date': row_date.strftime('%Y-%m-%d') if row_date else None,
+        'score': get('score'),
+        'position': get('position'),
+        # Warehouse read order: date desc (missing last), competition_id, competition_type
+        'order_key': [ordinal is None, -(ordinal or 0), get('competition_id') or '', competition_type],
+        'recent_ordinal': ordinal if ordinal is not None else DEFAULT_DATE_ORDINAL
+    }
+
+
+def _beats(score, key, best_score, best_key) -> bool:
+    """True if (score, key) replaces the current best (higher score, earlier row on ties)"""
+    return best_key is None or score > best_score or (score == best_score and key < best_key)
+
+
+def merge_results(stats: AthleteCareerStats, rows: Iterable) -> AthleteCareerStats:
+    """Merge new results into an athlete's running aggregates
+
+    Args:
+        stats: AthleteCareerStats to update in place
+        rows: Result objects or dicts of results column values (new rows only)
+    """
+    index = get_competition_index()
+    categories = {c: dict(v) for c, v in (stats.category_breakdown or {}).items()}
+    best_by_category = {c: dict(v) for c, v in (stats.best_scores_by_category or {}).items()}
+    recent = list(stats.recent_results or [])
+
+    for row in map(_row_view, rows):
+        score = row['score']
+        position = row['position']
+        key = row['order_key']
+
+        stats.total_competitions = (stats.total_competitions or 0) + 1
+        medal_column = MEDAL_COLUMNS.get(position)
+        if medal_column:
+            setattr(stats, medal_column, (getattr(stats, medal_column) or 0) + 1)
+
+        if score is not None and score > 0 and _beats(score, key, stats.best_score, stats.best_score_key):
+            stats.best_score = score
+            stats.best_score_competition = row['competition_name']
+            stats.best_score_key = key
+
+        if row['competition_type']:
+            info = index.lookup(row['competition_type'])
+            category = info['category'] if info else 'unknown'
+
+            if info:
+                entry = categories.setdefault(category, {'count': 0, 'best_score': None})
+                entry['count'] += 1
+                if score is not None and (entry['best_score'] is None or score > entry['best_score']):
+                    entry['best_score'] = score
+
+            if score is not None and score != 0:
+                best = best_by_category.get(category)
+                if best is None or _beats(score, key, best['score'], best['key']):
+                    best_by_category[category] = {
+                        'score': score,
+                        'competition': row['competition_name'],
+                        'date': row['date'],
+                        'type': row['competition_type'],
+                        'key': key
+                    }
+
+        recent.append({'key': [-row['recent_ordinal']] + key, 'position': position})
+
+    recent.sort(key=lambda r: r['key'])
+
+    # JSON columns are reassigned so SQLAlchemy sees the change
+    stats.category_breakdown = categories
+    stats.best_scores_by_category = best_by_category
+    stats.recent_results = recent[:RECENT_WINDOW]
+    stats.updated_at = datetime.utcnow()
+    return stats
+
+
+def rebuild_career_stats(athlete_id: str) -> AthleteCareerStats:
+    """Recompute an athlete's aggregates from every row in the results table"""
+    athlete_id = str(athlete_id)
+    stats = db.session.get(AthleteCareerStats, athlete_id) or AthleteCareerStats(athlete_id=athlete_id)
+
+    stats.total_competitions = 0
+    stats.gold_medals = stats.silver_medals = stats.bronze_medals = 0
+    stats.best_score = stats.best_score_competition = stats.best_score_key = None
+    stats.category_breakdown, stats.best_scores_by_category, stats.recent_results = {}, {}, []
+
+    # populate_existing: rows may have just been rewritten by a bulk upsert
+    merge_results(stats, Result.query.filter_by(athlete_id=athlete_id).populate_existing().all())
+    db.session.add(stats)
+    return stats
+
+
+def update_career_stats(athlete_id: str, inserted_rows, rows_changed: bool) -> AthleteCareerStats:
+    """Apply a warehouse sync to the materialized stats (caller commits)
+
+    Args:
+        athlete_id: Athlete tessera
+        inserted_rows: Column-value dicts of the rows that were new
+        rows_changed: Whether any existing row was updated
+    """
+    stats = db.session.get(AthleteCareerStats, str(athlete_id))
+    if stats is None or rows_changed:
+        return rebuild_career_stats(athlete_id)
+
+    if inserted_rows:
+        merge_results(stats, inserted_rows)
+    return stats
+
+
+def to_statistics(stats: AthleteCareerStats) -> Dict:
+    """Render stored aggregates as the career block returned by /statistics"""
+    index = get_competition_index()
+    stored_categories = stats.category_breakdown or {}
+
+    category_breakdown = {}
+    for category in index.categories:
+        entry = stored_categories.get(category) or {}
+        best = entry.get('best_score')
+        category_breakdown[category] = {
+            'count': entry.get('count', 0),
+            'best_score': best if best is not None else 0
+        }
+
+    best_scores = {
+        category: {k: v for k, v in best.items() if k != 'key'}
+        for category, best in (stats.best_scores_by_category or {}).items()
+    }
+
+    percentile_stats = summarize_recent_positions([r['position'] for r in stats.recent_results or []])
+
+    return {
+        'total_competitions': stats.total_competitions,
+        'gold_medals': stats.gold_medals,
+        'silver_medals': stats.silver_medals,
+        'bronze_medals': stats.bronze_medals,
+        'avg_position': percentile_stats['avg_position'],
+        'avg_percentile': percentile_stats['avg_percentile'],
+        'top_finishes': percentile_stats['top_finishes'],
+        'recent_competitions_analyzed': percentile_stats['competitions_analyzed'],
+        'best_scores_by_category': best_scores,
+        'category_breakdown': category_breakdown,
+        'best_score': stats.best_score,
+        'best_score_competition': stats.best_score_competition
+    }
+
+
+def load_career_statistics(athlete_id: str) -> Optional[Dict]:
+    """Get the stored career block for an athlete
+
+    Returns:
+        Career statistics dict, or None if the athlete has no stored results
+    """
+    stats = db.session.get(AthleteCareerStats, str(athlete_id))
+    if stats is None or not stats.total_competitions:
+        return None
+    return to_statistics(stats)
@@ -0,0 +1,249 @@
+"""
+Local competition and turn catalogue
+
+Keeps the /api/gare rows in the competitions table (external_id = codice) and
+the /api/turni rows in competition_turns, keyed by (codice_gara, turno), so
+building a notification email looks competition and turn details up locally
+instead of downloading every competition and every turn each time.
+
+The catalogue is filled lazily: an unknown codice loads the competition list
+once, and the turns of a competition are fetched the first time one of them
+is needed. A periodic delta refresh re-reads the upcoming competitions, writes
+only the rows that changed and re-reads turns that have gone stale.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.dates import parse_date
+from app.models import Competition, CompetitionTurn
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = 600       # Default delta refresh interval
+MISS_RETRY_SECONDS = 300    # Don't reload the upstream list for the same unknown codice more often
+UPSERT_CHUNK_SIZE = 50
+LOOKUP_CHUNK_SIZE = 500
+
+# Lazy-load misses per process: key -> monotonic time of the last upstream load
+_misses = {}
+_misses_lock = threading.Lock()
+_last_refresh_check = 0.0
+
+
+def _as_datetime(value):
+    parsed = parse_date(value)
+    return datetime.combine(parsed, datetime.min.time()) if parsed else None
+
+
+def build_competition_row(raw: Dict, now: datetime) -> Dict:
+    """Convert an /api/gare row to competitions column values"""
+    codice = str(raw['codice'])
+    return {
+        'external_id': codice,
+        'name': str(raw.get('nome') or codice)[:256],
+        'location': str(raw.get('luogo') or '')[:256] or None,
+        'start_date': _as_datetime(raw.get('data_inizio')),
+        'end_date': _as_datetime(raw.get('data_fine') or raw.get('data_inizio')),
+        'competition_type': str(raw.get('tipo') or '')[:64] or None,
+        'payload': raw,
+        'synced_at': now,
+        'turns_synced_at': None,
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def store_competitions(raw_competitions: Iterable[Dict]) -> Dict:
+    """Upsert /api/gare rows into the catalogue
+
+    Only new or changed rows are rewritten; a changed competition also
+    forgets its turns so they are fetched again on next use. Every row seen
+    gets its synced_at bumped.
+
+    Returns:
+        Dict with 'inserted', 'updated' and 'unchanged' counts
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for raw in raw_competitions or []:
+        if isinstance(raw, dict) and raw.get('codice'):
+            rows[str(raw['codice'])] = raw
+
+    codici = list(rows)
+    existing = {}
+    for start in range(0, len(codici), LOOKUP_CHUNK_SIZE):
+        chunk = codici[start:start + LOOKUP_CHUNK_SIZE]
+        existing.update(db.session.query(Competition.external_id, Competition.payload)
+                        .filter(Competition.external_id.in_(chunk)).all())
+
+    changed = [build_competition_row(raw, now) for codice, raw in rows.items() if existing.get(codice) != raw]
+    unchanged = [codice for codice in codici if existing.get(codice) == rows[codice]]
+    inserted = sum(1 for codice in rows if codice not in existing)
+
+    try:
+        for start in range(0, len(changed), UPSERT_CHUNK_SIZE):
+            stmt = sqlite_insert(Competition).values(changed[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['external_id'],
+                set_={c: stmt.excluded[c] for c in (
+                    'name', 'location', 'start_date', 'end_date', 'competition_type',
+                    'payload', 'synced_at', 'turns_synced_at', 'updated_at'
+                )}
+            )
+            db.session.execute(stmt)
+
+        for start in range(0, len(unchanged), LOOKUP_CHUNK_SIZE):
+            (Competition.query
+             .filter(Competition.external_id.in_(unchanged[start:start + LOOKUP_CHUNK_SIZE]))
+             .update({'synced_at': now}, synchronize_session=False))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {'inserted': inserted, 'updated': len(changed) - inserted, 'unchanged': len(unchanged)}
+
+
+def store_turns(codice_gara: str, raw_turns: Iterable[Dict]) -> int:
+    """Replace the stored turns of a competition with an /api/turni response
+
+    Returns:
+        Number of turns stored
+    """
+    codice_gara = str(codice_gara)
+    now = datetime.utcnow()
+    turns = {}
+    for raw in raw_turns or []:
+        if isinstance(raw, dict) and raw.get('turno') is not None:
+            turns[str(raw['turno'])] = raw
+
+    try:
+        CompetitionTurn.query.filter_by(codice_gara=codice_gara).delete(synchronize_session=False)
+        db.session.add_all(
+            CompetitionTurn(codice_gara=codice_gara, turno=turno[:16], payload=raw, synced_at=now)
+            for turno, raw in turns.items()
+        )
+        recorded = (Competition.query
+                    .filter_by(external_id=codice_gara)
+                    .update({'turns_synced_at': now}, synchronize_session=False))
+        if not recorded:
+            # Competition not in /api/gare: a stub row (no payload) records the turn sync
+            db.session.add(Competition(external_id=codice_gara, name=codice_gara[:256], turns_synced_at=now))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(turns)
+
+
+def _should_load(key) -> bool:
+    """Rate-limit upstream loads for keys that keep missing (per process)"""
+    now = time.monotonic()
+    with _misses_lock:
+        last = _misses.get(key)
+        if last is not None and now - last < MISS_RETRY_SECONDS:
+            return False
+        _misses[key] = now
+        return True
+
+
+def get_competition(codice_gara, client) -> Optional[Dict]:
+    """Get an /api/gare row by codice, loading the competition list on a miss
+
+    Returns:
+        The competition dict, or None if the upstream does not know it either
+    """
+    codice_gara = str(codice_gara)
+    competition = Competition.query.filter_by(external_id=codice_gara).first()
+    if competition is not None and competition.payload:
+        return competition.payload
+
+    if not _should_load(('gare', codice_gara)):
+        return None
+
+    competitions = client._make_request('GET', '/api/gare', params={'future': 'false', 'limit': 1000})
+    store_competitions(competitions if isinstance(competitions, list) else [])
+
+    competition = Competition.query.filter_by(external_id=codice_gara).first()
+    return competition.payload if competition is not None else None
+
+
+def get_turn(codice_gara, turno, client) -> Optional[Dict]:
+    """Get an /api/turni row by (codice_gara, turno), fetching the competition's turns if never loaded
+
+    Returns:
+        The turn dict, or None if the competition has no such turn
+    """
+    codice_gara = str(codice_gara)
+    competition = Competition.query.filter_by(external_id=codice_gara).first()
+    if competition is None:
+        # Load the competition first so the turn sync is recorded on its row
+        get_competition(codice_gara, client)
+        competition = Competition.query.filter_by(external_id=codice_gara).first()
+    synced = competition.turns_synced_at if competition is not None else None
+
+    if synced is None and _should_load(('turni', codice_gara)):
+        store_turns(codice_gara, client.get_turns(codice_gara))
+
+    turn = db.session.get(CompetitionTurn, (codice_gara, str(turno)))
+    return turn.payload if turn is not None else None
+
+
+def refresh_catalog(client, turns_max_age: int = REFRESH_SECONDS) -> Dict:
+    """Delta refresh: re-read upcoming competitions and their stale turns
+
+    Returns:
+        Competition counts from store_competitions plus 'turns' (competitions
+        whose turns were re-read)
+    """
+    upcoming = client.get_competitions(future=True, limit=1000)
+    upcoming = upcoming if isinstance(upcoming, list) else []
+    counts = store_competitions(upcoming)
+
+    # Only turns already in use (someone looked them up) are kept fresh
+    codici = [str(c['codice']) for c in upcoming if isinstance(c, dict) and c.get('codice')]
+    cutoff = datetime.utcnow() - timedelta(seconds=turns_max_age)
+    stale = []
+    for start in range(0, len(codici), LOOKUP_CHUNK_SIZE):
+        stale.extend(codice for (codice,) in db.session.query(Competition.external_id).filter(
+            Competition.external_id.in_(codici[start:start + LOOKUP_CHUNK_SIZE]),
+            Competition.turns_synced_at.isnot(None),
+            Competition.turns_synced_at < cutoff
+        ))
+
+    counts['turns'] = 0
+    for codice in stale:
+        try:
+            store_turns(codice, client.get_turns(codice))
+            counts['turns'] += 1
+        except Exception as e:
+            logger.warning(f"Could not refresh turns for competition {codice}: {e}")
+
+    return counts
+
+
+def refresh_catalog_if_due(client, interval: int = REFRESH_SECONDS) -> Optional[Dict]:
+    """Run refresh_catalog unless any worker refreshed within the last interval seconds"""
+    global _last_refresh_check
+
+    now = time.monotonic()
+    if now - _last_refresh_check < min(interval, 60):
+        return None
+    _last_refresh_check = now
+
+    latest = db.session.query(func.max(Competition.synced_at)).scalar()
+    if latest is not None and latest > datetime.utcnow() - timedelta(seconds=interval):
+        return None
+
+    counts = refresh_catalog(client, interval)
+    logger.info(f"Competition catalogue refreshed: {counts['inserted']} new, {counts['updated']} updated, "
+                f"{counts['turns']} turn list(s) re-read")
+    return counts
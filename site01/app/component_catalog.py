@@ -0,0 +1,295 @@
+"""
+Local component catalogue replica
+
+The electronics portal used to download the whole inventory
+(/api/elec/components?limit=10000) to list types and packages, to show one
+component, to match order lines and to read stock before an import. The
+inventory is now replicated in component_catalog, indexed on id,
+seller_code/supplier_code, manufacturer_code/mpn, package and product_type,
+and those endpoints are local lookups.
+
+- Delta sync: the full list is re-read when the replica is older than
+  max_age (in the background, one worker at a time, the old copy is served
+  meanwhile) and only new, changed and removed components are written.
+- Write-through: our own create/update/delete proxies apply their change
+  to the replica as soon as the API accepts it. Calls that change stock
+  upstream in other ways (job reservations) mark the replica dirty so the
+  next read re-syncs it.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import CatalogComponent, ComponentCatalogState
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = 300       # Default age after which the replica is re-synced
+FETCH_LIMIT = 10000         # Components read per sync (same limit the portal used)
+REFRESH_CLAIM_SECONDS = 120
+STATE_ID = 1
+UPSERT_CHUNK_SIZE = 200
+LOOKUP_CHUNK_SIZE = 500
+
+KEY_FIELDS = ('seller_code', 'supplier_code', 'manufacturer_code', 'mpn')
+
+
+def code_key(value) -> Optional[str]:
+    """Lookup form of a part code (stripped, lowercase), None if empty"""
+    value = str(value).strip().lower() if value is not None else ''
+    return value or None
+
+
+def build_component_row(raw: Dict, now: datetime) -> Dict:
+    """Convert an /api/elec/components row to component_catalog column values"""
+    row = {'id': int(raw['id']), 'payload': raw, 'synced_at': now}
+    for field in KEY_FIELDS:
+        row[field] = code_key(raw.get(field))
+    row['package'] = raw.get('package') or None
+    row['product_type'] = raw.get('product_type') or raw.get('category') or None
+    return row
+
+
+def _upsert(rows: List[Dict]):
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(CatalogComponent).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['id'],
+            set_={c: stmt.excluded[c] for c in KEY_FIELDS + ('package', 'product_type', 'payload', 'synced_at')}
+        )
+        db.session.execute(stmt)
+
+
+def _state() -> ComponentCatalogState:
+    state = db.session.get(ComponentCatalogState, STATE_ID)
+    if state is None:
+        state = ComponentCatalogState(id=STATE_ID, dirty=False, components=0)
+        db.session.add(state)
+    return state
+
+
+def store_components(raw_components: Iterable[Dict], complete: bool = True) -> Dict:
+    """Apply a full component list to the replica, writing only what changed
+
+    Args:
+        raw_components: /api/elec/components rows
+        complete: Whether the list is the whole inventory (components missing
+                  from it are deleted only then)
+
+    Returns:
+        Dict with inserted, updated, deleted and unchanged counts
+    """
+    now = datetime.utcnow()
+    wanted = {}
+    for raw in raw_components or []:
+        if isinstance(raw, dict) and raw.get('id') is not None:
+            try:
+                wanted[int(raw['id'])] = raw
+            except (TypeError, ValueError):
+                continue
+
+    existing = dict(db.session.query(CatalogComponent.id, CatalogComponent.payload).all())
+    changed = [build_component_row(raw, now) for cid, raw in wanted.items() if existing.get(cid) != raw]
+    removed = [cid for cid in existing if cid not in wanted] if complete else []
+    inserted = sum(1 for cid in wanted if cid not in existing)
+
+    try:
+        _upsert(changed)
+        for start in range(0, len(removed), LOOKUP_CHUNK_SIZE):
+            (CatalogComponent.query
+             .filter(CatalogComponent.id.in_(removed[start:start + LOOKUP_CHUNK_SIZE]))
+             .delete(synchronize_session=False))
+
+        state = _state()
+        state.synced_at = now
+        state.dirty = False
+        state.refreshing_until = None
+        state.last_error = None
+        state.components = len(existing) + inserted - len(removed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'inserted': inserted,
+        'updated': len(changed) - inserted,
+        'deleted': len(removed),
+        'unchanged': len(wanted) - len(changed)
+    }
+
+
+def sync_components(client) -> Dict:
+    """Re-read the inventory from the API and apply it to the replica
+
+    Raises:
+        ValueError: If the API did not return a component list
+    """
+    components = client.get_components(limit=FETCH_LIMIT)
+    if not isinstance(components, list):
+        raise ValueError('Unexpected /api/elec/components response')
+
+    complete = len(components) < FETCH_LIMIT
+    if not complete:
+        logger.warning(f"Component list truncated at {FETCH_LIMIT} rows, not deleting missing components")
+    return store_components(components, complete=complete)
+
+
+def _claim_refresh() -> bool:
+    """Claim the background sync (one worker at a time)"""
+    now = datetime.utcnow()
+    claimed = (ComponentCatalogState.query
+               .filter_by(id=STATE_ID)
+               .filter(or_(ComponentCatalogState.refreshing_until.is_(None),
+                           ComponentCatalogState.refreshing_until < now))
+               .update({'refreshing_until': now + timedelta(seconds=REFRESH_CLAIM_SECONDS)},
+                       synchronize_session=False))
+    db.session.commit()
+    return bool(claimed)
+
+
+def _sync_in_background(app):
+    from app.api import OrionAPIClient
+
+    with app.app_context():
+        try:
+            counts = sync_components(OrionAPIClient())
+            logger.info(f"Component catalogue synced: {counts['inserted']} new, {counts['updated']} updated, "
+                        f"{counts['deleted']} deleted")
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Component catalogue sync failed: {e}")
+            state = db.session.get(ComponentCatalogState, STATE_ID)
+            if state is not None:
+                state.last_error = str(e)[:1000]
+                db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def ensure_fresh(app, client, max_age: int = MAX_AGE_SECONDS, wait: bool = False, force: bool = False):
+    """Make the replica usable: sync now if it was never filled, in the background if stale
+
+    Args:
+        app: Flask app (for the background sync thread)
+        client: OrionAPIClient
+        max_age: Seconds after which the replica is re-synced
+        wait: Sync a stale replica before returning instead of in the background
+        force: Sync before returning whatever its age (read-modify-write
+               callers, e.g. stock after an order import, must not start from
+               a copy that misses upstream changes)
+    """
+    state = db.session.get(ComponentCatalogState, STATE_ID)
+    if force or state is None or state.synced_at is None:
+        sync_components(client)
+        return
+
+    if state.dirty or state.synced_at < datetime.utcnow() - timedelta(seconds=max_age):
+        if wait:
+            sync_components(client)
+        elif _claim_refresh():
+            threading.Thread(target=_sync_in_background, args=(app,), daemon=True).start()
+
+
+def mark_dirty():
+    """Flag the replica for re-sync after an upstream change we cannot mirror"""
+    try:
+        (ComponentCatalogState.query
+         .filter_by(id=STATE_ID)
+         .update({'dirty': True}, synchronize_session=False))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not mark the component catalogue dirty: {e}")
+
+
+# ---- Write-through from our own proxies ----
+
+def record_created(data: Optional[Dict], result) -> None:
+    """Add a component created through the API (re-sync if the response has no id)"""
+    if not isinstance(result, dict) or result.get('id') is None:
+        mark_dirty()
+        return
+    raw = dict(data or {})
+    raw.update(result)
+    _write_through(lambda: _upsert([build_component_row(raw, datetime.utcnow())]))
+
+
+def record_updated(component_id, data: Optional[Dict], result) -> None:
+    """Apply a PATCH accepted by the API to the stored component"""
+    def apply():
+        component = db.session.get(CatalogComponent, int(component_id))
+        if isinstance(result, dict) and result.get('id') is not None:
+            raw = dict(component.payload if component is not None else {})
+            raw.update(result)
+        elif component is not None:
+            # Only fields the API returns are mirrored (others, e.g. aliases, are ignored upstream too)
+            raw = dict(component.payload)
+            raw.update({k: v for k, v in (data or {}).items() if k in raw})
+        else:
+            mark_dirty()
+            return
+        _upsert([build_component_row(raw, datetime.utcnow())])
+
+    _write_through(apply)
+
+
+def record_deleted(component_id) -> None:
+    """Remove a component deleted through the API"""
+    _write_through(lambda: CatalogComponent.query.filter_by(id=int(component_id)).delete(synchronize_session=False))
+
+
+def _write_through(change):
+    try:
+        change()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Component catalogue write-through failed, re-syncing: {e}")
+        mark_dirty()
+
+
+# ---- Lookups ----
+
+def get_component(component_id) -> Optional[Dict]:
+    component = db.session.get(CatalogComponent, int(component_id))
+    return component.payload if component is not None else None
+
+
+def list_components(limit: int = 100, offset: int = 0) -> List[Dict]:
+    """Components ordered by id (same paging parameters as the API)"""
+    rows = (db.session.query(CatalogComponent.payload)
+            .order_by(CatalogComponent.id)
+            .offset(offset)
+            .limit(limit))
+    return [payload for (payload,) in rows]
+
+
+def all_components() -> List[Dict]:
+    """Every stored component ordered by id"""
+    return [payload for (payload,) in db.session.query(CatalogComponent.payload).order_by(CatalogComponent.id)]
+
+
+def get_components_by_id(ids: Iterable) -> Dict[int, Dict]:
+    """Stored components for a set of ids (unknown ids are left out)"""
+    ids = list({int(i) for i in ids})
+    found = {}
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        found.update(db.session.query(CatalogComponent.id, CatalogComponent.payload)
+                     .filter(CatalogComponent.id.in_(ids[start:start + LOOKUP_CHUNK_SIZE])))
+    return found
+
+
+def product_types() -> List[str]:
+    rows = db.session.query(CatalogComponent.product_type).filter(CatalogComponent.product_type.isnot(None)).distinct()
+    return sorted(value for (value,) in rows)
+
+
+def packages() -> List[str]:
+    rows = db.session.query(CatalogComponent.package).filter(CatalogComponent.package.isnot(None)).distinct()
+    return sorted(value for (value,) in rows)
@@ -0,0 +1,103 @@
+"""
+Shared date normalization for archery results
+
+Upstream dates arrive as YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY, YYYY/MM/DD,
+MM/DD/YYYY or full ISO timestamps. The format is picked from the shape of
+the string (one regex match) instead of trying strptime formats in turn,
+and parsed values are kept in a bounded LRU: the same competition dates
+repeat across athletes and requests.
+"""
+import logging
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of distinct date strings kept in the parse cache
+DATE_CACHE_SIZE = 4096
+
+_YEAR_FIRST = re.compile(r'([0-9]{4})([-/])([0-9]{1,2})\2([0-9]{1,2})')   # YYYY-MM-DD, YYYY/MM/DD
+_YEAR_LAST = re.compile(r'([0-9]{1,2})([-/])([0-9]{1,2})\2([0-9]{4})')    # DD/MM/YYYY, DD-MM-YYYY, MM/DD/YYYY
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse(value: str) -> Optional[date]:
+    """Parse a non-empty date string (memoized)"""
+    match = _YEAR_FIRST.fullmatch(value)
+    if match:
+        try:
+            return date(int(match[1]), int(match[3]), int(match[4]))
+        except ValueError:
+            pass
+    else:
+        match = _YEAR_LAST.fullmatch(value)
+        if match:
+            first, second, year = int(match[1]), int(match[3]), int(match[4])
+            try:
+                return date(year, second, first)
+            except ValueError:
+                # Day-first failed: slashes may still be US month-first
+                if match[2] == '/':
+                    try:
+                        return date(year, first, second)
+                    except ValueError:
+                        pass
+
+    # Any other shape: ISO timestamps ('2024-03-01T10:00:00Z', '20240301', ...)
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except ValueError:
+        logger.warning(f"Could not parse date '{value}'")
+        return None
+
+
+def parse_date(value) -> Optional[date]:
+    """Parse a date string in any supported format
+
+    Returns:
+        date object, or None if the value is empty or cannot be parsed
+    """
+    if not value or not isinstance(value, str):
+        return None
+    return _parse(value)
+
+
+def to_iso_date(value) -> Optional[str]:
+    """Normalize a date string to YYYY-MM-DD (None if it cannot be parsed)"""
+    parsed = parse_date(value)
+    return parsed.isoformat() if parsed else None
+
+
+def date_ordinal(value) -> Optional[int]:
+    """Get a sortable day number for a date string (None if it cannot be parsed)"""
+    parsed = parse_date(value)
+    return parsed.toordinal() if parsed else None
+
+
+def date_in_range(value, start_date=None, end_date=None) -> bool:
+    """Check start_date <= value <= end_date (inclusive, empty bounds are open)
+
+    Parsed dates are compared; when either side cannot be parsed the raw
+    strings are compared instead, as the original string filters did.
+    """
+    value_ordinal = date_ordinal(value)
+
+    if start_date:
+        start_ordinal = date_ordinal(start_date)
+        if value_ordinal is not None and start_ordinal is not None:
+            if value_ordinal < start_ordinal:
+                return False
+        elif (value or '') < start_date:
+            return False
+
+    if end_date:
+        end_ordinal = date_ordinal(end_date)
+        if value_ordinal is not None and end_ordinal is not None:
+            if value_ordinal > end_ordinal:
+                return False
+        elif (value or '') > end_date:
+            return False
+
+    return True
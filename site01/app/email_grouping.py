@@ -35,10 +35,15 @@ def send_grouped_emails(athletes_data, mail_type, subject_prefix, body_text, cli
     
     Args:
         athletes_data: List of dicts with keys: 'tessera_atleta', 'details' (dict)
+            and optionally 'skip_emails' (addresses already notified for this athlete)
         mail_type: Email template type (e.g., 'subscription', 'cancellation_confirmed')
         subject_prefix: Email subject prefix
         body_text: Email body text
         client: OrionAPIClient instance
+    
+    Returns:
+        List of dicts, one per address: 'email', 'tessere' (athletes included)
+        and 'error' (None if the email was queued)
     """
     # Group athletes by email address
     email_to_athletes = {}
@@ -52,6 +57,8 @@ def send_grouped_emails(athletes_data, mail_type, subject_prefix, body_text, cli
         user_emails = get_user_emails_for_athlete_cached(tessera, email_cache)
         
         for email in user_emails:
+            if email in athlete_data.get('skip_emails', ()):
+                continue
             if email not in email_to_athletes:
                 email_to_athletes[email] = []
             email_to_athletes[email].append({
@@ -60,7 +67,11 @@ def send_grouped_emails(athletes_data, mail_type, subject_prefix, body_text, cli
             })
     
     # Send one email per email address
+    deliveries = []
     for email, athletes in email_to_athletes.items():
+        delivery = {'email': email, 'tessere': [a['tessera'] for a in athletes], 'error': None}
+        deliveries.append(delivery)
+
         current_app.logger.info(f'[EMAIL] Sending grouped email to {email} for {len(athletes)} athlete(s)')
         
         try:
@@ -101,3 +112,6 @@ def send_grouped_emails(athletes_data, mail_type, subject_prefix, body_text, cli
             current_app.logger.info(f'[EMAIL] Successfully queued grouped email to {email}: {result}')
         except Exception as send_err:
             current_app.logger.error(f'[EMAIL] Failed to send grouped email to {email}: {send_err}')
+            delivery['error'] = str(send_err)
+    
+    return deliveries
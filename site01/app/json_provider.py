@@ -0,0 +1,94 @@
+"""
+Fast JSON encoding and decoding
+
+When orjson is installed, Flask responses (jsonify and returned dicts/lists)
+are serialized with it, and the API clients decode upstream bodies with it.
+Output stays semantically identical to the stdlib provider:
+
+- keys are sorted, dates use Flask's HTTP date format, Decimal becomes a string
+- compact output (indented in debug mode), with the same trailing newline
+- values orjson cannot encode (e.g. integers beyond 64 bits) fall back to
+  the stdlib encoder
+
+Bytes differ only where JSON allows it (non-ASCII characters are written as
+UTF-8 instead of \\u escapes, float spelling). Set JSON_COMPAT_MODE=true to
+keep Flask's stdlib provider and byte-identical responses.
+"""
+import json
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if ORJSON_AVAILABLE:
+    # Dates go through Flask's default() so they keep the HTTP date format
+    BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def loads(data):
+    """Decode JSON text or UTF-8 bytes (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or non-UTF-8 bytes: let the stdlib decide
+    return json.loads(data)
+
+
+def dumps(obj, sort_keys=True) -> str:
+    """Encode compact JSON without ASCII escaping (orjson when available)
+
+    Args:
+        sort_keys: Sort dict keys as Flask responses do (False keeps insertion order)
+    """
+    if ORJSON_AVAILABLE:
+        option = (BASE_OPTIONS | orjson.OPT_SORT_KEYS) if sort_keys else BASE_OPTIONS
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, default=DefaultJSONProvider.default, ensure_ascii=False, sort_keys=sort_keys,
+                      separators=(',', ':'))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (stdlib behaviour for explicit json.dumps options)"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = BASE_OPTIONS | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        try:
+            body = orjson.dumps(obj, default=self.default, option=option)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Install the orjson provider unless JSON_COMPAT_MODE is set or orjson is missing"""
+    if app.config.get('JSON_COMPAT_MODE'):
+        return
+    if not ORJSON_AVAILABLE:
+        logger.info("orjson not installed, using the stdlib JSON provider")
+        return
+    app.json = OrjsonProvider(app)
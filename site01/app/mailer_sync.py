@@ -0,0 +1,238 @@
+"""
+Bulk sync of athlete email links to the Orion mailer
+
+Every authorized athlete should be linked (/api/mailer/link) to the email of
+each user managing them. A sync job reads the wanted links from
+authorized_athletes in one joined query, pulls the current links of each
+athlete (/api/mailer/athlete/{tessera}), and posts only the missing ones.
+Both phases go through a bounded thread pool.
+
+Jobs run in a background thread and write their progress to mailer_sync_jobs
+so any worker can answer status polls. Starting a sync while one with the
+same scope is still running returns the running job. Since existing links
+are skipped, running a sync twice gives the same end state and a report
+with nothing left to link.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app import db
+from app.models import AuthorizedAthlete, MailerSyncJob, User
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = 8             # Default concurrent upstream requests per job
+PROGRESS_SECONDS = 1        # Progress is written at most this often
+ABANDONED_SECONDS = 600     # A running job without progress for this long died with its worker
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def desired_links(user_id: Optional[int] = None) -> Tuple[Dict[str, Dict[str, str]], List[int], int]:
+    """Links that should exist according to authorized_athletes
+
+    Args:
+        user_id: Only the athletes of this user (None: every user)
+
+    Returns:
+        Tuple (tessera -> {lowercase email: email}, ids of users without
+        an email, number of users with athletes)
+    """
+    query = (db.session.query(AuthorizedAthlete.tessera_atleta, User.id, User.email)
+             .join(User, User.id == AuthorizedAthlete.user_id))
+    if user_id is not None:
+        query = query.filter(User.id == user_id)
+
+    links = {}
+    users = set()
+    users_without_email = set()
+    for tessera, uid, email in query:
+        users.add(uid)
+        if not email:
+            users_without_email.add(uid)
+            continue
+        links.setdefault(str(tessera), {})[email.strip().lower()] = email.strip()
+
+    return links, sorted(users_without_email), len(users)
+
+
+def _linked_emails(response) -> set:
+    """Lowercase emails from an /api/mailer/athlete/{tessera} response"""
+    if isinstance(response, dict):
+        response = response.get('emails') or []
+    emails = set()
+    for item in response or []:
+        email = item.get('email') if isinstance(item, dict) else item
+        if isinstance(email, str) and email.strip():
+            emails.add(email.strip().lower())
+    return emails
+
+
+def _fetch_current(client, tessera):
+    """Current links of an athlete, or None if they could not be read"""
+    try:
+        return _linked_emails(client._make_request('GET', f'/api/mailer/athlete/{tessera}'))
+    except Exception as e:
+        logger.warning(f"Could not read mailer links for athlete {tessera}, linking all: {e}")
+        return None
+
+
+def _link(client, tessera, email):
+    client._make_request('POST', '/api/mailer/link', data={'tessera': int(tessera), 'email': email})
+
+
+class _Progress:
+    """Counters of a running job, written to its row at most every PROGRESS_SECONDS"""
+
+    def __init__(self, job):
+        self.job = job
+        self.last_write = datetime.utcnow()
+
+    def save(self, force=False):
+        now = datetime.utcnow()
+        if force or (now - self.last_write).total_seconds() >= PROGRESS_SECONDS:
+            self.job.updated_at = now
+            db.session.commit()
+            self.last_write = now
+
+
+def run_sync_job(job_id: str, client, concurrency: int = CONCURRENCY) -> Dict:
+    """Run a mailer sync job to completion (caller provides the app context)
+
+    Returns:
+        The job's final report
+    """
+    job = db.session.get(MailerSyncJob, job_id)
+    job.status = 'running'
+    job.updated_at = datetime.utcnow()
+    db.session.commit()
+    progress = _Progress(job)
+
+    try:
+        links, users_without_email, user_count = desired_links(job.user_id if job.scope == 'user' else None)
+        job.total = sum(len(emails) for emails in links.values())
+        progress.save(force=True)
+
+        errors = []
+        for uid in users_without_email:
+            logger.warning(f"User {uid} has no email, skipping their athletes")
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            # Phase 1: pull current links and diff
+            to_link = []
+            futures = {pool.submit(_fetch_current, client, tessera): tessera for tessera in links}
+            for future in as_completed(futures):
+                tessera = futures[future]
+                current = future.result()
+                for key, email in sorted(links[tessera].items()):
+                    if current is not None and key in current:
+                        job.already_linked += 1
+                        job.processed += 1
+                    else:
+                        to_link.append((tessera, email))
+                progress.save()
+
+            # Phase 2: apply only the missing links
+            futures = {pool.submit(_link, client, tessera, email): (tessera, email) for tessera, email in to_link}
+            for future in as_completed(futures):
+                tessera, email = futures[future]
+                try:
+                    future.result()
+                    job.linked += 1
+                except Exception as e:
+                    job.failed += 1
+                    errors.append(f"Athlete {tessera} ({email}): {e}")
+                    logger.error(f"Error syncing athlete {tessera} for user {email}: {e}")
+                job.processed += 1
+                progress.save()
+
+        synced = job.linked + job.already_linked
+        if job.scope == 'all':
+            message = f'Admin sync: {synced} out of {job.total} athletes from {user_count} users'
+        else:
+            message = f'Synced {synced} out of {job.total} athletes'
+
+        report = {
+            'message': message,
+            'synced': synced,
+            'total': job.total,
+            'linked': job.linked,
+            'already_linked': job.already_linked,
+            'failed': job.failed
+        }
+        if job.scope == 'all':
+            report['users_synced'] = user_count
+        if users_without_email:
+            report['users_without_email'] = users_without_email
+        if errors:
+            report['errors'] = sorted(errors)
+
+        job.report = report
+        job.status = 'done'
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Mailer sync job {job_id} failed: {e}", exc_info=True)
+        job = db.session.get(MailerSyncJob, job_id)
+        job.report = {'message': f'Sync failed: {e}', 'errors': [str(e)]}
+        job.status = 'failed'
+
+    job.finished_at = job.updated_at = datetime.utcnow()
+    db.session.commit()
+    return job.report
+
+
+def _run_in_background(app, job_id):
+    from app.api import OrionAPIClient
+
+    with app.app_context():
+        try:
+            run_sync_job(job_id, OrionAPIClient(), app.config.get('MAILER_SYNC_CONCURRENCY', CONCURRENCY))
+        except Exception as e:
+            logger.error(f"Mailer sync job {job_id} crashed: {e}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+def expire_abandoned_jobs():
+    """Fail active jobs whose worker stopped reporting progress (e.g. was restarted)"""
+    cutoff = datetime.utcnow() - timedelta(seconds=ABANDONED_SECONDS)
+    expired = (MailerSyncJob.query
+               .filter(MailerSyncJob.status.in_(ACTIVE_STATUSES), MailerSyncJob.updated_at < cutoff)
+               .update({'status': 'failed', 'finished_at': datetime.utcnow(),
+                        'report': {'message': 'Sync interrupted', 'errors': ['Worker stopped before finishing']}},
+                       synchronize_session=False))
+    if expired:
+        db.session.commit()
+    return expired
+
+
+def start_sync_job(app, user_id: int, scope: str) -> Tuple[MailerSyncJob, bool]:
+    """Start a mailer sync in the background, or return the one already running
+
+    Args:
+        app: Flask app (the job thread needs its own app context)
+        user_id: User starting the sync
+        scope: 'all' (every user's athletes) or 'user' (only user_id's)
+
+    Returns:
+        Tuple (job, created)
+    """
+    expire_abandoned_jobs()
+
+    active = MailerSyncJob.query.filter(MailerSyncJob.scope == scope, MailerSyncJob.status.in_(ACTIVE_STATUSES))
+    if scope == 'user':
+        active = active.filter(MailerSyncJob.user_id == user_id)
+    job = active.order_by(MailerSyncJob.created_at.desc()).first()
+    if job is not None:
+        return job, False
+
+    job = MailerSyncJob(id=uuid.uuid4().hex, user_id=user_id, scope=scope, status='queued')
+    db.session.add(job)
+    db.session.commit()
+
+    threading.Thread(target=_run_in_background, args=(app, job.id), name=f'mailer-sync-{job.id[:8]}',
+                     daemon=True).start()
+    return job, True
@@ -146,6 +146,11 @@ class Competition(db.Model):
     subscription_open = db.Column(db.Boolean, default=False)
     subscription_deadline = db.Column(db.DateTime)
     
+    # Catalogue copy of the /api/gare row (external_id = codice) and its turns
+    payload = db.Column(db.JSON)
+    synced_at = db.Column(db.DateTime, index=True)
+    turns_synced_at = db.Column(db.DateTime)
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -158,6 +163,18 @@ class Competition(db.Model):
     def __repr__(self):
         return f'<Competition {self.name}>'
 
+class CompetitionTurn(db.Model):
+    """Catalogue copy of an /api/turni row, keyed by (codice_gara, turno)"""
+    __tablename__ = 'competition_turns'
+    
+    codice_gara = db.Column(db.String(64), primary_key=True)
+    turno = db.Column(db.String(16), primary_key=True)
+    payload = db.Column(db.JSON)
+    synced_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<CompetitionTurn {self.codice_gara} #{self.turno}>'
+
 class CompetitionSubscription(db.Model):
     """User subscriptions to competitions"""
     __tablename__ = 'competition_subscriptions'
@@ -184,13 +201,13 @@ class CompetitionSubscription(db.Model):
         return f'<Subscription {self.user_id} -> {self.competition_id}>'
 
 class Result(db.Model):
-    """Archery competition results"""
+    """Archery competition results (local copy of /api/athlete/{tessera}/results)"""
     __tablename__ = 'results'
     
     id = db.Column(db.Integer, primary_key=True)
     athlete_id = db.Column(db.String(64), index=True)  # External athlete ID
     athlete_name = db.Column(db.String(128))
-    competition_id = db.Column(db.String(64), index=True)
+    competition_id = db.Column(db.String(64), index=True)  # codice_gara
     competition_name = db.Column(db.String(256))
     competition_type = db.Column(db.String(64))
     date = db.Column(db.DateTime)
@@ -203,12 +220,290 @@ class Result(db.Model):
     # Medals
     medal = db.Column(db.String(16))  # gold, silver, bronze
     
+    # Clubs
+    club_code = db.Column(db.String(16))
+    club_name = db.Column(db.String(256))
+    organizer_code = db.Column(db.String(16))
+    organizer_name = db.Column(db.String(256))
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # One row per athlete, competition and event type (upsert key); date index for ordered reads
+    __table_args__ = (
+        db.Index('uq_results_athlete_competition', 'athlete_id', 'competition_id', 'competition_type', unique=True),
+        db.Index('ix_results_athlete_date', 'athlete_id', 'date'),
+    )
+    
+    def to_result_dict(self):
+        """Convert to the transformed result format used by the archery routes"""
+        return {
+            'athlete': self.athlete_name,
+            'competition_name': self.competition_name,
+            'competition_type': self.competition_type or None,
+            'date': self.date.strftime('%Y-%m-%d') if self.date else None,
+            'position': self.position,
+            'score': self.score,
+            'club_code': self.club_code,
+            'club_name': self.club_name,
+            'organizer_code': self.organizer_code,
+            'organizer_name': self.organizer_name
+        }
     
     def __repr__(self):
         return f'<Result {self.athlete_name} - {self.competition_name}>'
 
+class ResultSyncState(db.Model):
+    """Last successful results sync per athlete"""
+    __tablename__ = 'result_sync_state'
+    
+    athlete_id = db.Column(db.String(64), primary_key=True)
+    last_synced_at = db.Column(db.DateTime, index=True)
+    result_count = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<ResultSyncState {self.athlete_id} at {self.last_synced_at}>'
+
+class AthleteCareerStats(db.Model):
+    """Materialized career statistics per athlete (maintained from the results table)"""
+    __tablename__ = 'athlete_career_stats'
+    
+    athlete_id = db.Column(db.String(64), primary_key=True)
+    total_competitions = db.Column(db.Integer, default=0)
+    gold_medals = db.Column(db.Integer, default=0)
+    silver_medals = db.Column(db.Integer, default=0)
+    bronze_medals = db.Column(db.Integer, default=0)
+    
+    # Overall best score and the ordering key of its result (for tie-breaks on merge)
+    best_score = db.Column(db.Integer)
+    best_score_competition = db.Column(db.String(256))
+    best_score_key = db.Column(db.JSON)
+    
+    # Running aggregates (JSON): category -> {count, best_score}, category -> best result,
+    # and the most recent results kept for the average-position window
+    category_breakdown = db.Column(db.JSON)
+    best_scores_by_category = db.Column(db.JSON)
+    recent_results = db.Column(db.JSON)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<AthleteCareerStats {self.athlete_id}: {self.total_competitions} competitions>'
+
+class RankingPosition(db.Model):
+    """Available ranking positions per qualification/class/division (imported from CSV)"""
+    __tablename__ = 'ranking_positions'
+    
+    qualifica = db.Column(db.String(128), primary_key=True)
+    classe_gara = db.Column(db.String(64), primary_key=True)
+    categoria = db.Column(db.String(64), primary_key=True)
+    posti_disponibili = db.Column(db.Integer, nullable=False)
+    punteggio_minimo = db.Column(db.Integer)
+    sort_order = db.Column(db.Integer, default=0)  # Row order of the imported CSV
+    generation = db.Column(db.Integer, default=0)  # Generation that last changed this row
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RankingPosition {self.qualifica} {self.classe_gara} {self.categoria}: {self.posti_disponibili}>'
+
+class RankingPositionsState(db.Model):
+    """Generation counter of ranking_positions (single row, bumped on every change)"""
+    __tablename__ = 'ranking_positions_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RankingPositionsState generation {self.generation}>'
+
+class RankingSnapshot(db.Model):
+    """Cached official ranking with qualification annotations"""
+    __tablename__ = 'ranking_snapshots'
+    
+    code = db.Column(db.String(128), primary_key=True)
+    class_name = db.Column(db.String(64), primary_key=True)
+    division = db.Column(db.String(64), primary_key=True)
+    
+    raw_rows = db.Column(db.JSON)  # /api/ranking/official response
+    rows = db.Column(db.JSON)  # Annotated rows served to clients
+    etag = db.Column(db.String(64))
+    positions_generation = db.Column(db.Integer)  # Ranking positions generation used for the annotations
+    
+    fetched_at = db.Column(db.DateTime, index=True)
+    refreshing_until = db.Column(db.DateTime)  # Background refresh claim
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<RankingSnapshot {self.code} {self.class_name} {self.division}>'
+
+class RankingAthleteEntry(db.Model):
+    """Inverted index of ranking snapshots: one athlete's row in one ranking"""
+    __tablename__ = 'ranking_athlete_entries'
+    __table_args__ = (
+        db.Index('ix_ranking_athlete_entries_snapshot', 'code', 'class_name', 'division'),
+    )
+    
+    tessera = db.Column(db.String(16), primary_key=True)  # Without leading zeros
+    code = db.Column(db.String(128), primary_key=True)  # Snapshot key
+    class_name = db.Column(db.String(64), primary_key=True)
+    division = db.Column(db.String(64), primary_key=True)
+    
+    entry = db.Column(db.JSON)  # /api/athlete/{tessera}/rankings row with annotations
+    positions_generation = db.Column(db.Integer)
+    
+    def __repr__(self):
+        return f'<RankingAthleteEntry {self.tessera} {self.code} {self.class_name} {self.division}>'
+
+class RankingIndexState(db.Model):
+    """Coverage of ranking_athlete_entries (single row, set by a full sweep)"""
+    __tablename__ = 'ranking_index_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    swept_at = db.Column(db.DateTime)  # Last sweep that fetched every ranking without errors
+    snapshots = db.Column(db.Integer, default=0)
+    
+    def __repr__(self):
+        return f'<RankingIndexState swept {self.swept_at}>'
+
+class RankingIndexCoverage(db.Model):
+    """Qualifiche whose individual rankings a sweep fetched without errors"""
+    __tablename__ = 'ranking_index_coverage'
+    
+    code = db.Column(db.String(100), primary_key=True)
+    swept_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<RankingIndexCoverage {self.code} swept {self.swept_at}>'
+
+class NotificationOutbox(db.Model):
+    """Pending subscription/interest notification emails (sent by the dispatcher)"""
+    __tablename__ = 'notification_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    event_type = db.Column(db.String(32), nullable=False)  # e.g. subscription_created, interest_cancelled
+    tessera_atleta = db.Column(db.String(10), nullable=False)
+    codice_gara = db.Column(db.String(64))
+    payload = db.Column(db.JSON)  # Request data needed to build the email
+    
+    # pending -> sending -> sent / skipped / failed
+    status = db.Column(db.String(16), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # Claim expiry while a dispatcher is sending
+    delivered_to = db.Column(db.JSON)  # Addresses already notified (skipped on retry)
+    last_error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_notification_outbox_due', 'status', 'next_attempt_at'),
+    )
+    
+    def __repr__(self):
+        return f'<NotificationOutbox {self.id} {self.event_type} {self.status}>'
+
+class MailerSyncJob(db.Model):
+    """Background sync of athlete -> manager email links to the Orion mailer"""
+    __tablename__ = 'mailer_sync_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    scope = db.Column(db.String(16), nullable=False)  # 'all' (admin) or 'user'
+    
+    # queued -> running -> done / failed
+    status = db.Column(db.String(16), default='queued', nullable=False)
+    total = db.Column(db.Integer, default=0)       # Links that should exist
+    processed = db.Column(db.Integer, default=0)   # Links checked or applied so far
+    linked = db.Column(db.Integer, default=0)      # Links created by this job
+    already_linked = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    report = db.Column(db.JSON)  # Final result (message, counts, errors)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Heartbeat while running
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_mailer_sync_jobs_scope_status', 'scope', 'user_id', 'status'),
+    )
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'scope': self.scope,
+            'total': self.total,
+            'processed': self.processed,
+            'linked': self.linked,
+            'already_linked': self.already_linked,
+            'failed': self.failed,
+            'report': self.report,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<MailerSyncJob {self.id} {self.scope} {self.status}>'
+
+class CatalogComponent(db.Model):
+    """Local replica of an /api/elec/components row (id = upstream id)"""
+    __tablename__ = 'component_catalog'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    
+    # Lookup keys (lowercase, stripped) - the original values are in payload
+    seller_code = db.Column(db.String(64), index=True)
+    supplier_code = db.Column(db.String(64), index=True)
+    manufacturer_code = db.Column(db.String(128), index=True)
+    mpn = db.Column(db.String(128), index=True)
+    
+    package = db.Column(db.String(64), index=True)
+    product_type = db.Column(db.String(64), index=True)  # product_type, or category on older rows
+    
+    payload = db.Column(db.JSON)  # Component as returned by the API
+    synced_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<CatalogComponent {self.id}>'
+
+class ComponentCatalogState(db.Model):
+    """Sync status of component_catalog (single row)"""
+    __tablename__ = 'component_catalog_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    synced_at = db.Column(db.DateTime)  # Last full sync
+    dirty = db.Column(db.Boolean, default=False)  # Stock changed upstream by our own calls (e.g. reservations)
+    refreshing_until = db.Column(db.DateTime)  # Background sync claim
+    components = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<ComponentCatalogState synced {self.synced_at}>'
+
+class StockMutation(db.Model):
+    """Stock change (order import, job reservation) keyed on the client's idempotency key"""
+    __tablename__ = 'stock_mutations'
+
+    idempotency_key = db.Column(db.String(64), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)  # 'order_import' or 'reserve_stock'
+    request_hash = db.Column(db.String(64), nullable=False)  # Same key with another payload is rejected
+
+    # running -> done / partial / failed
+    status = db.Column(db.String(16), default='running', nullable=False)
+    planned = db.Column(db.JSON)  # component_id -> absolute fields to PATCH (computed once)
+    applied = db.Column(db.JSON)  # component_ids the API accepted
+    result = db.Column(db.JSON)   # Last response body
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Heartbeat while running
+
+    def __repr__(self):
+        return f'<StockMutation {self.kind} {self.idempotency_key} {self.status}>'
+
 class Newsletter(db.Model):
     """Newsletter subscriptions"""
     __tablename__ = 'newsletter_subscriptions'
@@ -0,0 +1,434 @@
+"""
+Notification outbox for subscription and interest emails
+
+Routes only record what happened (enqueue_notification) and return as soon as
+the upstream write succeeded. A dispatcher thread in each worker process
+claims due rows, fetches competition/turn/athlete details, groups rows that
+produce the same email (same competition and message) through
+send_grouped_emails and retries failed sends with exponential backoff.
+"""
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from app import db
+from app.models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50             # Rows claimed per dispatch round
+CLAIM_SECONDS = 120         # A claimed row is retried by others after this long
+POLL_SECONDS = 30           # Dispatcher wakes up at least this often (retries)
+BATCH_WINDOW_SECONDS = 2    # Wait after a wake-up so notifications enqueued together are grouped
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 30   # 30s, 60s, 120s, ... capped
+BACKOFF_MAX_SECONDS = 3600
+
+
+# ==================== EMAIL BUILDERS ====================
+
+def _competition_dates(comp_details, details):
+    """Add Data/Date entries from competition details"""
+    if comp_details.get('data_inizio'):
+        data_inizio = comp_details['data_inizio']
+        data_fine = comp_details.get('data_fine')
+        if data_fine and data_fine != data_inizio:
+            details['Date'] = f"{data_inizio} / {data_fine}"
+        else:
+            details['Data'] = data_inizio
+
+
+def _athlete_display(tessera_atleta):
+    from app.routes.archery import get_athlete_name
+
+    athlete_name = get_athlete_name(tessera_atleta)
+    return f"{tessera_atleta} - {athlete_name}" if athlete_name else str(tessera_atleta)
+
+
+def _subject(base, comp_details):
+    if comp_details and comp_details.get('nome'):
+        return f"{base} - {comp_details['nome']}"
+    return base
+
+
+def _build_subscription_created(payload, client):
+    from app.routes.archery import get_competition_details, get_turn_details
+
+    data = payload['data']
+    comp_details = get_competition_details(data['codice_gara'], client)
+    turn_info = get_turn_details(data['codice_gara'], data['turno'], client)
+
+    details = {}
+    if comp_details:
+        details['Nome Gara'] = comp_details.get('nome', '')
+        _competition_dates(comp_details, details)
+        if comp_details.get('luogo'):
+            details['Luogo'] = comp_details['luogo']
+        if comp_details.get('societa_nome'):
+            details['Società Organizzatrice'] = comp_details['societa_nome']
+        elif comp_details.get('societa_codice'):
+            details['Società Organizzatrice'] = comp_details['societa_codice']
+
+    details['Codice Gara'] = data['codice_gara']
+    details['Atleta'] = _athlete_display(data['tessera_atleta'])
+    details['Categoria'] = data['categoria']
+    details['Classe'] = data.get('classe', 'N/A')
+
+    turn_display = str(data['turno'])
+    if turn_info:
+        turn_display += f" ({turn_info})"
+    details['Turno'] = turn_display
+    details['Stato'] = data.get('stato', 'confermato')
+
+    return ('subscription', _subject('Iscrizione confermata', comp_details),
+            'Iscrizione registrata con successo.', details)
+
+
+def _build_cancellation(payload, client, id_label, base_subject, body_text):
+    from app.routes.archery import get_competition_details
+
+    codice_gara = payload.get('codice_gara', '')
+    comp_details = get_competition_details(codice_gara, client) if codice_gara else None
+
+    details = {}
+    if comp_details and comp_details.get('nome'):
+        details['Nome Gara'] = comp_details['nome']
+    details['Codice Gara'] = codice_gara
+    details['Atleta'] = _athlete_display(payload['tessera_atleta'])
+    if id_label:
+        details[id_label] = str(payload['id'])
+    details['Stato'] = 'Cancellata'
+
+    return 'cancellation_confirmed', _subject(base_subject, comp_details), body_text, details
+
+
+def _build_subscription_cancelled(payload, client):
+    return _build_cancellation(payload, client, 'ID Iscrizione', 'Iscrizione cancellata',
+                               'Iscrizione cancellata con successo.')
+
+
+def _build_interest_cancelled(payload, client):
+    return _build_cancellation(payload, client, None, 'Interesse cancellato',
+                               'Espressione di interesse cancellata con successo.')
+
+
+def _build_modification(payload, client, id_label, base_subject, body_text, describe_turn):
+    from app.routes.archery import get_competition_details, get_turn_details
+
+    data = payload['data']
+    codice_gara = data.get('codice_gara', '')
+    comp_details = get_competition_details(codice_gara, client) if codice_gara else None
+
+    changes = []
+    for k, v in data.items():
+        if k in ['tessera_atleta', 'codice_gara', 'athlete_email']:
+            continue
+        if k == 'turno' and describe_turn:
+            turn_info = get_turn_details(codice_gara, v, client)
+            display = str(v)
+            if turn_info:
+                display += f" ({turn_info})"
+            changes.append(f"{k}: {display}")
+        else:
+            changes.append(f"{k}: {v}")
+
+    details = {}
+    if comp_details and comp_details.get('nome'):
+        details['Nome Gara'] = comp_details['nome']
+    details['Codice Gara'] = codice_gara
+    details['Atleta'] = _athlete_display(data['tessera_atleta'])
+    if id_label:
+        details[id_label] = str(payload['id'])
+    details['Modifiche'] = ', '.join(changes) if changes else 'Nessuna modifica specifica'
+
+    return 'modification_confirmed', _subject(base_subject, comp_details), body_text, details
+
+
+def _build_subscription_modified(payload, client):
+    return _build_modification(payload, client, 'ID Iscrizione', 'Iscrizione modificata',
+                               'Iscrizione modificata con successo.', describe_turn=True)
+
+
+def _build_interest_modified(payload, client):
+    return _build_modification(payload, client, None, 'Interesse modificato',
+                               'Espressione di interesse modificata con successo.', describe_turn=False)
+
+
+def _build_interest_created(payload, client):
+    from app.routes.archery import get_competition_details
+
+    data = payload['data']
+    comp_details = get_competition_details(data['codice_gara'], client)
+
+    details = {}
+    if comp_details:
+        details['Nome Gara'] = comp_details.get('nome', '')
+        _competition_dates(comp_details, details)
+
+    details['Codice Gara'] = data['codice_gara']
+    details['Atleta'] = _athlete_display(data['tessera_atleta'])
+    details['Categoria'] = data['categoria']
+    details['Classe'] = data.get('classe', 'N/A')
+    if data.get('note'):
+        details['Note'] = data['note']
+
+    return ('interest', _subject('Interesse registrato', comp_details),
+            'Espressione di interesse registrata con successo.', details)
+
+
+# event_type -> builder(payload, client) -> (mail_type, subject, body_text, details)
+EMAIL_BUILDERS = {
+    'subscription_created': _build_subscription_created,
+    'subscription_cancelled': _build_subscription_cancelled,
+    'subscription_modified': _build_subscription_modified,
+    'interest_created': _build_interest_created,
+    'interest_cancelled': _build_interest_cancelled,
+    'interest_modified': _build_interest_modified,
+}
+
+
+# ==================== OUTBOX ====================
+
+def enqueue_notification(event_type, tessera_atleta, codice_gara=None, payload=None):
+    """Record a notification to be emailed by the dispatcher
+
+    Args:
+        event_type: One of EMAIL_BUILDERS
+        tessera_atleta: Athlete the notification is about
+        codice_gara: Competition code (used to group emails)
+        payload: JSON-serializable data needed to build the email
+
+    Returns:
+        The NotificationOutbox row, or None if it could not be stored
+    """
+    if event_type not in EMAIL_BUILDERS:
+        raise ValueError(f"Unknown notification event: {event_type}")
+
+    payload = dict(payload or {})
+    payload.setdefault('tessera_atleta', tessera_atleta)
+    if codice_gara:
+        payload.setdefault('codice_gara', codice_gara)
+
+    try:
+        row = NotificationOutbox(
+            event_type=event_type,
+            tessera_atleta=str(tessera_atleta),
+            codice_gara=codice_gara or None,
+            payload=payload,
+            status='pending',
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(row)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"[EMAIL] Could not queue {event_type} notification for {tessera_atleta}: {e}")
+        return None
+
+    logger.info(f"[EMAIL] Queued {event_type} notification #{row.id} for athlete {tessera_atleta}")
+    wake_dispatcher()
+    return row
+
+
+def claim_due_notifications(limit=BATCH_SIZE):
+    """Claim due rows for this dispatcher (safe across worker processes)
+
+    Returns:
+        List of claimed NotificationOutbox rows
+    """
+    now = datetime.utcnow()
+    candidates = (NotificationOutbox.query
+                  .filter(or_(
+                      (NotificationOutbox.status == 'pending') & (NotificationOutbox.next_attempt_at <= now),
+                      (NotificationOutbox.status == 'sending') & (NotificationOutbox.locked_until < now)
+                  ))
+                  .order_by(NotificationOutbox.id)
+                  .limit(limit)
+                  .with_entities(NotificationOutbox.id, NotificationOutbox.status)
+                  .all())
+
+    claimed_ids = []
+    for row_id, status in candidates:
+        # Conditional update: only one dispatcher wins each row
+        updated = (NotificationOutbox.query
+                   .filter(NotificationOutbox.id == row_id, NotificationOutbox.status == status)
+                   .filter(or_(NotificationOutbox.locked_until.is_(None), NotificationOutbox.locked_until < now))
+                   .update({'status': 'sending', 'locked_until': now + timedelta(seconds=CLAIM_SECONDS)},
+                           synchronize_session=False))
+        if updated:
+            claimed_ids.append(row_id)
+    db.session.commit()
+
+    if not claimed_ids:
+        return []
+    return NotificationOutbox.query.filter(NotificationOutbox.id.in_(claimed_ids)).order_by(NotificationOutbox.id).all()
+
+
+def _schedule_retry(row, error):
+    """Put a row back in the queue with backoff, or give up"""
+    row.attempts = (row.attempts or 0) + 1
+    row.last_error = str(error)[:1000]
+    row.locked_until = None
+    if row.attempts >= MAX_ATTEMPTS:
+        row.status = 'failed'
+        logger.error(f"[EMAIL] Notification #{row.id} failed after {row.attempts} attempts: {error}")
+    else:
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (row.attempts - 1), BACKOFF_MAX_SECONDS)
+        row.status = 'pending'
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning(f"[EMAIL] Notification #{row.id} will be retried in {delay}s: {error}")
+
+
+def dispatch_pending(client, limit=BATCH_SIZE):
+    """Send one batch of due notifications
+
+    Returns:
+        Number of rows processed
+    """
+    from app.email_grouping import send_grouped_emails
+
+    rows = claim_due_notifications(limit)
+    if not rows:
+        return 0
+
+    # Build every email, then group rows producing the same message for the same competition
+    groups = {}
+    for row in rows:
+        try:
+            mail_type, subject, body_text, details = EMAIL_BUILDERS[row.event_type](row.payload, client)
+        except Exception as e:
+            _schedule_retry(row, f"Could not build email: {e}")
+            continue
+        groups.setdefault((mail_type, subject, body_text, row.codice_gara), []).append((row, details))
+
+    for (mail_type, subject, body_text, _), members in groups.items():
+        try:
+            deliveries = send_grouped_emails(
+                athletes_data=[{
+                    'tessera_atleta': row.tessera_atleta,
+                    'details': details,
+                    'skip_emails': set(row.delivered_to or [])
+                } for row, details in members],
+                mail_type=mail_type,
+                subject_prefix=subject,
+                body_text=body_text,
+                client=client
+            )
+        except Exception as e:
+            for row, _ in members:
+                _schedule_retry(row, e)
+            continue
+
+        for row, _ in members:
+            mine = [d for d in deliveries if row.tessera_atleta in d['tessere']]
+            errors = [d['error'] for d in mine if d['error']]
+            delivered = [d['email'] for d in mine if not d['error']]
+            if delivered:
+                row.delivered_to = sorted(set(row.delivered_to or []) | set(delivered))
+
+            if errors:
+                _schedule_retry(row, '; '.join(errors))
+            else:
+                row.status = 'sent' if (mine or row.delivered_to) else 'skipped'
+                row.locked_until = None
+                row.sent_at = datetime.utcnow()
+                if row.status == 'skipped':
+                    logger.warning(f'[EMAIL] No users found managing athlete {row.tessera_atleta}')
+
+    db.session.commit()
+    return len(rows)
+
+
+def dispatch_all(client, limit=BATCH_SIZE):
+    """Dispatch batches until nothing is due; returns the number of rows processed"""
+    total = 0
+    while True:
+        processed = dispatch_pending(client, limit)
+        total += processed
+        if processed < limit:
+            return total
+
+
+# ==================== BACKGROUND DISPATCHER ====================
+
+class NotificationDispatcher:
+    """Background thread sending queued notifications for one worker process"""
+
+    def __init__(self, app):
+        self.app = app
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        from app.api import OrionAPIClient
+        from app.competition_catalog import refresh_catalog_if_due
+
+        while True:
+            woken = self._wake.wait(timeout=self.app.config.get('NOTIFICATION_POLL_SECONDS', POLL_SECONDS))
+            if woken:
+                time.sleep(self.app.config.get('NOTIFICATION_BATCH_WINDOW_SECONDS', BATCH_WINDOW_SECONDS))
+            self._wake.clear()
+            try:
+                with self.app.app_context():
+                    dispatch_all(OrionAPIClient())
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"[EMAIL] Notification dispatch failed: {e}", exc_info=True)
+
+            # The same thread keeps the competition catalogue used by the emails fresh
+            try:
+                with self.app.app_context():
+                    refresh_catalog_if_due(OrionAPIClient(),
+                                           self.app.config.get('COMPETITION_CATALOG_REFRESH_SECONDS', 600))
+                    db.session.remove()
+            except Exception as e:
+                logger.warning(f"Competition catalogue refresh failed: {e}")
+
+
+_dispatcher = None
+_dispatcher_pid = None
+_dispatcher_lock = threading.Lock()
+
+
+def ensure_dispatcher(app):
+    """Start this process's dispatcher thread if it is not running yet"""
+    global _dispatcher, _dispatcher_pid
+
+    if _dispatcher is not None and _dispatcher_pid == os.getpid():
+        return _dispatcher
+
+    with _dispatcher_lock:
+        if _dispatcher is None or _dispatcher_pid != os.getpid():
+            _dispatcher = NotificationDispatcher(app)
+            _dispatcher.start()
+            _dispatcher_pid = os.getpid()
+            # Pick up anything left over from a previous run
+            _dispatcher.wake()
+    return _dispatcher
+
+
+def wake_dispatcher():
+    """Ask this process's dispatcher to send right away (no-op if not running)"""
+    if _dispatcher is not None and _dispatcher_pid == os.getpid():
+        _dispatcher.wake()
+
+
+def init_notifications(app):
+    """Start the dispatcher with the first request of each worker (if enabled)"""
+    if not app.config.get('NOTIFICATION_DISPATCHER_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_notification_dispatcher():
+        if _dispatcher is None or _dispatcher_pid != os.getpid():
+            ensure_dispatcher(app)
@@ -0,0 +1,239 @@
+"""
+Order line matching for LCSC/Mouser imports
+
+parse_order_file used to scan the whole component list up to four times per
+order line, normalizing every component field on each scan. OrderMatcher
+builds its hash maps once per request from the local component catalogue
+(see app.component_catalog):
+
+- exact: seller_code, then supplier_code, then manufacturer_code, then mpn
+  (case-insensitive, first component by id wins, same precedence as before)
+- fuzzy, for lines without an exact match: MPN equal once punctuation is
+  ignored, similar MPN, or same package and value, returned as ranked
+  candidates with a confidence score. Fuzzy candidates are suggestions, the
+  line stays unmatched until the user picks one.
+"""
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.component_catalog import KEY_FIELDS, all_components, code_key
+
+MAX_CANDIDATES = 5
+MPN_MIN_RATIO = 0.85         # Minimum similarity for an MPN candidate
+MPN_GRAM = 3                 # Similar MPNs are found through shared trigrams...
+MPN_GRAM_MAX_SHARE = 0.05    # ...ignoring trigrams common to more than 5% of MPNs (e.g. a series prefix)
+MPN_SHORTLIST = 25           # MPNs sharing the most trigrams that are compared in full
+
+CONFIDENCE_MPN_NORMALIZED = 0.95
+CONFIDENCE_MPN_SIMILAR = 0.9     # Scaled by the similarity ratio
+CONFIDENCE_PACKAGE_VALUE = 0.7
+BONUS_PRODUCT_TYPE = 0.1
+BONUS_MANUFACTURER = 0.05
+
+SI_PREFIXES = {'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'µ': 1e-6, 'μ': 1e-6, 'm': 1e-3, '': 1.0,
+               'k': 1e3, 'K': 1e3, 'M': 1e6, 'G': 1e9,
+               'P': 1e-12, 'N': 1e-9, 'U': 1e-6}  # Upper case in distributor descriptions ("100NF")
+UNITS = {'ω': 'ohm', 'ohm': 'ohm', 'ohms': 'ohm', 'r': 'ohm', 'f': 'F', 'h': 'H'}
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]')
+# "10k", "4.7uF", "100 nF", "10kΩ", "2,2 kOhm", "10K OHM", "100NF"
+_VALUE = re.compile(r'(?<![\w.])(\d+(?:[.,]\d+)?)\s*([pnuµμmkKMGPNU]?)\s*(Ω|[Oo][Hh][Mm][Ss]?|[RFH])?(?![\w])')
+# RKM notation: "4k7", "1R5", "2n2"
+_VALUE_RKM = re.compile(r'(?<![\w.])(\d+)([pnuµμkKMGR])(\d+)(?![\w])')
+
+
+def mpn_key(value) -> Optional[str]:
+    """MPN without case and punctuation ("RC0402FR-0710KL" == "rc0402fr0710kl")"""
+    key = _NON_ALNUM.sub('', str(value).lower()) if value is not None else ''
+    return key or None
+
+
+def _grams(key: str) -> set:
+    return {key[i:i + MPN_GRAM] for i in range(max(1, len(key) - MPN_GRAM + 1))}
+
+
+def _magnitude(number: float) -> str:
+    return f'{number:.4g}'
+
+
+def parse_values(text, require_unit: bool = False) -> List[Tuple[str, Optional[str]]]:
+    """Component values found in a text, as (magnitude, unit) pairs
+
+    Args:
+        text: Component value ("10k", "100nF") or order line description
+        require_unit: Only accept values with an ohm/F/H unit (descriptions
+                      also mention voltages, tolerances, sizes)
+
+    >>> parse_values('RES 10K OHM 1% 0402', require_unit=True)
+    [('1e+04', 'ohm')]
+    >>> parse_values('CAP CER 100NF 50V X7R 0603', require_unit=True)
+    [('1e-07', 'F')]
+    >>> parse_values('4k7')
+    [('4700', None)]
+    """
+    if text is None:
+        return []
+    text = str(text)
+    values = []
+    for number, prefix, digits in _VALUE_RKM.findall(text):
+        unit = 'ohm' if prefix == 'R' else None
+        if require_unit and unit is None:
+            continue
+        scale = 1.0 if prefix == 'R' else SI_PREFIXES[prefix]
+        values.append((_magnitude(float(f'{number}.{digits}') * scale), unit))
+    for number, prefix, unit in _VALUE.findall(text):
+        unit = UNITS.get(unit.lower()) if unit else None
+        if require_unit and unit is None:
+            continue
+        values.append((_magnitude(float(number.replace(',', '.')) * SI_PREFIXES[prefix]), unit))
+    return values
+
+
+def package_key(value) -> Optional[str]:
+    key = _NON_ALNUM.sub('', str(value).lower()) if value is not None else ''
+    return key or None
+
+
+class OrderMatcher:
+    """Exact and fuzzy matching of order lines against a component list"""
+
+    def __init__(self, components: Iterable[Dict]):
+        """
+        Args:
+            components: Catalogue components ordered by id (the first one wins on duplicate codes)
+        """
+        self.exact = {field: {} for field in KEY_FIELDS}
+        self.by_mpn = {}
+        self.mpn_grams = {}
+        self.by_package_value = {}
+        self.packages = {}
+
+        for comp in components:
+            for field in KEY_FIELDS:
+                key = code_key(comp.get(field))
+                if key is not None:
+                    self.exact[field].setdefault(key, comp)
+
+            for field in ('manufacturer_code', 'mpn'):
+                key = mpn_key(comp.get(field))
+                if key is not None and comp not in self.by_mpn.setdefault(key, []):
+                    self.by_mpn[key].append(comp)
+
+            pkg = package_key(comp.get('package'))
+            if pkg is not None:
+                self.packages.setdefault(pkg, comp.get('package'))
+                for magnitude, unit in set(parse_values(comp.get('value'))):
+                    self.by_package_value.setdefault((pkg, magnitude), []).append((unit, comp))
+
+        for key in self.by_mpn:
+            for gram in _grams(key):
+                self.mpn_grams.setdefault(gram, []).append(key)
+        self.max_gram_postings = max(MPN_SHORTLIST, int(len(self.by_mpn) * MPN_GRAM_MAX_SHARE))
+
+    @classmethod
+    def from_catalog(cls) -> 'OrderMatcher':
+        return cls(all_components())
+
+    def match(self, item: Dict) -> Optional[Dict]:
+        """Component matching the order line exactly, None if there is none"""
+        seller_code = code_key(item.get('seller_code'))
+        if seller_code is not None:
+            comp = self.exact['seller_code'].get(seller_code) or self.exact['supplier_code'].get(seller_code)
+            if comp:
+                return comp
+
+        mfg_code = code_key(item.get('manufacturer_code'))
+        if mfg_code is not None:
+            return self.exact['manufacturer_code'].get(mfg_code) or self.exact['mpn'].get(mfg_code)
+        return None
+
+    def candidates(self, item: Dict, limit: int = MAX_CANDIDATES) -> List[Dict]:
+        """Fuzzy matches for an order line, best first
+
+        Returns:
+            List of {component_id, confidence, reason, seller_code,
+            manufacturer_code, package, value}
+        """
+        scored = {}
+
+        def offer(comp, confidence, reason):
+            best = scored.get(comp['id'])
+            if best is None or confidence > best[0]:
+                scored[comp['id']] = (confidence, reason, comp)
+
+        mpn = mpn_key(item.get('manufacturer_code'))
+        if mpn is not None:
+            for comp in self.by_mpn.get(mpn, []):
+                offer(comp, CONFIDENCE_MPN_NORMALIZED, 'mpn')
+            for key, ratio in self._similar_mpns(mpn):
+                for comp in self.by_mpn[key]:
+                    offer(comp, CONFIDENCE_MPN_SIMILAR * ratio, 'similar_mpn')
+
+        manufacturer = code_key(item.get('manufacturer'))
+        for comp in self._package_value_matches(item):
+            confidence = CONFIDENCE_PACKAGE_VALUE
+            if self._same_type(item, comp):
+                confidence += BONUS_PRODUCT_TYPE
+            if manufacturer is not None and manufacturer == code_key(comp.get('manufacturer')):
+                confidence += BONUS_MANUFACTURER
+            offer(comp, confidence, 'package_value')
+
+        ranked = sorted(scored.items(), key=lambda entry: (-entry[1][0], entry[0]))[:limit]
+        return [{
+            'component_id': component_id,
+            'confidence': round(confidence, 2),
+            'reason': reason,
+            'seller_code': comp.get('seller_code') or comp.get('supplier_code'),
+            'manufacturer_code': comp.get('manufacturer_code') or comp.get('mpn'),
+            'package': comp.get('package'),
+            'value': comp.get('value')
+        } for component_id, (confidence, reason, comp) in ranked]
+
+    def _similar_mpns(self, mpn: str) -> List[Tuple[str, float]]:
+        """Catalogue MPNs at least MPN_MIN_RATIO similar to mpn (itself excluded), with their ratio"""
+        shared = Counter()
+        for gram in _grams(mpn):
+            postings = self.mpn_grams.get(gram, ())
+            if len(postings) <= self.max_gram_postings:
+                shared.update(postings)
+        shared.pop(mpn, None)
+
+        matcher = SequenceMatcher(None, b=mpn)
+        similar = []
+        for key, _ in shared.most_common(MPN_SHORTLIST):
+            matcher.set_seq1(key)
+            if matcher.quick_ratio() < MPN_MIN_RATIO:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= MPN_MIN_RATIO:
+                similar.append((key, ratio))
+        return similar
+
+    def _package_value_matches(self, item: Dict) -> List[Dict]:
+        description = item.get('description') or ''
+        pkg = package_key(item.get('package'))
+        if pkg is None:
+            # Mouser lines have no package column: look for a known package in the description
+            words = {package_key(word) for word in re.split(r'[\s,;()]+', description)}
+            pkg = next((p for p in words if p in self.packages), None)
+        if pkg is None:
+            return []
+
+        found = []
+        for magnitude, unit in set(parse_values(description, require_unit=True)):
+            for comp_unit, comp in self.by_package_value.get((pkg, magnitude), []):
+                if (comp_unit is None or comp_unit == unit) and comp not in found:
+                    found.append(comp)
+        return found
+
+    @staticmethod
+    def _same_type(item: Dict, comp: Dict) -> bool:
+        comp_type = code_key(comp.get('product_type') or comp.get('category'))
+        if comp_type is None:
+            return False
+        item_type = code_key(item.get('product_type'))
+        if item_type is not None:
+            return item_type == comp_type
+        return comp_type in (item.get('description') or '').lower()
@@ -0,0 +1,136 @@
+"""
+Athlete index of official rankings
+
+/api/athlete/<tessera>/rankings used to make one upstream call per athlete
+card on the analysis page. Official ranking rows carry the athlete's tessera,
+so every ranking snapshot (see app.ranking_snapshots) is also indexed in
+ranking_athlete_entries, keyed on tessera first: an athlete's positions
+across all rankings are one primary-key range read.
+
+Entries are rebuilt per snapshot whenever it is refreshed or re-annotated,
+writing only the athletes whose row changed. A sweep (flask refresh-rankings
+--all) records each qualifica whose rankings it fetched without errors; the
+index answers for athletes only while every current qualifica was covered
+within max_age, otherwise callers fall back to the API.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import RankingAthleteEntry, RankingIndexCoverage, RankingIndexState
+from app.ranking_labels import normalize_class, normalize_division
+
+STATE_ID = 1
+UPSERT_CHUNK_SIZE = 100
+MAX_AGE_SECONDS = 86400     # Default age after which a qualifica's sweep no longer counts
+
+# Row fields copied from /api/ranking/official as /api/athlete/{tessera}/rankings names them
+ENTRY_FIELDS = ('posizione', 'punteggio1', 'punteggio2', 'punteggio3', 'punteggio4', 'totale')
+ANNOTATION_FIELDS = ('max_positions', 'min_score', 'within_positions', 'meets_min_score', 'qualified',
+                     'gap_to_cutoff', 'gap_to_min_score')
+
+
+def tessera_key(tessera) -> Optional[str]:
+    """Index key of a tessera ("012345", 12345 -> "12345"), None if empty"""
+    if tessera is None:
+        return None
+    value = str(tessera).strip()
+    if value.isdigit():
+        return str(int(value))
+    return value or None
+
+
+def build_entries(snapshot) -> Dict[str, Dict]:
+    """Athlete entries of an annotated snapshot, keyed on tessera (rows without one are skipped)"""
+    classe_gara = normalize_class(snapshot.class_name)
+    categoria = normalize_division(snapshot.division)
+
+    entries = {}
+    for row in snapshot.rows or []:
+        key = tessera_key(row.get('tessera')) if isinstance(row, dict) else None
+        if key is None or key in entries:
+            continue
+        entry = {'qualifica': snapshot.code, 'classe_gara': classe_gara, 'categoria': categoria}
+        entry.update({f: row.get(f) for f in ENTRY_FIELDS})
+        entry['data_rilevamento'] = row.get('data_aggiornamento')
+        entry.update({f: row[f] for f in ANNOTATION_FIELDS if f in row})
+        entries[key] = entry
+    return entries
+
+
+def index_snapshot(snapshot) -> Dict:
+    """Bring the snapshot's entries in line with its rows (caller commits)
+
+    Returns:
+        Dict with upserted and deleted counts
+    """
+    key = {'code': snapshot.code, 'class_name': snapshot.class_name, 'division': snapshot.division}
+    wanted = build_entries(snapshot)
+    existing = {
+        tessera: (entry, generation)
+        for tessera, entry, generation in db.session.query(
+            RankingAthleteEntry.tessera, RankingAthleteEntry.entry, RankingAthleteEntry.positions_generation
+        ).filter_by(**key)
+    }
+
+    generation = snapshot.positions_generation
+    changed = [
+        dict(key, tessera=tessera, entry=entry, positions_generation=generation)
+        for tessera, entry in wanted.items()
+        if existing.get(tessera) != (entry, generation)
+    ]
+    removed = [tessera for tessera in existing if tessera not in wanted]
+
+    for start in range(0, len(changed), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(RankingAthleteEntry).values(changed[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['tessera', 'code', 'class_name', 'division'],
+            set_={'entry': stmt.excluded.entry, 'positions_generation': stmt.excluded.positions_generation}
+        )
+        db.session.execute(stmt)
+
+    for start in range(0, len(removed), UPSERT_CHUNK_SIZE):
+        (RankingAthleteEntry.query
+         .filter_by(**key)
+         .filter(RankingAthleteEntry.tessera.in_(removed[start:start + UPSERT_CHUNK_SIZE]))
+         .delete(synchronize_session=False))
+
+    return {'upserted': len(changed), 'deleted': len(removed)}
+
+
+def athlete_entries(tessera) -> List[RankingAthleteEntry]:
+    """Index rows of one athlete (all rankings)"""
+    key = tessera_key(tessera)
+    if key is None:
+        return []
+    return RankingAthleteEntry.query.filter_by(tessera=key).all()
+
+
+def index_covers(codes: Iterable[str], max_age: int = MAX_AGE_SECONDS) -> bool:
+    """Whether sweeps within max_age seconds covered every one of the qualifiche codes"""
+    codes = set(codes)
+    if not codes:
+        return False
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    covered = {code for (code,) in db.session.query(RankingIndexCoverage.code)
+               .filter(RankingIndexCoverage.code.in_(codes), RankingIndexCoverage.swept_at >= cutoff)}
+    return covered == codes
+
+
+def mark_covered(code: str):
+    """Record that a sweep fetched every ranking of a qualifica (caller commits)"""
+    stmt = sqlite_insert(RankingIndexCoverage).values(code=code, swept_at=datetime.utcnow())
+    db.session.execute(stmt.on_conflict_do_update(index_elements=['code'],
+                                                  set_={'swept_at': stmt.excluded.swept_at}))
+
+
+def mark_swept(snapshots: int):
+    """Record a complete sweep (caller commits)"""
+    state = db.session.get(RankingIndexState, STATE_ID)
+    if state is None:
+        state = RankingIndexState(id=STATE_ID)
+        db.session.add(state)
+    state.swept_at = datetime.utcnow()
+    state.snapshots = snapshots
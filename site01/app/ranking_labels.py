@@ -0,0 +1,56 @@
+"""
+Ranking label normalization
+
+The Orion API spells ranking classes and divisions in several ways
+("Seniores Maschile", "Compound", "Olimpico"...), while ranking_positions.csv
+uses one standard form ("Senior Maschile", "Arco Compound", "Arco Olimpico").
+The alias tables below are compiled once and raw labels are memoized, so
+normalizing a ranking row costs a cache hit.
+"""
+import re
+from functools import lru_cache
+from typing import Tuple
+
+# Class aliases: (marker in lowercase label, pattern to replace, canonical word)
+# Only the first matching marker applies
+CLASS_ALIASES = (
+    ('senior', re.compile(r'Seniores|seniores'), 'Senior'),
+    ('junior', re.compile(r'Juniores|juniores'), 'Junior'),
+)
+
+# Division aliases for labels without the "Arco" prefix: (marker, canonical division)
+DIVISION_ALIASES = (
+    ('olimpic', 'Arco Olimpico'),
+    ('compound', 'Arco Compound'),
+    ('nudo', 'Arco Nudo'),
+)
+
+LABEL_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def normalize_class(label: str) -> str:
+    """Canonical class name (e.g. "Seniores Maschile" -> "Senior Maschile")"""
+    label = (label or '').strip()
+    lower = label.lower()
+    for marker, pattern, canonical in CLASS_ALIASES:
+        if marker in lower:
+            return pattern.sub(canonical, label)
+    return label
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def normalize_division(label: str) -> str:
+    """Canonical division name (e.g. "Compound" -> "Arco Compound")"""
+    label = (label or '').strip()
+    lower = label.lower()
+    if 'arco' not in lower:
+        for marker, canonical in DIVISION_ALIASES:
+            if marker in lower:
+                return canonical
+    return label
+
+
+def canonical_key(qualifica: str, classe_gara: str, categoria: str) -> Tuple[str, str, str]:
+    """(qualifica, class, division) key as used by ranking_positions.csv"""
+    return (qualifica or '').strip(), normalize_class(classe_gara), normalize_division(categoria)
@@ -1,83 +1,332 @@
 """
-Ranking positions CSV parser
+Ranking positions store
 Manages the number of available positions per ranking/class/division
+
+Positions live in the ranking_positions table with a generation counter in
+ranking_positions_state. Each worker keeps an in-memory snapshot and, on
+every use, compares its generation with the stored one (a single primary-key
+read), so an upload handled by one gunicorn worker is picked up by all of
+them. ranking_positions.csv seeds the table and is still the upload/download
+format.
 """
 import csv
+import io
 import os
+import threading
+from datetime import datetime
 from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from app import db
+from app.models import RankingPosition, RankingPositionsState
+from app.ranking_labels import canonical_key
+
+REQUIRED_COLUMNS = ('qualifica', 'classe_gara', 'categoria', 'posti_disponibili')
+CSV_COLUMNS = REQUIRED_COLUMNS + ('punteggio_minimo',)
+STATE_ID = 1
+UPSERT_CHUNK_SIZE = 100
+
+
+def default_csv_path():
+    """Path of the bundled app/data/ranking_positions.csv"""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(app_dir, 'data', 'ranking_positions.csv')
+
+
+def parse_positions_csv(text):
+    """Parse and validate ranking positions CSV content
+
+    Args:
+        text: CSV content (header: qualifica, classe_gara, categoria,
+              posti_disponibili, optional punteggio_minimo)
+
+    Returns:
+        Tuple (rows, errors): rows is a list of dicts in file order, errors a
+        list of messages (rows must not be applied if there are any)
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        return [], [f"Missing column(s): {', '.join(missing)}"]
+
+    rows = []
+    errors = []
+    seen = {}
+    for line, row in enumerate(reader, start=2):
+        key = tuple((row.get(c) or '').strip() for c in ('qualifica', 'classe_gara', 'categoria'))
+        if not all(key):
+            errors.append(f"Line {line}: qualifica, classe_gara and categoria are required")
+            continue
+        if key in seen:
+            errors.append(f"Line {line}: duplicate of line {seen[key]}")
+            continue
+        seen[key] = line
+
+        try:
+            posti = int((row.get('posti_disponibili') or '').strip())
+            if posti < 0:
+                raise ValueError
+        except ValueError:
+            errors.append(f"Line {line}: posti_disponibili must be a non-negative integer")
+            continue
+
+        min_score = None
+        raw_min = (row.get('punteggio_minimo') or '').strip()
+        if raw_min:
+            try:
+                min_score = int(raw_min)
+            except ValueError:
+                errors.append(f"Line {line}: punteggio_minimo must be an integer or empty")
+                continue
+
+        rows.append({
+            'qualifica': key[0],
+            'classe_gara': key[1],
+            'categoria': key[2],
+            'posti_disponibili': posti,
+            'punteggio_minimo': min_score,
+            'sort_order': len(rows)
+        })
+
+    return rows, errors
+
+
+def current_generation():
+    """Stored generation of the ranking positions (0 if never imported)"""
+    generation = db.session.query(RankingPositionsState.generation).filter_by(id=STATE_ID).scalar()
+    return generation or 0
+
+
+def apply_positions(rows):
+    """Replace stored positions with rows, writing only what changed
+
+    New and changed rows are upserted and missing rows deleted in one
+    transaction that also bumps the generation (unless nothing changed).
+
+    Args:
+        rows: Validated rows from parse_positions_csv
+
+    Returns:
+        Dict with inserted, updated, deleted, unchanged counts and generation
+    """
+    fields = ('posti_disponibili', 'punteggio_minimo', 'sort_order')
+    existing = {
+        (r.qualifica, r.classe_gara, r.categoria): tuple(getattr(r, f) for f in fields)
+        for r in RankingPosition.query.all()
+    }
+    wanted = {(r['qualifica'], r['classe_gara'], r['categoria']): r for r in rows}
+
+    changed = [r for key, r in wanted.items() if existing.get(key) != tuple(r[f] for f in fields)]
+    removed = [key for key in existing if key not in wanted]
+    inserted = sum(1 for r in changed if (r['qualifica'], r['classe_gara'], r['categoria']) not in existing)
+    # Rows whose limits are the same but moved in the file (only sort_order is rewritten)
+    moved = sum(1 for r in changed if existing.get((r['qualifica'], r['classe_gara'], r['categoria']), ())[:2]
+                == (r['posti_disponibili'], r['punteggio_minimo']))
+    counts = {
+        'inserted': inserted,
+        'updated': len(changed) - inserted - moved,
+        'deleted': len(removed),
+        'unchanged': len(wanted) - len(changed) + moved
+    }
+
+    if not changed and not removed:
+        counts['generation'] = current_generation()
+        return counts
+
+    try:
+        # Claim the next generation first: the state row lock serializes concurrent imports
+        now = datetime.utcnow()
+        state = db.session.get(RankingPositionsState, STATE_ID)
+        if state is None:
+            state = RankingPositionsState(id=STATE_ID, generation=0)
+            db.session.add(state)
+        state.generation = (state.generation or 0) + 1
+        state.updated_at = now
+        db.session.flush()
+
+        values = [dict(r, generation=state.generation, updated_at=now) for r in changed]
+        for start in range(0, len(values), UPSERT_CHUNK_SIZE):
+            stmt = sqlite_insert(RankingPosition).values(values[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['qualifica', 'classe_gara', 'categoria'],
+                set_={c: stmt.excluded[c] for c in fields + ('generation', 'updated_at')}
+            )
+            db.session.execute(stmt)
+
+        for qualifica, classe_gara, categoria in removed:
+            RankingPosition.query.filter_by(
+                qualifica=qualifica, classe_gara=classe_gara, categoria=categoria
+            ).delete(synchronize_session=False)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    counts['generation'] = state.generation
+    return counts
+
+
+def import_csv_file(csv_path=None):
+    """Validate a CSV file and apply it to the store
+
+    Raises:
+        ValueError: If the file is invalid (nothing is applied)
+    """
+    with open(csv_path or default_csv_path(), 'r', encoding='utf-8') as f:
+        rows, errors = parse_positions_csv(f.read())
+    if errors:
+        raise ValueError('; '.join(errors[:10]))
+    return apply_positions(rows)
+
+
+def positions_to_csv(positions):
+    """Render a positions list (get_all_positions format) as CSV text"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, lineterminator='\n')
+    writer.writeheader()
+    for row in positions:
+        writer.writerow({c: '' if row[c] is None else row[c] for c in CSV_COLUMNS})
+    return out.getvalue()
+
 
 class RankingPositions:
     def __init__(self, csv_path=None):
         """Initialize ranking positions manager
-        
+
         Args:
-            csv_path: Path to CSV file. If None, uses default app/data/ranking_positions.csv
+            csv_path: Seed CSV file. If None, uses default app/data/ranking_positions.csv
         """
         if csv_path is None:
-            # Default path relative to app directory
-            app_dir = os.path.dirname(os.path.abspath(__file__))
-            csv_path = os.path.join(app_dir, 'data', 'ranking_positions.csv')
-        
+            csv_path = default_csv_path()
+
         self.csv_path = csv_path
-        self.positions = {}  # Dict: (qualifica, classe_gara, categoria) -> {'posti': int, 'min_score': int or None}
-        self.load_csv()
-    
+        # Snapshot swapped as a whole on reload: (generation, positions, index)
+        # positions: (qualifica, classe_gara, categoria) -> {'posti': int, 'min_score': int or None}
+        # index: same configs keyed on canonical labels (see app.ranking_labels)
+        self._snapshot = (None, {}, {})
+        self._lock = threading.Lock()
+        self.refresh()
+
+    @property
+    def generation(self):
+        return self._snapshot[0]
+
+    @property
+    def positions(self):
+        return self._snapshot[1]
+
+    @property
+    def index(self):
+        return self._snapshot[2]
+
+    def refresh(self):
+        """Reload the snapshot if the stored generation changed (cheap when it did not)"""
+        try:
+            generation = current_generation()
+            if generation == 0 and os.path.exists(self.csv_path):
+                # Empty store: seed it from the bundled CSV
+                generation = import_csv_file(self.csv_path)['generation']
+        except (SQLAlchemyError, ValueError) as e:
+            db.session.rollback()
+            if self.generation is None:
+                current_app.logger.warning(f"Ranking positions store unavailable, reading CSV: {e}")
+                self.load_csv()
+            return
+
+        if generation == self.generation:
+            return
+
+        with self._lock:
+            if generation == self.generation:
+                return
+            rows = RankingPosition.query.order_by(RankingPosition.sort_order).all()
+            positions = {
+                (r.qualifica, r.classe_gara, r.categoria): {
+                    'posti': r.posti_disponibili,
+                    'min_score': r.punteggio_minimo
+                }
+                for r in rows
+            }
+            self._snapshot = (generation, positions, self._build_index(positions))
+
+        current_app.logger.info(f"Loaded {len(positions)} ranking position configurations (generation {generation})")
+
     def load_csv(self):
-        """Load ranking positions from CSV file"""
-        self.positions = {}
-        
+        """Load ranking positions straight from the CSV file (fallback when the store is unavailable)"""
         if not os.path.exists(self.csv_path):
             current_app.logger.warning(f"Ranking positions CSV not found: {self.csv_path}")
             return
-        
+
         try:
             with open(self.csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    key = (
-                        row['qualifica'].strip(),
-                        row['classe_gara'].strip(),
-                        row['categoria'].strip()
-                    )
-                    # Parse punteggio_minimo (can be empty)
-                    min_score = None
-                    if 'punteggio_minimo' in row and row['punteggio_minimo'].strip():
-                        try:
-                            min_score = int(row['punteggio_minimo'])
-                        except ValueError:
-                            pass
-                    
-                    self.positions[key] = {
-                        'posti': int(row['posti_disponibili']),
-                        'min_score': min_score
-                    }
-            
-            current_app.logger.info(f"Loaded {len(self.positions)} ranking position configurations")
-        
+                rows, errors = parse_positions_csv(f.read())
+            for error in errors:
+                current_app.logger.warning(f"Ranking positions CSV: {error}")
+
+            positions = {
+                (r['qualifica'], r['classe_gara'], r['categoria']): {
+                    'posti': r['posti_disponibili'],
+                    'min_score': r['punteggio_minimo']
+                }
+                for r in rows
+            }
+            self._snapshot = (None, positions, self._build_index(positions))
+            current_app.logger.info(f"Loaded {len(positions)} ranking position configurations")
+
         except Exception as e:
             current_app.logger.error(f"Error loading ranking positions CSV: {e}")
-    
+
     def get_positions(self, qualifica, classe_gara, categoria):
         """Get configuration for a specific ranking/class/division
-        
+
         Args:
             qualifica: Ranking code (e.g. "RegionaleIndoor2026Veneto")
             classe_gara: Class (e.g. "Senior Maschile")
             categoria: Division (e.g. "Arco Olimpico")
-            
+
         Returns:
             Dict with 'posti' and 'min_score' or None if not configured
         """
         key = (qualifica.strip(), classe_gara.strip(), categoria.strip())
         return self.positions.get(key)
-    
+
+    @staticmethod
+    def _build_index(positions):
+        """Index configs on canonical labels (rows already in canonical form win on clashes)"""
+        index = {}
+        for key, config in positions.items():
+            canonical = canonical_key(*key)
+            if canonical not in index or canonical == key:
+                index[canonical] = config
+        return index
+
+    def lookup(self, qualifica, classe_gara, categoria):
+        """Get configuration for raw API labels (class/division spelling variants accepted)
+
+        Args:
+            qualifica: Ranking code
+            classe_gara: Class as returned by the API (e.g. "Seniores Maschile")
+            categoria: Division as returned by the API (e.g. "Compound")
+
+        Returns:
+            Dict with 'posti' and 'min_score' or None if not configured
+        """
+        return self.index.get(canonical_key(qualifica, classe_gara, categoria))
+
     def reload(self):
-        """Reload CSV file (useful after manual updates)"""
-        self.load_csv()
-    
+        """Re-import the CSV file into the store (useful after manual updates)
+
+        Returns:
+            Counts from apply_positions
+        """
+        counts = import_csv_file(self.csv_path)
+        self.refresh()
+        return counts
+
     def get_all_positions(self):
         """Get all configured positions as a list of dicts
-        
+
         Returns:
             List of dicts with qualifica, classe_gara, categoria, posti_disponibili, punteggio_minimo
         """
@@ -97,8 +346,10 @@ class RankingPositions:
 _ranking_positions = None
 
 def get_ranking_positions():
-    """Get global RankingPositions instance (singleton pattern)"""
+    """Get global RankingPositions instance (singleton pattern), up to date with the store"""
     global _ranking_positions
     if _ranking_positions is None:
         _ranking_positions = RankingPositions()
+    else:
+        _ranking_positions.refresh()
     return _ranking_positions
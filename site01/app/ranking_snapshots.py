@@ -0,0 +1,357 @@
+"""
+Official ranking snapshots
+
+/archery/api/ranking/official used to call /api/ranking/official on every
+view and annotate the rows with the configured positions each time. Rankings
+only change when results are published, so each (code, class_name, division)
+is kept in ranking_snapshots with its rows already annotated:
+
+- max_positions / min_score (as before, when positions are configured)
+- within_positions, meets_min_score and qualified
+- gap_to_cutoff: points ahead of (+) or behind (-) the last athlete inside
+  the available positions
+- gap_to_min_score: points above (+) or below (-) the minimum score
+
+Snapshots older than max_age are still served while one worker re-fetches
+them in the background (flask refresh-rankings refreshes them on a schedule).
+Changed ranking positions re-annotate the stored rows without an upstream
+call. Each snapshot carries an ETag of its rows for conditional requests.
+
+Every (re-)annotation also updates the snapshot's athlete entries in the
+ranking index (see app.ranking_index); sweep_snapshots fetches every
+individual ranking so the index can answer athlete_rankings on its own for
+the qualifiche it covered.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from app import db
+from app.models import RankingSnapshot
+from app.ranking_index import MAX_AGE_SECONDS as INDEX_MAX_AGE_SECONDS
+from app.ranking_index import athlete_entries, index_covers, index_snapshot, mark_covered, mark_swept
+from app.ranking_labels import canonical_key
+from app.ranking_positions import get_ranking_positions
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = 900       # Default age after which a snapshot is refreshed
+REFRESH_CLAIM_SECONDS = 60  # Other workers don't start a refresh within this window
+CODES_TTL_SECONDS = 300     # Current qualifiche list kept in memory for athlete_rankings
+
+# Classes and divisions offered by the analysis page (same labels, so sweeps share its snapshots)
+RANKING_CLASSES = (
+    'Master Maschile', 'Master Femminile', 'Seniores Maschile', 'Seniores Femminile',
+    'Juniores Maschile', 'Juniores Femminile', 'Allievi Maschile', 'Allievi Femminile',
+    'Ragazzi Maschile', 'Ragazzi Femminile', 'Giovanissimi Maschile', 'Giovanissimi Femminile',
+)
+RANKING_DIVISIONS = ('Compound', 'Olimpico', 'Nudo')
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def annotate_rows(raw_rows: List[Dict], config: Optional[Dict]) -> List[Dict]:
+    """Copy ranking rows adding positions limits, qualification status and gaps
+
+    Args:
+        raw_rows: /api/ranking/official rows (ordered by position)
+        config: Ranking positions config ({'posti', 'min_score'}) or None
+    """
+    rows = [dict(row) for row in raw_rows]
+    if not config:
+        return rows
+
+    max_positions = config['posti']
+    min_score = config['min_score']
+
+    # Cutoff: the last row still inside the available positions
+    cutoff_score = None
+    for row in rows:
+        position = _number(row.get('posizione'))
+        if max_positions and position is not None and position <= max_positions:
+            cutoff_score = _number(row.get('totale'))
+
+    for row in rows:
+        position = _number(row.get('posizione'))
+        total = _number(row.get('totale'))
+
+        within = bool(max_positions and position is not None and position <= max_positions)
+        meets_min = min_score is None or (total is not None and total >= min_score)
+
+        row['max_positions'] = max_positions
+        row['min_score'] = min_score
+        row['within_positions'] = within
+        row['meets_min_score'] = meets_min
+        row['qualified'] = within and meets_min
+        row['gap_to_cutoff'] = total - cutoff_score if total is not None and cutoff_score is not None else None
+        row['gap_to_min_score'] = total - min_score if total is not None and min_score is not None else None
+
+    return rows
+
+
+def _etag(rows) -> str:
+    body = json.dumps(rows, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+def _annotate(snapshot: RankingSnapshot, ranking_positions):
+    config = ranking_positions.lookup(snapshot.code, snapshot.class_name, snapshot.division)
+    snapshot.rows = annotate_rows(snapshot.raw_rows, config)
+    snapshot.etag = _etag(snapshot.rows)
+    snapshot.positions_generation = ranking_positions.generation
+    index_snapshot(snapshot)
+
+
+def refresh_snapshot(client, code: str, class_name: str, division: str) -> Optional[RankingSnapshot]:
+    """Fetch a ranking from the API and store it annotated
+
+    Returns:
+        The snapshot, or None if the API did not return a list of rows
+        (nothing is stored then)
+    """
+    raw_rows = client.get_ranking_official(code, class_name, division)
+    if not isinstance(raw_rows, list):
+        return None
+
+    snapshot = db.session.get(RankingSnapshot, (code, class_name, division))
+    if snapshot is None:
+        snapshot = RankingSnapshot(code=code, class_name=class_name, division=division)
+        db.session.add(snapshot)
+
+    snapshot.raw_rows = raw_rows
+    _annotate(snapshot, get_ranking_positions())
+    snapshot.fetched_at = datetime.utcnow()
+    snapshot.refreshing_until = None
+    snapshot.last_error = None
+    db.session.commit()
+    return snapshot
+
+
+def _claim_refresh(key) -> bool:
+    """Claim a snapshot's background refresh (one worker at a time)"""
+    now = datetime.utcnow()
+    code, class_name, division = key
+    claimed = (RankingSnapshot.query
+               .filter_by(code=code, class_name=class_name, division=division)
+               .filter(or_(RankingSnapshot.refreshing_until.is_(None), RankingSnapshot.refreshing_until < now))
+               .update({'refreshing_until': now + timedelta(seconds=REFRESH_CLAIM_SECONDS)},
+                       synchronize_session=False))
+    db.session.commit()
+    return bool(claimed)
+
+
+def _refresh_in_background(app, key):
+    from app.api import OrionAPIClient
+
+    with app.app_context():
+        try:
+            refresh_snapshot(OrionAPIClient(), *key)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Ranking snapshot refresh failed for {key}: {e}")
+            _record_error(key, e)
+        finally:
+            db.session.remove()
+
+
+def _record_error(key, error):
+    snapshot = db.session.get(RankingSnapshot, key)
+    if snapshot is not None:
+        snapshot.last_error = str(error)[:1000]
+        db.session.commit()
+
+
+def get_official_snapshot(app, client, code: str, class_name: str, division: str,
+                          max_age: int = MAX_AGE_SECONDS) -> Tuple[object, Optional[str]]:
+    """Get an annotated ranking, fetching it on first use
+
+    Args:
+        app: Flask app (for the background refresh thread)
+        client: OrionAPIClient
+        max_age: Seconds after which the snapshot is refreshed in the background
+
+    Returns:
+        Tuple (rows, etag). When the API returns something other than a list
+        it is passed through uncached with etag None.
+    """
+    key = (code, class_name, division)
+    snapshot = db.session.get(RankingSnapshot, key)
+
+    if snapshot is None or snapshot.raw_rows is None:
+        snapshot = refresh_snapshot(client, *key)
+        if snapshot is None:
+            return client.get_ranking_official(code, class_name, division), None
+        return snapshot.rows, snapshot.etag
+
+    # Ranking positions were changed since the rows were annotated
+    ranking_positions = get_ranking_positions()
+    if snapshot.positions_generation != ranking_positions.generation:
+        _annotate(snapshot, ranking_positions)
+        db.session.commit()
+
+    if snapshot.fetched_at is None or snapshot.fetched_at < datetime.utcnow() - timedelta(seconds=max_age):
+        if _claim_refresh(key):
+            threading.Thread(target=_refresh_in_background, args=(app, key), daemon=True).start()
+
+    return snapshot.rows, snapshot.etag
+
+
+def refresh_snapshots(client, stale_after: Optional[int] = None) -> Dict:
+    """Re-fetch stored snapshots (all, or those older than stale_after seconds)
+
+    Returns:
+        Dict with 'refreshed' and 'failed' counts
+    """
+    query = db.session.query(RankingSnapshot.code, RankingSnapshot.class_name, RankingSnapshot.division)
+    if stale_after is not None:
+        query = query.filter(RankingSnapshot.fetched_at < datetime.utcnow() - timedelta(seconds=stale_after))
+
+    totals = {'refreshed': 0, 'failed': 0}
+    for key in query.all():
+        key = tuple(key)
+        try:
+            refresh_snapshot(client, *key)
+            totals['refreshed'] += 1
+        except Exception as e:
+            db.session.rollback()
+            totals['failed'] += 1
+            logger.warning(f"Ranking snapshot refresh failed for {key}: {e}")
+            _record_error(key, e)
+    return totals
+
+
+def individual_codes(qualifiche) -> List[str]:
+    """Codes of individual rankings in an /api/qualifiche response
+
+    Team rankings (codes containing "SQ") are left out: their rows are not
+    athletes.
+    """
+    if not isinstance(qualifiche, list):
+        raise ValueError('Unexpected /api/qualifiche response')
+    codes = {q.get('codice') for q in qualifiche if isinstance(q, dict) and q.get('codice')}
+    return sorted(code for code in codes if 'SQ' not in code)
+
+
+_current_codes = {'codes': None, 'read_at': 0.0}
+_current_codes_lock = threading.Lock()
+
+
+def current_codes(client) -> List[str]:
+    """Individual qualifiche codes, re-read from the API at most every CODES_TTL_SECONDS per worker
+
+    The last list read is kept if the API cannot be reached.
+
+    Raises:
+        Exception: If the list was never read and the API request fails
+    """
+    with _current_codes_lock:
+        codes, read_at = _current_codes['codes'], _current_codes['read_at']
+    if codes is not None and time.monotonic() - read_at < CODES_TTL_SECONDS:
+        return codes
+    try:
+        codes = individual_codes(client.get_qualifiche())
+    except Exception:
+        if codes is None:
+            raise
+        logger.warning("Could not re-read qualifiche, using the last list")
+        return codes
+    with _current_codes_lock:
+        _current_codes.update(codes=codes, read_at=time.monotonic())
+    return codes
+
+
+def _sweep_labels() -> List[Tuple[str, str]]:
+    """(class, division) pairs to fetch: the analysis page's, plus any other stored snapshot's"""
+    labels = [(class_name, division) for class_name in RANKING_CLASSES for division in RANKING_DIVISIONS]
+    known = set(labels)
+    for class_name, division in (db.session.query(RankingSnapshot.class_name, RankingSnapshot.division)
+                                 .distinct().order_by(RankingSnapshot.class_name, RankingSnapshot.division)):
+        if (class_name, division) not in known:
+            known.add((class_name, division))
+            labels.append((class_name, division))
+    return labels
+
+
+def sweep_snapshots(client) -> Dict:
+    """Fetch every individual ranking (qualifiche x classes x divisions)
+
+    Each qualifica whose rankings were all fetched is recorded as covered in
+    the ranking index; a failed fetch only leaves its own qualifica
+    uncovered until the next sweep.
+
+    Returns:
+        Dict with 'refreshed' and 'failed' counts
+    """
+    codes = individual_codes(client.get_qualifiche())
+    labels = _sweep_labels()
+    totals = {'refreshed': 0, 'failed': 0}
+    for code in codes:
+        failed = 0
+        for class_name, division in labels:
+            key = (code, class_name, division)
+            try:
+                if refresh_snapshot(client, *key) is None:
+                    raise ValueError('Unexpected /api/ranking/official response')
+                totals['refreshed'] += 1
+            except Exception as e:
+                db.session.rollback()
+                failed += 1
+                logger.warning(f"Ranking snapshot refresh failed for {key}: {e}")
+                _record_error(key, e)
+        totals['failed'] += failed
+        if not failed:
+            mark_covered(code)
+            db.session.commit()
+
+    if not totals['failed']:
+        mark_swept(totals['refreshed'])
+        db.session.commit()
+    return totals
+
+
+def athlete_rankings(tessera, codes: List[str], max_age: int = INDEX_MAX_AGE_SECONDS) -> Optional[List[Dict]]:
+    """An athlete's positions across all rankings, from the ranking index
+
+    Entries annotated with an older ranking positions generation are
+    re-annotated (with their whole snapshot) first.
+
+    Args:
+        tessera: Athlete card number
+        codes: Current individual qualifiche codes (see individual_codes)
+        max_age: Seconds a qualifica's sweep counts as coverage
+
+    Returns:
+        List in /api/athlete/{tessera}/rankings format (most recently updated
+        first), or None if sweeps within max_age did not cover every code
+    """
+    if not index_covers(codes, max_age):
+        return None
+
+    entries = athlete_entries(tessera)
+    ranking_positions = get_ranking_positions()
+    stale = {(e.code, e.class_name, e.division) for e in entries
+             if e.positions_generation != ranking_positions.generation}
+    if stale:
+        for key in stale:
+            snapshot = db.session.get(RankingSnapshot, key)
+            if snapshot is not None and snapshot.raw_rows is not None:
+                _annotate(snapshot, ranking_positions)
+        db.session.commit()
+        entries = athlete_entries(tessera)
+
+    # The same ranking may be held under several label spellings
+    rankings = {}
+    for e in entries:
+        rankings.setdefault(canonical_key(e.code, e.class_name, e.division), e.entry)
+
+    result = sorted(rankings.values(), key=lambda r: r.get('qualifica') or '')
+    result.sort(key=lambda r: r.get('data_rilevamento') or '', reverse=True)
+    return result
@@ -0,0 +1,247 @@
+"""
+Local results warehouse
+
+Keeps a copy of /api/athlete/{tessera}/results in the `results` table so the
+archery analysis pages read from SQLite instead of the Orion API, and keep
+working while the upstream is down. Rows are upserted on
+(athlete_id, competition_id, competition_type); only new or changed rows are
+written on each sync, and athlete_career_stats is kept in step with them.
+
+API rows have no competition code, so competition_id is usually name + date;
+several results with the same name, date and type get an ordinal suffix
+("#2", "#3") instead of overwriting each other. When a sync received the
+athlete's complete list, rows missing from it (e.g. a result corrected
+upstream) are deleted.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.career_stats import update_career_stats
+from app.dates import parse_date
+from app.models import AuthorizedAthlete, Result, ResultSyncState
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement (keeps well under SQLite's bound-parameter limit)
+UPSERT_CHUNK_SIZE = 50
+COMPETITION_ID_LENGTH = 64
+FETCH_LIMIT = 500           # Results requested per athlete (a shorter list is complete)
+
+MEDALS = {1: 'gold', 2: 'silver', 3: 'bronze'}
+
+# Columns compared to decide whether an existing row changed
+TRACKED_COLUMNS = (
+    'athlete_name', 'competition_name', 'date', 'score', 'position', 'medal',
+    'club_code', 'club_name', 'organizer_code', 'organizer_name'
+)
+
+
+def build_result_row(athlete_id: str, raw: Dict, ordinal: int = 1) -> Dict:
+    """Convert an API result row to `results` column values
+
+    Args:
+        ordinal: Position among the athlete's rows with the same competition
+                 key (2 and up get a "#n" suffix)
+    """
+    parsed_date = parse_date(raw.get('data_gara'))
+    position = raw.get('posizione')
+
+    # Fall back to name + date when the API row has no competition code
+    competition_id = str(raw.get('codice_gara') or f"{raw.get('nome_gara') or ''}|{raw.get('data_gara') or ''}")
+    suffix = f'#{ordinal}' if ordinal > 1 else ''
+
+    return {
+        'athlete_id': str(athlete_id),
+        'athlete_name': raw.get('atleta'),
+        'competition_id': competition_id[:COMPETITION_ID_LENGTH - len(suffix)] + suffix,
+        'competition_name': raw.get('nome_gara'),
+        # NULLs never conflict in a unique index, so store '' for a missing type
+        'competition_type': raw.get('tipo_gara') or '',
+        'date': datetime.combine(parsed_date, datetime.min.time()) if parsed_date else None,
+        'score': raw.get('punteggio'),
+        'position': position,
+        'medal': MEDALS.get(position),
+        'club_code': raw.get('codice_societa_atleta'),
+        'club_name': raw.get('nome_societa_atleta'),
+        'organizer_code': raw.get('codice_societa_organizzatrice'),
+        'organizer_name': raw.get('nome_societa_organizzatrice')
+    }
+
+
+def store_athlete_results(athlete_id: str, raw_results: Iterable[Dict], complete: bool = False) -> Dict:
+    """Upsert an athlete's API results and mark the athlete as synced
+
+    Args:
+        athlete_id: Athlete tessera
+        raw_results: Result rows as returned by the Orion API
+        complete: raw_results is the athlete's whole list (stored rows missing
+                  from it are deleted)
+
+    Returns:
+        Dict with 'inserted', 'updated', 'unchanged' and 'deleted' counts
+    """
+    athlete_id = str(athlete_id)
+
+    rows = {}
+    for raw in raw_results:
+        ordinal = 1
+        row = build_result_row(athlete_id, raw)
+        while (row['competition_id'], row['competition_type']) in rows:
+            ordinal += 1
+            row = build_result_row(athlete_id, raw, ordinal)
+        rows[(row['competition_id'], row['competition_type'])] = row
+
+    existing = {
+        (r.competition_id, r.competition_type): tuple(getattr(r, c) for c in TRACKED_COLUMNS)
+        for r in Result.query.filter_by(athlete_id=athlete_id).all()
+    }
+
+    now = datetime.utcnow()
+    changed = []
+    inserted_rows = []
+    for key, row in rows.items():
+        current = existing.get(key)
+        if current is None:
+            inserted_rows.append(row)
+        elif current == tuple(row[c] for c in TRACKED_COLUMNS):
+            continue
+        changed.append(dict(row, created_at=now, updated_at=now))
+    inserted = len(inserted_rows)
+    removed = [key for key in existing if key not in rows] if complete else []
+
+    try:
+        for competition_id, competition_type in removed:
+            (Result.query
+             .filter_by(athlete_id=athlete_id, competition_id=competition_id, competition_type=competition_type)
+             .delete(synchronize_session=False))
+
+        for start in range(0, len(changed), UPSERT_CHUNK_SIZE):
+            stmt = sqlite_insert(Result).values(changed[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['athlete_id', 'competition_id', 'competition_type'],
+                set_={c: stmt.excluded[c] for c in TRACKED_COLUMNS + ('updated_at',)}
+            )
+            db.session.execute(stmt)
+
+        # Merge new rows into the materialized career stats (same transaction)
+        update_career_stats(athlete_id, inserted_rows, rows_changed=len(changed) > inserted or bool(removed))
+
+        state = db.session.get(ResultSyncState, athlete_id) or ResultSyncState(athlete_id=athlete_id)
+        state.last_synced_at = now
+        state.result_count = len(rows) if complete else len(existing.keys() | rows.keys())
+        state.last_error = None
+        db.session.add(state)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'inserted': inserted,
+        'updated': len(changed) - inserted,
+        'unchanged': len(rows) - len(changed),
+        'deleted': len(removed)
+    }
+
+
+def record_sync_error(athlete_id: str, error: str):
+    """Remember the last sync error for an athlete (keeps the previous sync time)"""
+    try:
+        state = db.session.get(ResultSyncState, str(athlete_id)) or ResultSyncState(athlete_id=str(athlete_id))
+        state.last_error = error[:1000]
+        db.session.add(state)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Could not record sync error for {athlete_id}: {e}")
+
+
+def is_synced(athlete_id: str, max_age: Optional[int] = None) -> bool:
+    """Check whether an athlete was synced (within max_age seconds, if given)"""
+    state = db.session.get(ResultSyncState, str(athlete_id))
+    if state is None or state.last_synced_at is None:
+        return False
+    return max_age is None or state.last_synced_at >= datetime.utcnow() - timedelta(seconds=max_age)
+
+
+def load_local_results(athlete_id: str, max_age: Optional[int] = None) -> Optional[List[Dict]]:
+    """Read an athlete's results from the warehouse
+
+    Args:
+        athlete_id: Athlete tessera
+        max_age: Maximum seconds since the last sync (None accepts any age)
+
+    Returns:
+        List of transformed result dicts (most recent first), or None if the
+        athlete was never synced or the copy is older than max_age
+    """
+    if not is_synced(athlete_id, max_age):
+        return None
+
+    rows = (Result.query
+            .filter_by(athlete_id=str(athlete_id))
+            .order_by(Result.date.desc(), Result.competition_id, Result.competition_type)
+            .all())
+    return [r.to_result_dict() for r in rows]
+
+
+def get_tracked_athletes(stale_after: Optional[int] = None) -> List[str]:
+    """Athletes to sync: every authorized athlete plus everyone already in the warehouse
+
+    Args:
+        stale_after: Only return athletes not synced in the last stale_after seconds
+    """
+    tracked = {t for (t,) in db.session.query(AuthorizedAthlete.tessera_atleta).distinct() if t}
+    synced = dict(db.session.query(ResultSyncState.athlete_id, ResultSyncState.last_synced_at).all())
+    tracked.update(synced)
+
+    if stale_after is not None:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+        tracked = {a for a in tracked if synced.get(a) is None or synced[a] < cutoff}
+
+    return sorted(tracked)
+
+
+def sync_athletes(client, athlete_ids: Iterable[str], limit: int = FETCH_LIMIT) -> Dict:
+    """Pull results for the given athletes from the API into the warehouse
+
+    Returns:
+        Totals: athletes, failed, inserted, updated, unchanged, deleted
+    """
+    totals = {'athletes': 0, 'failed': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+
+    for athlete_id in athlete_ids:
+        totals['athletes'] += 1
+        try:
+            payload = client.get_athlete_results(athlete_id, competition_type=None, limit=limit)
+            if isinstance(payload, dict):
+                payload = payload.get('results')
+            if not isinstance(payload, list):
+                raise ValueError(f'Unexpected API response: {type(payload)}')
+            counts = store_athlete_results(athlete_id, payload, complete=len(payload) < limit)
+        except Exception as e:
+            totals['failed'] += 1
+            logger.warning(f"Results sync failed for athlete {athlete_id}: {e}")
+            record_sync_error(athlete_id, str(e))
+            continue
+
+        for key, value in counts.items():
+            totals[key] += value
+
+    return totals
+
+
+def run_sync_loop(client, interval: int, stale_after: Optional[int] = None, echo=print):
+    """Sync tracked athletes every interval seconds (runs until interrupted)"""
+    while True:
+        started = time.time()
+        athletes = get_tracked_athletes(stale_after)
+        totals = sync_athletes(client, athletes)
+        echo(f"[{datetime.utcnow():%Y-%m-%d %H:%M:%S}] synced {totals['athletes']} athlete(s): "
+             f"{totals['inserted']} new, {totals['updated']} updated, {totals['failed']} failed")
+        time.sleep(max(0, interval - (time.time() - started)))
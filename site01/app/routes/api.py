@@ -1,11 +1,12 @@
 """
 API Routes for Website-Level Features
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
 from app import db
 from app.models import AuthorizedAthlete, User
 from app.api import OrionAPIClient
+from app.assignments import MAX_PAGE_SIZE, get_user_athletes, list_assignments
 from datetime import datetime
 import requests
 
@@ -99,7 +100,14 @@ def admin_get_users():
 @bp.route('/admin/api/authorized-athletes', methods=['GET'])
 @login_required
 def admin_get_all_assignments():
-    """Admin: Get all user-athlete assignments or for specific user"""
+    """Admin: Get all user-athlete assignments or for specific user
+    
+    Query params (all optional, listing only):
+        limit: Users per page (keyset pagination, max 500); omit for all
+        after: Cursor from the previous page's next_after
+        tessera: Only assignments of this athlete
+        username: Only users whose username contains this text
+    """
     
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -108,49 +116,24 @@ def admin_get_all_assignments():
     
     if user_id:
         # Get athletes for specific user
-        athletes = AuthorizedAthlete.query.filter_by(user_id=user_id).all()
         return jsonify({
             'user_id': user_id,
-            'athletes': [
-                {
-                    'id': a.id,
-                    'tessera': a.tessera_atleta,
-                    'nome_completo': a.nome_completo,
-                    'categoria': a.categoria,
-                    'data_nascita': a.data_nascita.isoformat() if a.data_nascita else None,
-                    'added_at': a.added_at.isoformat()
-                }
-                for a in athletes
-            ]
+            'athletes': get_user_athletes(user_id)
         })
     
-    # Get all assignments grouped by user
-    users = User.query.all()
-    
-    assignments = []
-    for user in users:
-        athletes = AuthorizedAthlete.query.filter_by(user_id=user.id).all()
-        if athletes:  # Only include users with athletes
-            assignments.append({
-                'user_id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'athletes': [
-                    {
-                        'id': a.id,
-                        'tessera': a.tessera_atleta,
-                        'nome_completo': a.nome_completo,
-                        'categoria': a.categoria,
-                        'classe': a.classe,
-                        'added_at': a.added_at.isoformat()
-                    }
-                    for a in athletes
-                ]
-            })
-    
-    return jsonify({'assignments': assignments})
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    # Get all assignments grouped by user (only users with athletes)
+    assignments, next_after = list_assignments(
+        after=request.args.get('after', type=int),
+        limit=limit,
+        tessera=request.args.get('tessera', '').strip() or None,
+        username=request.args.get('username', '').strip() or None
+    )
+    
+    return jsonify({'assignments': assignments, 'next_after': next_after})
 
 
 @bp.route('/admin/api/authorized-athletes', methods=['POST'])
@@ -476,11 +459,25 @@ def get_athlete_rankings(tessera):
     """
     Get all ranking positions for a specific athlete from the official ranking cache.
     Returns rankings ordered by most recent update first.
+    
+    Served from the local ranking index while recent sweeps (flask
+    refresh-rankings --all) cover every current qualifica, otherwise from the
+    Orion API.
     """
     try:
         from app.ranking_positions import get_ranking_positions
+        from app.ranking_snapshots import athlete_rankings, current_codes
         
         client = OrionAPIClient()
+        try:
+            codes = current_codes(client)
+        except Exception as e:
+            current_app.logger.warning(f"Could not read qualifiche, ranking index not used: {e}")
+            codes = []
+        rankings = athlete_rankings(tessera, codes, current_app.config.get('RANKING_INDEX_MAX_AGE', 86400))
+        if rankings is not None:
+            return jsonify(rankings)
+        
         rankings = client._make_request('GET', f'/api/athlete/{tessera}/rankings')
         
         if rankings is None:
@@ -489,30 +486,12 @@ def get_athlete_rankings(tessera):
         # Add max_positions and min_score to each ranking
         ranking_positions = get_ranking_positions()
         for ranking in rankings:
-            # Normalize class and division names
-            qualifica = ranking.get('qualifica', '')
-            classe = ranking.get('classe_gara', '')
-            categoria = ranking.get('categoria', '')
-            
-            # Apply same normalization as in archery.py
-            normalized_class = classe
-            normalized_division = categoria
-            
-            classe_lower = classe.lower()
-            if 'senior' in classe_lower:
-                normalized_class = classe.replace('Seniores', 'Senior').replace('seniores', 'Senior')
-            elif 'junior' in classe_lower:
-                normalized_class = classe.replace('Juniores', 'Junior').replace('juniores', 'Junior')
-            
-            categoria_lower = categoria.lower()
-            if 'olimpic' in categoria_lower and 'arco' not in categoria_lower:
-                normalized_division = 'Arco Olimpico'
-            elif 'compound' in categoria_lower and 'arco' not in categoria_lower:
-                normalized_division = 'Arco Compound'
-            elif 'nudo' in categoria_lower and 'arco' not in categoria_lower:
-                normalized_division = 'Arco Nudo'
-            
-            config = ranking_positions.get_positions(qualifica, normalized_class, normalized_division)
+            # One index hit per row (labels are normalized and memoized)
+            config = ranking_positions.lookup(
+                ranking.get('qualifica', ''),
+                ranking.get('classe_gara', ''),
+                ranking.get('categoria', '')
+            )
             if config:
                 ranking['max_positions'] = config['posti']
                 ranking['min_score'] = config['min_score']
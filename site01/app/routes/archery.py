@@ -1,12 +1,15 @@
 """
 Archery routes blueprint
 """
-from flask import Blueprint, render_template, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, render_template, request, jsonify, current_app, Response
 from flask_login import login_required, current_user
-from datetime import datetime
 from werkzeug.utils import secure_filename
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
+import time
 from app.api import OrionAPIClient
+from app.api.streaming import FILTER_FIELDS, FORMATS, export_response
 from app.models import AuthorizedAthlete, User
 from app.utils import t
 from app.archery_utils import (
@@ -14,10 +17,17 @@ from app.archery_utils import (
     get_competition_types_by_category,
     calculate_average_per_competition,
     filter_by_category,
-    get_statistics_summary
+    get_statistics_summary,
+    ResultColumns
 )
-from app.ranking_positions import get_ranking_positions
-from app.email_grouping import send_grouped_emails
+from app.dates import to_iso_date, date_in_range
+from app.ranking_positions import get_ranking_positions, parse_positions_csv, apply_positions, positions_to_csv
+from app.ranking_snapshots import get_official_snapshot
+from app.results_warehouse import FETCH_LIMIT as RESULTS_FETCH_LIMIT
+from app.results_warehouse import is_synced, load_local_results, store_athlete_results
+from app.career_stats import load_career_statistics
+from app.competition_catalog import get_competition as get_catalog_competition, get_turn as get_catalog_turn
+from app.notifications import enqueue_notification
 from app import db
 
 bp = Blueprint('archery', __name__, url_prefix='/archery')
@@ -60,15 +70,9 @@ def get_athlete_name(tessera_atleta):
         return None
 
 def get_competition_details(codice_gara, client):
-    """Fetch competition details from Orion API"""
+    """Get competition details from the local catalogue (loaded from Orion API on a miss)"""
     try:
-        # Get all competitions and filter by code
-        competitions = client._make_request('GET', '/api/gare', params={'future': 'false', 'limit': 1000})
-        if competitions:
-            for comp in competitions:
-                if comp.get('codice') == codice_gara:
-                    return comp
-        return None
+        return get_catalog_competition(codice_gara, client)
     except Exception as e:
         current_app.logger.error(f"Error fetching competition details for {codice_gara}: {e}")
         return None
@@ -90,25 +94,23 @@ def format_time(time_value):
         return str(time_value)
 
 def get_turn_details(codice_gara, turno, client):
-    """Fetch turn schedule details from Orion API"""
+    """Describe a turn's schedule from the local catalogue (turns loaded from Orion API on a miss)"""
     try:
-        turns = client._make_request('GET', '/api/turni', params={'codice_gara': codice_gara})
-        if turns:
-            for turn in turns:
-                if turn.get('turno') == turno:
-                    giorno = turn.get('giorno', '')
-                    ora_ritrovo = turn.get('ora_ritrovo', '')
-                    ora_inizio = turn.get('ora_inizio_tiri', '')
-                    
-                    parts = []
-                    if giorno:
-                        parts.append(giorno)
-                    if ora_ritrovo:
-                        parts.append(f"Ritrovo: {format_time(ora_ritrovo)}")
-                    if ora_inizio:
-                        parts.append(f"Inizio: {format_time(ora_inizio)}")
-                    
-                    return " - ".join(parts) if parts else None
+        turn = get_catalog_turn(codice_gara, turno, client)
+        if turn:
+            giorno = turn.get('giorno', '')
+            ora_ritrovo = turn.get('ora_ritrovo', '')
+            ora_inizio = turn.get('ora_inizio_tiri', '')
+            
+            parts = []
+            if giorno:
+                parts.append(giorno)
+            if ora_ritrovo:
+                parts.append(f"Ritrovo: {format_time(ora_ritrovo)}")
+            if ora_inizio:
+                parts.append(f"Inizio: {format_time(ora_inizio)}")
+            
+            return " - ".join(parts) if parts else None
         return None
     except Exception as e:
         current_app.logger.error(f"Error fetching turn details for {codice_gara} turn {turno}: {e}")
@@ -122,21 +124,233 @@ def normalize_date(date_str):
     if not date_str:
         return None
     
+    return to_iso_date(date_str) or date_str  # Return original if parsing fails
+
+
+class UpstreamPayloadError(Exception):
+    """Raised when the Orion API returns an unexpected payload"""
+    pass
+
+
+# Short-lived memo of transformed results per athlete: athlete_id -> (expires_at, results)
+# Analytics, statistics and results views for the same athlete share one upstream fetch.
+_results_memo = {}
+_results_memo_lock = threading.Lock()
+RESULTS_MEMO_MAX_ENTRIES = 256
+
+
+def unwrap_results(payload, athlete_id):
+    """Extract the results list from legacy (list) or wrapped ({summary, results}) payloads
+    
+    Raises:
+        UpstreamPayloadError: If the payload is None or has an unexpected shape
+    """
+    if payload is None:
+        current_app.logger.error(f"API returned None for athlete results (athlete_id={athlete_id})")
+        raise UpstreamPayloadError('No data from API')
+    
+    if isinstance(payload, list):
+        return payload
+    
+    if isinstance(payload, dict) and isinstance(payload.get('results'), list):
+        current_app.logger.debug(f"Extracting results array ({len(payload['results'])} items) from wrapper")
+        return payload['results']
+    
+    current_app.logger.error(f"Unexpected API payload for athlete results (athlete_id={athlete_id}): {payload}")
+    raise UpstreamPayloadError(f'Unexpected API response format: {type(payload)}')
+
+
+def transform_result(result):
+    """Transform an API result row to the standard format with normalized date"""
+    return {
+        'athlete': result.get('atleta'),
+        'competition_name': result.get('nome_gara'),
+        'competition_type': result.get('tipo_gara'),
+        'date': normalize_date(result.get('data_gara')),
+        'position': result.get('posizione'),
+        'score': result.get('punteggio'),
+        'club_code': result.get('codice_societa_atleta'),
+        'club_name': result.get('nome_societa_atleta'),
+        'organizer_code': result.get('codice_societa_organizzatrice'),
+        'organizer_name': result.get('nome_societa_organizzatrice')
+    }
+
+
+def fetch_athlete_results(client, athlete_id):
+    """Get transformed results from the local warehouse, falling back to the API
+    
+    A warehouse copy younger than RESULTS_WAREHOUSE_MAX_AGE is served directly.
+    Otherwise the API is called and its rows are written through to the
+    warehouse; if the API fails, an older local copy is served instead.
+    """
+    if not current_app.config.get('RESULTS_WAREHOUSE_ENABLED', True):
+        payload = client.get_athlete_results(athlete_id, competition_type=None, limit=RESULTS_FETCH_LIMIT)
+        return [transform_result(r) for r in unwrap_results(payload, athlete_id)]
+    
+    local = load_local_results(athlete_id, current_app.config.get('RESULTS_WAREHOUSE_MAX_AGE'))
+    if local is not None:
+        return local
+    
     try:
-        # Try common date formats
-        for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%m/%d/%Y']:
-            try:
-                date_obj = datetime.strptime(date_str, fmt)
-                return date_obj.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
-        
-        # If no format matches, try parsing as ISO format
-        date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        return date_obj.strftime('%Y-%m-%d')
-    except (ValueError, AttributeError) as e:
-        print(f"Warning: Could not parse date '{date_str}': {e}")
-        return date_str  # Return original if parsing fails
+        payload = client.get_athlete_results(athlete_id, competition_type=None, limit=RESULTS_FETCH_LIMIT)
+        raw_results = unwrap_results(payload, athlete_id)
+    except Exception:
+        stale = load_local_results(athlete_id)
+        if stale is None:
+            raise
+        current_app.logger.warning(f"Results API unavailable, serving stale local copy for athlete {athlete_id}")
+        return stale
+    
+    try:
+        store_athlete_results(athlete_id, raw_results, complete=len(raw_results) < RESULTS_FETCH_LIMIT)
+        return load_local_results(athlete_id)
+    except Exception as e:
+        current_app.logger.warning(f"Could not store results for athlete {athlete_id} locally: {e}")
+        return [transform_result(r) for r in raw_results]
+
+
+def load_athlete_results(client, athlete_id):
+    """Get all transformed results for an athlete, memoized for a short window
+    
+    The returned list is shared between requests and must not be mutated.
+    """
+    ttl = current_app.config.get('ATHLETE_RESULTS_MEMO_SECONDS', 60)
+    now = time.time()
+    
+    cached = _results_memo.get(athlete_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    transformed = fetch_athlete_results(client, athlete_id)
+    
+    with _results_memo_lock:
+        if len(_results_memo) >= RESULTS_MEMO_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest ones
+            for key in [k for k, v in _results_memo.items() if v[0] <= now]:
+                del _results_memo[key]
+            while len(_results_memo) >= RESULTS_MEMO_MAX_ENTRIES:
+                del _results_memo[min(_results_memo, key=lambda k: _results_memo[k][0])]
+        _results_memo[athlete_id] = (now + ttl, transformed)
+    
+    return transformed
+
+
+def filter_results(results, competition_type=None, category=None, start_date=None, end_date=None):
+    """Apply the analysis filters LOCALLY (type, CSV category, date range)"""
+    filtered = results
+    if competition_type:
+        filtered = [r for r in filtered if r.get('competition_type') == competition_type]
+    if category:
+        filtered = filter_by_category(filtered, category)
+    if start_date or end_date:
+        filtered = [r for r in filtered if date_in_range(r.get('date'), start_date, end_date)]
+    return list(filtered)
+
+
+def build_statistics(results):
+    """Build the statistics block returned by /statistics (career or filtered)"""
+    columns = ResultColumns(results)
+    summary = get_statistics_summary(columns, last_n=10)
+    
+    statistics = {
+        'total_competitions': summary['total_competitions'],
+        'gold_medals': summary['medals']['gold'],
+        'silver_medals': summary['medals']['silver'],
+        'bronze_medals': summary['medals']['bronze'],
+        'avg_position': summary['percentile_stats'].get('avg_position'),
+        'avg_percentile': summary['percentile_stats'].get('avg_percentile'),
+        'top_finishes': summary['percentile_stats'].get('top_finishes', 0),
+        'recent_competitions_analyzed': summary['percentile_stats'].get('competitions_analyzed', 0),
+        'best_scores_by_category': summary['best_scores'],
+        'category_breakdown': summary['categories']
+    }
+    
+    # Overall best score (ignore None or 0 scores)
+    best_result = columns.best_result()
+    if best_result:
+        statistics['best_score'] = best_result.get('score')
+        statistics['best_score_competition'] = best_result.get('competition_name')
+    else:
+        statistics['best_score'] = None
+        statistics['best_score_competition'] = None
+    
+    return statistics
+
+
+def warehouse_is_fresh(athlete_id):
+    """True if the warehouse copy of an athlete is recent enough to serve"""
+    return (current_app.config.get('RESULTS_WAREHOUSE_ENABLED', True)
+            and is_synced(athlete_id, current_app.config.get('RESULTS_WAREHOUSE_MAX_AGE')))
+
+
+def build_career_statistics(athlete_id, results):
+    """Career block from athlete_career_stats when the warehouse is on, else computed from results"""
+    if current_app.config.get('RESULTS_WAREHOUSE_ENABLED', True):
+        stored = load_career_statistics(athlete_id)
+        if stored is not None:
+            return stored
+    return build_statistics(results)
+
+
+EMPTY_CAREER_STATISTICS = {
+    'total_competitions': 0,
+    'gold_medals': 0,
+    'silver_medals': 0,
+    'bronze_medals': 0,
+    'avg_position': None,
+    'avg_percentile': None,
+    'best_score': None,
+    'best_score_competition': None
+}
+
+
+def build_chart_series(results, include_average=False):
+    """Build a date-sorted chart series (labels, scores, averages) from results"""
+    points = sorted((r for r in results if r.get('date')), key=lambda r: r['date'])
+    series = {
+        'labels': [r['date'] for r in points],
+        'scores': [r.get('score') for r in points]
+    }
+    if include_average:
+        series['averages'] = [r.get('average_per_arrow') for r in points]
+    return series
+
+
+def run_with_app_context(app, func, *args, **kwargs):
+    """Run func inside an app context (for worker threads)"""
+    with app.app_context():
+        return func(*args, **kwargs)
+
+
+def fetch_stats_chart(client, athlete_id, competition_type, start_date, end_date):
+    """Fetch /api/stats chart data, returning None on failure (optional data)"""
+    try:
+        return client.get_statistics(
+            athlete_id,
+            event_type=competition_type,
+            from_date=start_date,
+            to_date=end_date
+        )
+    except Exception as e:
+        current_app.logger.warning(f"Could not load stats chart data: {e}")
+        return None
+
+
+def load_results_and_chart(client, athlete_id, competition_type, start_date, end_date):
+    """Fetch results and /api/stats chart data concurrently
+    
+    Returns:
+        Tuple (transformed_results, stats_data)
+    """
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        stats_future = pool.submit(
+            run_with_app_context, app, fetch_stats_chart,
+            client, athlete_id, competition_type, start_date, end_date
+        )
+        results = load_athlete_results(client, athlete_id)
+        stats_data = stats_future.result()
+    return results, stats_data
 
 
 @bp.route('/')
@@ -190,8 +404,7 @@ def get_athlete_results(athlete_id):
     """Get athlete results"""
     try:
         # Fetch filter parameters
-        # competition_type can be passed to API as 'event_type'
-        # start_date and end_date must be filtered CLIENT-SIDE
+        # All filters are applied LOCALLY on the (memoized) full result list
         competition_type = request.args.get('competition_type')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
@@ -199,62 +412,15 @@ def get_athlete_results(athlete_id):
         include_average = request.args.get('include_average', 'false').lower() == 'true'
         
         client = OrionAPIClient()
-        # Call API with competition_type (converted to event_type)
-        results = client.get_athlete_results(
-            athlete_id,
-            competition_type=competition_type,
-            start_date=start_date,  # Not supported by API, will be filtered client-side
-            end_date=end_date  # Not supported by API, will be filtered client-side
-        )
-        # Defensive: if the API returned a non-list (string or dict), log and return a clear error
-        if results is None:
-            current_app.logger.error(f"API returned None for athlete results (athlete_id={athlete_id})")
-            return jsonify({'error': 'No data from API'}), 502
-        
-        # Handle both legacy (direct list) and new (wrapper with summary) API formats
-        if not isinstance(results, list):
-            current_app.logger.info(f"API returned wrapped format for results: {type(results)}")
-            # If it's a dict with a key 'results', try to extract it
-            if isinstance(results, dict) and 'results' in results and isinstance(results['results'], list):
-                current_app.logger.info(f"Extracting results array ({len(results['results'])} items) from wrapper")
-                results = results['results']
-            else:
-                current_app.logger.error(f"Unexpected API payload for athlete results (athlete_id={athlete_id}): {results}")
-                return jsonify({'error': 'Unexpected API response format', 'details': str(type(results))}), 502
+        try:
+            results = load_athlete_results(client, athlete_id)
+        except UpstreamPayloadError as e:
+            return jsonify({'error': str(e)}), 502
         
         if not results:
             return jsonify([])
         
-        # Transform API response to standard format with normalized dates
-        transformed = [
-            {
-                'athlete': result.get('atleta'),
-                'competition_name': result.get('nome_gara'),
-                'competition_type': result.get('tipo_gara'),
-                'date': normalize_date(result.get('data_gara')),  # Normalize date format
-                'position': result.get('posizione'),
-                'score': result.get('punteggio'),
-                'club_code': result.get('codice_societa_atleta'),
-                'club_name': result.get('nome_societa_atleta'),
-                'organizer_code': result.get('codice_societa_organizzatrice'),
-                'organizer_name': result.get('nome_societa_organizzatrice')
-            }
-            for result in results
-        ]
-        
-        # Filter by competition type LOCALLY (API doesn't support this filter)
-        if competition_type:
-            transformed = [r for r in transformed if r.get('competition_type') == competition_type]
-        
-        # Filter by category LOCALLY using CSV data (not API)
-        if category:
-            transformed = filter_by_category(transformed, category)
-        
-        # Filter by date range LOCALLY (API doesn't support this filter)
-        if start_date:
-            transformed = [r for r in transformed if r.get('date', '') >= start_date]
-        if end_date:
-            transformed = [r for r in transformed if r.get('date', '') <= end_date]
+        transformed = filter_results(results, competition_type, category, start_date, end_date)
         
         # Add average per arrow if requested (local calculation using CSV)
         if include_average:
@@ -280,158 +446,44 @@ def get_athlete_statistics(athlete_id):
         end_date = request.args.get('end_date')  # Will be 'to_date' for API
         
         client = OrionAPIClient()
-
-        # Get stats data (chart format from API) - uses /api/stats endpoint
-        # Convert our parameter names to API parameter names
-        try:
-            stats_data = client.get_statistics(
-                athlete_id,
-                event_type=competition_type,
-                from_date=start_date,
-                to_date=end_date
-            )
-        except Exception as e:
-            current_app.logger.warning(f"Could not load stats chart data: {e}")
-            stats_data = None
-
-        # Get all results to compute statistics - uses /api/athlete/{tessera}/results endpoint
-        all_results = client.get_athlete_results(
-            athlete_id,
-            competition_type=None,  # Get all types for career stats
-            limit=500
-        )
-
-        # Defensive checks for all_results
-        if all_results is None:
-            current_app.logger.error(f"API returned None for all_results (athlete_id={athlete_id})")
-            return jsonify({'career': None, 'filtered': None, 'chart_data': stats_data, 'athlete_id': athlete_id}), 502
-        
-        # Handle both legacy (direct list) and new (wrapper with summary) API formats
-        if not isinstance(all_results, list):
-            current_app.logger.info(f"API returned wrapped format: {type(all_results)}")
-            if isinstance(all_results, dict) and 'results' in all_results and isinstance(all_results['results'], list):
-                current_app.logger.info(f"Extracting results array ({len(all_results['results'])} items) from wrapper")
-                all_results = all_results['results']
-            else:
-                current_app.logger.error(f"Unexpected API payload for all_results (athlete_id={athlete_id}): {all_results}")
-                return jsonify({'error': 'Unexpected API response format for results', 'details': str(type(all_results))}), 502
-
-        # DEBUG: Log what we actually got from the API (after extracting from wrapper if needed)
-        current_app.logger.info(f"Processing {len(all_results)} results")
-        if all_results and len(all_results) > 0:
-            current_app.logger.info(f"First result keys: {list(all_results[0].keys())}")
-            current_app.logger.info(f"First result sample: {all_results[0]}")
-
-        if not all_results:
-            return jsonify({
-                'career': {
-                    'total_competitions': 0,
-                    'gold_medals': 0,
-                    'silver_medals': 0,
-                    'bronze_medals': 0,
-                    'avg_position': None,
-                    'avg_percentile': None,
-                    'best_score': None,
-                    'best_score_competition': None
-                },
-                'filtered': None,
-                'chart_data': stats_data
-            })
-        
-        # Transform results to standard format with normalized dates
-        # API returns results with these field names
-        transformed_results = []
-        for result in all_results:
-            transformed_results.append({
-                'athlete': result.get('atleta'),
-                'competition_name': result.get('nome_gara'),
-                'competition_type': result.get('tipo_gara'),
-                'date': normalize_date(result.get('data_gara')),
-                'position': result.get('posizione'),
-                'score': result.get('punteggio')
-            })
-        
-        current_app.logger.info(f"Transformed {len(transformed_results)} results")
+        has_filters = competition_type or category or start_date or end_date
         
-        # Calculate CAREER statistics (all data)
-        career_stats = get_statistics_summary(transformed_results, last_n=10)
+        # Unfiltered view of a synced athlete: career block comes straight from
+        # athlete_career_stats, no result rows are loaded
+        career_statistics = None
+        if not has_filters and warehouse_is_fresh(athlete_id):
+            career_statistics = load_career_statistics(athlete_id)
         
-        career_statistics = {
-            'total_competitions': career_stats['total_competitions'],
-            'gold_medals': career_stats['medals']['gold'],
-            'silver_medals': career_stats['medals']['silver'],
-            'bronze_medals': career_stats['medals']['bronze'],
-            'avg_position': career_stats['percentile_stats'].get('avg_position'),
-            'avg_percentile': career_stats['percentile_stats'].get('avg_percentile'),
-            'top_finishes': career_stats['percentile_stats'].get('top_finishes', 0),
-            'recent_competitions_analyzed': career_stats['percentile_stats'].get('competitions_analyzed', 0),
-            'best_scores_by_category': career_stats['best_scores'],
-            'category_breakdown': career_stats['categories']
-        }
-        
-        # Find overall best score
-        if transformed_results:
-            # Filter out results with None or 0 scores before finding max
-            valid_scores = [r for r in transformed_results if r.get('score') is not None and r.get('score') > 0]
-            if valid_scores:
-                best_result = max(valid_scores, key=lambda x: x.get('score', 0))
-                career_statistics['best_score'] = best_result.get('score')
-                career_statistics['best_score_competition'] = best_result.get('competition_name')
-            else:
-                career_statistics['best_score'] = None
-                career_statistics['best_score_competition'] = None
+        if career_statistics is not None:
+            stats_data = fetch_stats_chart(client, athlete_id, competition_type, start_date, end_date)
+            filtered_statistics = None
         else:
-            career_statistics['best_score'] = None
-            career_statistics['best_score_competition'] = None
-        
-        # Calculate FILTERED statistics if filters are applied
-        filtered_statistics = None
-        has_filters = competition_type or category or start_date or end_date
-        
-        if has_filters:
-            # Apply filters
-            filtered_results = transformed_results.copy()
+            # /api/stats (chart) and /api/athlete/{tessera}/results are fetched concurrently
+            try:
+                transformed_results, stats_data = load_results_and_chart(
+                    client, athlete_id, competition_type, start_date, end_date
+                )
+            except UpstreamPayloadError as e:
+                return jsonify({'error': str(e), 'career': None, 'filtered': None, 'athlete_id': athlete_id}), 502
             
-            # Filter by competition type
-            if competition_type:
-                filtered_results = [r for r in filtered_results if r.get('competition_type') == competition_type]
+            current_app.logger.info(f"Processing {len(transformed_results)} results")
             
-            # Filter by category (using CSV data)
-            if category:
-                filtered_results = filter_by_category(filtered_results, category)
+            if not transformed_results:
+                return jsonify({
+                    'career': dict(EMPTY_CAREER_STATISTICS),
+                    'filtered': None,
+                    'chart_data': stats_data
+                })
             
-            # Filter by date range
-            if start_date:
-                filtered_results = [r for r in filtered_results if r.get('date', '') >= start_date]
-            if end_date:
-                filtered_results = [r for r in filtered_results if r.get('date', '') <= end_date]
+            # Calculate CAREER statistics (all data)
+            career_statistics = build_career_statistics(athlete_id, transformed_results)
             
-            # Calculate statistics for filtered data
-            if filtered_results:
-                filtered_stats = get_statistics_summary(filtered_results, last_n=10)
-                
-                filtered_statistics = {
-                    'total_competitions': filtered_stats['total_competitions'],
-                    'gold_medals': filtered_stats['medals']['gold'],
-                    'silver_medals': filtered_stats['medals']['silver'],
-                    'bronze_medals': filtered_stats['medals']['bronze'],
-                    'avg_position': filtered_stats['percentile_stats'].get('avg_position'),
-                    'avg_percentile': filtered_stats['percentile_stats'].get('avg_percentile'),
-                    'top_finishes': filtered_stats['percentile_stats'].get('top_finishes', 0),
-                    'recent_competitions_analyzed': filtered_stats['percentile_stats'].get('competitions_analyzed', 0),
-                    'best_scores_by_category': filtered_stats['best_scores'],
-                    'category_breakdown': filtered_stats['categories']
-                }
-                
-                # Find best score in filtered results
-                valid_filtered_scores = [r for r in filtered_results if r.get('score') is not None and r.get('score') > 0]
-                if valid_filtered_scores:
-                    best_filtered = max(valid_filtered_scores, key=lambda x: x.get('score', 0))
-                    filtered_statistics['best_score'] = best_filtered.get('score')
-                    filtered_statistics['best_score_competition'] = best_filtered.get('competition_name')
-                else:
-                    filtered_statistics['best_score'] = None
-                    filtered_statistics['best_score_competition'] = None
+            # Calculate FILTERED statistics if filters are applied
+            filtered_statistics = None
+            if has_filters:
+                filtered_results = filter_results(transformed_results, competition_type, category, start_date, end_date)
+                if filtered_results:
+                    filtered_statistics = build_statistics(filtered_results)
         
         response = {
             'career': career_statistics,
@@ -452,6 +504,160 @@ def get_athlete_statistics(athlete_id):
         current_app.logger.error(f"Traceback: {traceback.format_exc()}")
         return jsonify({'error': 'Failed to fetch athlete statistics', 'details': str(e)}), 500
 
+@bp.route('/api/athlete/<athlete_id>/analytics')
+def get_athlete_analytics(athlete_id):
+    """Get results, career/filtered statistics and chart series in one call
+    
+    Accepts the same filters as /results and /statistics (competition_type,
+    category, start_date, end_date, include_average). The raw result list is
+    fetched once and shared by every section of the response.
+    """
+    try:
+        competition_type = request.args.get('competition_type')
+        category = request.args.get('category')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        include_average = request.args.get('include_average', 'false').lower() == 'true'
+        
+        client = OrionAPIClient()
+        try:
+            all_results, stats_data = load_results_and_chart(
+                client, athlete_id, competition_type, start_date, end_date
+            )
+        except UpstreamPayloadError as e:
+            return jsonify({'error': str(e), 'athlete_id': athlete_id}), 502
+        
+        has_filters = competition_type or category or start_date or end_date
+        filtered_results = filter_results(all_results, competition_type, category, start_date, end_date) if has_filters else list(all_results)
+        
+        if all_results:
+            career_statistics = build_career_statistics(athlete_id, all_results)
+        else:
+            career_statistics = dict(EMPTY_CAREER_STATISTICS)
+        
+        filtered_statistics = None
+        if has_filters and filtered_results:
+            filtered_statistics = build_statistics(filtered_results)
+        
+        if include_average:
+            filtered_results = calculate_average_per_competition(filtered_results, include_average=True)
+        
+        return jsonify({
+            'athlete_id': athlete_id,
+            'results': filtered_results,
+            'career': career_statistics,
+            'filtered': filtered_statistics,
+            'series': build_chart_series(filtered_results, include_average),
+            'chart_data': stats_data
+        })
+    
+    except Exception as e:
+        current_app.logger.error(f"Error fetching athlete analytics: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to fetch athlete analytics', 'details': str(e)}), 500
+
+def build_aligned_datasets(athlete_results, include_average=False):
+    """Build chart datasets for several athletes aligned on a common date axis
+    
+    Args:
+        athlete_results: List of (athlete_id, results) tuples
+        include_average: Plot average per arrow instead of total score when available
+    
+    Returns:
+        Dict with 'labels' (sorted YYYY-MM-DD dates) and one dataset per athlete
+        ('data' aligned with labels, None where the athlete has no result)
+    """
+    labels = sorted({r['date'] for _, results in athlete_results for r in results if r.get('date')})
+    
+    datasets = []
+    for athlete_id, results in athlete_results:
+        values_by_date = {}
+        for r in results:
+            if not r.get('date'):
+                continue
+            if include_average and 'average_per_arrow' in r:
+                value = r['average_per_arrow']
+            else:
+                value = r.get('score')
+            values_by_date[r['date']] = value or None
+        datasets.append({
+            'athlete_id': athlete_id,
+            'data': [values_by_date.get(date) for date in labels]
+        })
+    
+    return {'labels': labels, 'datasets': datasets}
+
+
+@bp.route('/api/compare')
+def compare_athletes():
+    """Compare several athletes in one request
+    
+    Query parameters:
+        athletes: Comma-separated tessera IDs (e.g. "a,b,c")
+        competition_type, category, start_date, end_date, include_average: same filters as /analytics
+    
+    Every athlete's results are fetched concurrently, summaries are computed in
+    one pass and the chart datasets are aligned once on a shared date axis.
+    """
+    athlete_ids = [a.strip() for a in request.args.get('athletes', '').split(',') if a.strip()]
+    # Preserve order, drop duplicates
+    athlete_ids = list(dict.fromkeys(athlete_ids))
+    max_athletes = current_app.config.get('COMPARE_MAX_ATHLETES', 5)
+    
+    if not athlete_ids:
+        return jsonify({'error': 'athletes parameter is required'}), 400
+    if len(athlete_ids) > max_athletes:
+        return jsonify({'error': f'At most {max_athletes} athletes can be compared'}), 400
+    
+    competition_type = request.args.get('competition_type')
+    category = request.args.get('category')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    include_average = request.args.get('include_average', 'false').lower() == 'true'
+    has_filters = competition_type or category or start_date or end_date
+    
+    try:
+        client = OrionAPIClient()
+        app = current_app._get_current_object()
+        
+        # Fan out upstream requests (memoized results are returned immediately)
+        with ThreadPoolExecutor(max_workers=len(athlete_ids)) as pool:
+            futures = {
+                athlete_id: pool.submit(run_with_app_context, app, load_athlete_results, client, athlete_id)
+                for athlete_id in athlete_ids
+            }
+        
+        athletes = []
+        chart_input = []
+        for athlete_id in athlete_ids:
+            try:
+                all_results = futures[athlete_id].result()
+            except Exception as e:
+                current_app.logger.error(f"Error fetching results for athlete {athlete_id}: {e}")
+                athletes.append({'athlete_id': athlete_id, 'error': str(e)})
+                chart_input.append((athlete_id, []))
+                continue
+            
+            filtered_results = filter_results(all_results, competition_type, category, start_date, end_date) if has_filters else list(all_results)
+            
+            athletes.append({
+                'athlete_id': athlete_id,
+                'career': build_career_statistics(athlete_id, all_results) if all_results else dict(EMPTY_CAREER_STATISTICS),
+                'filtered': build_statistics(filtered_results) if has_filters and filtered_results else None
+            })
+            
+            if include_average:
+                filtered_results = calculate_average_per_competition(filtered_results, include_average=True)
+            chart_input.append((athlete_id, filtered_results))
+        
+        return jsonify({
+            'athletes': athletes,
+            'chart': build_aligned_datasets(chart_input, include_average)
+        })
+    
+    except Exception as e:
+        current_app.logger.error(f"Error comparing athletes: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to compare athletes', 'details': str(e)}), 500
+
 @bp.route('/api/competition_types')
 def get_competition_types():
     """Get available competition types from API /api/event_types"""
@@ -719,6 +925,21 @@ def get_invite_text(codice):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _export_options():
+    """Output format and record filters of a mass export request
+    
+    Query parameters: format (json, ndjson or csv; default json) and any of
+    FILTER_FIELDS as equality filters (e.g. codice_gara=...).
+    
+    Returns:
+        Tuple (format, filters, error message or None)
+    """
+    fmt = request.args.get('format', 'json')
+    if fmt not in FORMATS:
+        return fmt, {}, f"Unsupported format '{fmt}' (use {', '.join(FORMATS)})"
+    filters = {field: request.args[field] for field in FILTER_FIELDS if request.args.get(field)}
+    return fmt, filters, None
+
 @bp.route('/api/iscrizioni', methods=['GET', 'POST'])
 @login_required
 def handle_iscrizioni():
@@ -732,10 +953,11 @@ def handle_iscrizioni():
         
         try:
             if export == 'full':
-                # Mass export - get all subscriptions
-                # FastAPI doesn't support this, so we need to get all athletes and their subscriptions
-                # For now, just call without tessera_atleta filter
-                iscrizioni = client.get_all_subscriptions()
+                # Mass export - streamed from the upstream body (see app.api.streaming)
+                fmt, filters, error = _export_options()
+                if error:
+                    return jsonify({'error': error}), 400
+                return export_response(client.stream_all_subscriptions(), fmt, filters, 'iscrizioni')
             elif tessera_atleta:
                 iscrizioni = client.get_subscriptions(tessera_atleta)
             else:
@@ -764,78 +986,8 @@ def handle_iscrizioni():
                 note=data.get('note', '')
             )
             
-            # Send email notification to all users managing this athlete
-            try:
-                current_app.logger.info(f'[EMAIL] Attempting to send subscription notification for athlete {data["tessera_atleta"]}')
-                user_emails = get_user_emails_for_athlete(data['tessera_atleta'])
-                
-                if user_emails:
-                    current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                    
-                    # Fetch competition and athlete details
-                    comp_details = get_competition_details(data['codice_gara'], client)
-                    athlete_name = get_athlete_name(data['tessera_atleta'])
-                    turn_info = get_turn_details(data['codice_gara'], data['turno'], client)
-                    
-                    # Build details with custom subject
-                    details = {}
-                    
-                    # Competition info
-                    if comp_details:
-                        details['Nome Gara'] = comp_details.get('nome', '')
-                        if comp_details.get('data_inizio'):
-                            data_inizio = comp_details['data_inizio']
-                            data_fine = comp_details.get('data_fine')
-                            if data_fine and data_fine != data_inizio:
-                                details['Date'] = f"{data_inizio} / {data_fine}"
-                            else:
-                                details['Data'] = data_inizio
-                        if comp_details.get('luogo'):
-                            details['Luogo'] = comp_details['luogo']
-                        if comp_details.get('societa_nome'):
-                            details['Società Organizzatrice'] = comp_details['societa_nome']
-                        elif comp_details.get('societa_codice'):
-                            details['Società Organizzatrice'] = comp_details['societa_codice']
-                    
-                    details['Codice Gara'] = data['codice_gara']
-                    
-                    # Athlete info
-                    athlete_display = f"{data['tessera_atleta']}"
-                    if athlete_name:
-                        athlete_display += f" - {athlete_name}"
-                    details['Atleta'] = athlete_display
-                    
-                    details['Categoria'] = data['categoria']
-                    details['Classe'] = data.get('classe', 'N/A')
-                    
-                    # Turn info
-                    turn_display = str(data['turno'])
-                    if turn_info:
-                        turn_display += f" ({turn_info})"
-                    details['Turno'] = turn_display
-                    
-                    details['Stato'] = data.get('stato', 'confermato')
-                    
-                    # Custom subject
-                    subject = f"Iscrizione confermata"
-                    if comp_details and comp_details.get('nome'):
-                        subject += f" - {comp_details['nome']}"
-                    
-                    # Use grouped email sending (handles single or multiple athletes)
-                    send_grouped_emails(
-                        athletes_data=[{
-                            'tessera_atleta': data['tessera_atleta'],
-                            'details': details
-                        }],
-                        mail_type='subscription',
-                        subject_prefix=subject,
-                        body_text='Iscrizione registrata con successo.',
-                        client=client
-                    )
-                else:
-                    current_app.logger.warning(f'[EMAIL] No users found managing athlete {data["tessera_atleta"]}')
-            except Exception as email_err:
-                current_app.logger.error(f'[EMAIL] Error in subscription email process: {email_err}', exc_info=True)
+            # Notify users managing this athlete (sent by the outbox dispatcher)
+            enqueue_notification('subscription_created', data['tessera_atleta'], data['codice_gara'], {'data': data})
             
             return jsonify(result)
         except Exception as e:
@@ -856,54 +1008,10 @@ def manage_iscrizione(subscription_id):
             
             result = client.delete_subscription(subscription_id)
             
-            # Send cancellation email to all users managing this athlete
+            # Notify users managing this athlete (sent by the outbox dispatcher)
             if tessera_atleta:
-                try:
-                    current_app.logger.info(f'[EMAIL] Attempting to send cancellation notification for athlete {tessera_atleta}')
-                    user_emails = get_user_emails_for_athlete(tessera_atleta)
-                    
-                    if user_emails:
-                        current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                        
-                        # Fetch details
-                        codice_gara = subscription_data.get('codice_gara', '')
-                        comp_details = get_competition_details(codice_gara, client) if codice_gara else None
-                        athlete_name = get_athlete_name(tessera_atleta)
-                        
-                        details = {}
-                        
-                        if comp_details and comp_details.get('nome'):
-                            details['Nome Gara'] = comp_details['nome']
-                        
-                        details['Codice Gara'] = codice_gara
-                        
-                        athlete_display = tessera_atleta
-                        if athlete_name:
-                            athlete_display += f" - {athlete_name}"
-                        details['Atleta'] = athlete_display
-                        
-                        details['ID Iscrizione'] = str(subscription_id)
-                        details['Stato'] = 'Cancellata'
-                        
-                        subject = "Iscrizione cancellata"
-                        if comp_details and comp_details.get('nome'):
-                            subject += f" - {comp_details['nome']}"
-                        
-                        # Use grouped email sending
-                        send_grouped_emails(
-                            athletes_data=[{
-                                'tessera_atleta': tessera_atleta,
-                                'details': details
-                            }],
-                            mail_type='cancellation_confirmed',
-                            subject_prefix=subject,
-                            body_text='Iscrizione cancellata con successo.',
-                            client=client
-                        )
-                    else:
-                        current_app.logger.warning(f'[EMAIL] No users found managing athlete {tessera_atleta}')
-                except Exception as email_err:
-                    current_app.logger.error(f'[EMAIL] Error in cancellation email process: {email_err}', exc_info=True)
+                enqueue_notification('subscription_cancelled', tessera_atleta, subscription_data.get('codice_gara', ''),
+                                     {'id': subscription_id})
             else:
                 current_app.logger.warning(f'[EMAIL] No tessera_atleta provided for subscription {subscription_id} deletion')
             
@@ -915,67 +1023,10 @@ def manage_iscrizione(subscription_id):
             
             result = client.update_subscription(subscription_id, data)
             
-            # Send modification email to all users managing this athlete
+            # Notify users managing this athlete (sent by the outbox dispatcher)
             if tessera_atleta:
-                try:
-                    current_app.logger.info(f'[EMAIL] Attempting to send modification notification for athlete {tessera_atleta}')
-                    user_emails = get_user_emails_for_athlete(tessera_atleta)
-                    
-                    if user_emails:
-                        current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                        
-                        # Fetch details
-                        codice_gara = data.get('codice_gara', '')
-                        comp_details = get_competition_details(codice_gara, client) if codice_gara else None
-                        athlete_name = get_athlete_name(tessera_atleta)
-                        
-                        # Build list of changes with turn details if changed
-                        changes = []
-                        for k, v in data.items():
-                            if k not in ['tessera_atleta', 'codice_gara', 'athlete_email']:
-                                if k == 'turno':
-                                    turn_info = get_turn_details(codice_gara, v, client)
-                                    display = str(v)
-                                    if turn_info:
-                                        display += f" ({turn_info})"
-                                    changes.append(f"{k}: {display}")
-                                else:
-                                    changes.append(f"{k}: {v}")
-                        
-                        details = {}
-                        
-                        if comp_details and comp_details.get('nome'):
-                            details['Nome Gara'] = comp_details['nome']
-                        
-                        details['Codice Gara'] = codice_gara
-                        
-                        athlete_display = tessera_atleta
-                        if athlete_name:
-                            athlete_display += f" - {athlete_name}"
-                        details['Atleta'] = athlete_display
-                        
-                        details['ID Iscrizione'] = str(subscription_id)
-                        details['Modifiche'] = ', '.join(changes) if changes else 'Nessuna modifica specifica'
-                        
-                        subject = "Iscrizione modificata"
-                        if comp_details and comp_details.get('nome'):
-                            subject += f" - {comp_details['nome']}"
-                        
-                        # Use grouped email sending
-                        send_grouped_emails(
-                            athletes_data=[{
-                                'tessera_atleta': tessera_atleta,
-                                'details': details
-                            }],
-                            mail_type='modification_confirmed',
-                            subject_prefix=subject,
-                            body_text='Iscrizione modificata con successo.',
-                            client=client
-                        )
-                    else:
-                        current_app.logger.warning(f'[EMAIL] No users found managing athlete {tessera_atleta}')
-                except Exception as email_err:
-                    current_app.logger.error(f'[EMAIL] Error in modification email process: {email_err}', exc_info=True)
+                enqueue_notification('subscription_modified', tessera_atleta, data.get('codice_gara', ''),
+                                     {'id': subscription_id, 'data': data})
             
             return jsonify(result if result else {'id': subscription_id, 'status': 'updated'})
     except Exception as e:
@@ -996,8 +1047,11 @@ def handle_interesse():
         
         try:
             if export == 'full':
-                # Mass export - get all interests
-                interests = client.get_all_interests()
+                # Mass export - streamed from the upstream body (see app.api.streaming)
+                fmt, filters, error = _export_options()
+                if error:
+                    return jsonify({'error': error}), 400
+                return export_response(client.stream_all_interests(), fmt, filters, 'interesse')
             else:
                 interests = client.get_interests(tessera_atleta=tessera_atleta, codice_gara=codice_gara)
             return jsonify(interests if interests else [])
@@ -1023,65 +1077,8 @@ def handle_interesse():
                 note=data.get('note', '')
             )
             
-            # Send email notification to all users managing this athlete
-            try:
-                current_app.logger.info(f'[EMAIL] Attempting to send interest notification for athlete {data["tessera_atleta"]}')
-                user_emails = get_user_emails_for_athlete(data['tessera_atleta'])
-                
-                if user_emails:
-                    current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                    
-                    # Fetch competition and athlete details
-                    comp_details = get_competition_details(data['codice_gara'], client)
-                    athlete_name = get_athlete_name(data['tessera_atleta'])
-                    
-                    details = {}
-                    
-                    # Competition info
-                    if comp_details:
-                        details['Nome Gara'] = comp_details.get('nome', '')
-                        if comp_details.get('data_inizio'):
-                            data_inizio = comp_details['data_inizio']
-                            data_fine = comp_details.get('data_fine')
-                            if data_fine and data_fine != data_inizio:
-                                details['Date'] = f"{data_inizio} / {data_fine}"
-                            else:
-                                details['Data'] = data_inizio
-                    
-                    details['Codice Gara'] = data['codice_gara']
-                    
-                    # Athlete info
-                    athlete_display = data['tessera_atleta']
-                    if athlete_name:
-                        athlete_display += f" - {athlete_name}"
-                    details['Atleta'] = athlete_display
-                    
-                    details['Categoria'] = data['categoria']
-                    details['Classe'] = data.get('classe', 'N/A')
-                    
-                    if data.get('note'):
-                        details['Note'] = data['note']
-                    
-                    # Custom subject
-                    subject = "Interesse registrato"
-                    if comp_details and comp_details.get('nome'):
-                        subject += f" - {comp_details['nome']}"
-                    
-                    # Use grouped email sending
-                    send_grouped_emails(
-                        athletes_data=[{
-                            'tessera_atleta': data['tessera_atleta'],
-                            'details': details
-                        }],
-                        mail_type='interest',
-                        subject_prefix=subject,
-                        body_text='Espressione di interesse registrata con successo.',
-                        client=client
-                    )
-                else:
-                    current_app.logger.warning(f'[EMAIL] No users found managing athlete {data["tessera_atleta"]}')
-            except Exception as email_err:
-                current_app.logger.error(f'[EMAIL] Error in interest email process: {email_err}', exc_info=True)
+            # Notify users managing this athlete (sent by the outbox dispatcher)
+            enqueue_notification('interest_created', data['tessera_atleta'], data['codice_gara'], {'data': data})
             
             return jsonify(result)
         except Exception as e:
@@ -1103,52 +1100,10 @@ def manage_interesse(interest_id):
             
             result = client.delete_interest(interest_id)
             
-            # Send cancellation email to all users managing this athlete
+            # Notify users managing this athlete (sent by the outbox dispatcher)
             if tessera_atleta:
-                try:
-                    current_app.logger.info(f'[EMAIL] Attempting to send interest cancellation notification for athlete {tessera_atleta}')
-                    user_emails = get_user_emails_for_athlete(tessera_atleta)
-                    
-                    if user_emails:
-                        current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                        
-                        codice_gara = interest_data.get('codice_gara', '')
-                        comp_details = get_competition_details(codice_gara, client) if codice_gara else None
-                        athlete_name = get_athlete_name(tessera_atleta)
-                        
-                        details = {}
-                        
-                        if comp_details and comp_details.get('nome'):
-                            details['Nome Gara'] = comp_details['nome']
-                        
-                        details['Codice Gara'] = codice_gara
-                        
-                        athlete_display = tessera_atleta
-                        if athlete_name:
-                            athlete_display += f" - {athlete_name}"
-                        details['Atleta'] = athlete_display
-                        
-                        details['Stato'] = 'Cancellata'
-                        
-                        subject = "Interesse cancellato"
-                        if comp_details and comp_details.get('nome'):
-                            subject += f" - {comp_details['nome']}"
-                        
-                        # Use grouped email sending
-                        send_grouped_emails(
-                            athletes_data=[{
-                                'tessera_atleta': tessera_atleta,
-                                'details': details
-                            }],
-                            mail_type='cancellation_confirmed',
-                            subject_prefix=subject,
-                            body_text='Espressione di interesse cancellata con successo.',
-                            client=client
-                        )
-                    else:
-                        current_app.logger.warning(f'[EMAIL] No users found managing athlete {tessera_atleta}')
-                except Exception as email_err:
-                    current_app.logger.error(f'[EMAIL] Error in interest cancellation email process: {email_err}', exc_info=True)
+                enqueue_notification('interest_cancelled', tessera_atleta, interest_data.get('codice_gara', ''),
+                                     {'id': interest_id})
             else:
                 current_app.logger.warning(f'[EMAIL] No tessera_atleta provided for interest {interest_id} deletion')
             
@@ -1160,56 +1115,10 @@ def manage_interesse(interest_id):
             
             result = client.update_interest(interest_id, data)
             
-            # Send modification email to all users managing this athlete
+            # Notify users managing this athlete (sent by the outbox dispatcher)
             if tessera_atleta:
-                try:
-                    current_app.logger.info(f'[EMAIL] Attempting to send interest modification notification for athlete {tessera_atleta}')
-                    user_emails = get_user_emails_for_athlete(tessera_atleta)
-                    
-                    if user_emails:
-                        current_app.logger.info(f'[EMAIL] Found {len(user_emails)} user(s) to notify: {user_emails}')
-                        
-                        codice_gara = data.get('codice_gara', '')
-                        comp_details = get_competition_details(codice_gara, client) if codice_gara else None
-                        athlete_name = get_athlete_name(tessera_atleta)
-                        
-                        # Build list of changes
-                        changes = [f'{k}: {v}' for k, v in data.items() 
-                                 if k not in ['tessera_atleta', 'codice_gara', 'athlete_email']]
-                        
-                        details = {}
-                        
-                        if comp_details and comp_details.get('nome'):
-                            details['Nome Gara'] = comp_details['nome']
-                        
-                        details['Codice Gara'] = codice_gara
-                        
-                        athlete_display = tessera_atleta
-                        if athlete_name:
-                            athlete_display += f" - {athlete_name}"
-                        details['Atleta'] = athlete_display
-                        
-                        details['Modifiche'] = ', '.join(changes) if changes else 'Nessuna modifica specifica'
-                        
-                        subject = "Interesse modificato"
-                        if comp_details and comp_details.get('nome'):
-                            subject += f" - {comp_details['nome']}"
-                        
-                        # Use grouped email sending
-                        send_grouped_emails(
-                            athletes_data=[{
-                                'tessera_atleta': tessera_atleta,
-                                'details': details
-                            }],
-                            mail_type='modification_confirmed',
-                            subject_prefix=subject,
-                            body_text='Espressione di interesse modificata con successo.',
-                            client=client
-                        )
-                    else:
-                        current_app.logger.warning(f'[EMAIL] No users found managing athlete {tessera_atleta}')
-                except Exception as email_err:
-                    current_app.logger.error(f'[EMAIL] Error in interest modification email process: {email_err}', exc_info=True)
+                enqueue_notification('interest_modified', tessera_atleta, data.get('codice_gara', ''),
+                                     {'id': interest_id, 'data': data})
             
             return jsonify(result if result else {'id': interest_id, 'status': 'updated'})
     except Exception as e:
@@ -1235,6 +1144,10 @@ def get_official_ranking():
         code: Qualification code from ARC_qualifiche
         class_name: Exact class name (e.g., "Senior Maschile", "Junior Femminile")
         division: Division/category (e.g., "Compound", "Arco Nudo")
+    
+    Rows carry max_positions/min_score and qualification annotations when
+    positions are configured (see app.ranking_snapshots). Supports
+    If-None-Match (304).
     """
     try:
         code = request.args.get('code')
@@ -1244,47 +1157,19 @@ def get_official_ranking():
         if not code or not class_name or not division:
             return jsonify({'error': 'Missing required parameters: code, class_name, division'}), 400
         
+        # Served from the annotated snapshot (refreshed in the background when stale)
         client = OrionAPIClient()
-        ranking_data = client.get_ranking_official(code, class_name, division)
-        
-        # Normalize class and division names for CSV lookup
-        # CSV uses standardized format, API might use variations
-        normalized_class = class_name
-        normalized_division = division
-        
-        # Normalize class: Senior/Junior/Master/Allievi/Ragazzi/Giovanissimi + Maschile/Femminile
-        class_lower = class_name.lower()
-        if 'senior' in class_lower:
-            normalized_class = class_name.replace('Seniores', 'Senior').replace('seniores', 'Senior')
-        elif 'junior' in class_lower:
-            normalized_class = class_name.replace('Juniores', 'Junior').replace('juniores', 'Junior')
-        
-        # Normalize division: add "Arco" prefix if not present
-        division_lower = division.lower()
-        if 'olimpic' in division_lower and 'arco' not in division_lower:
-            normalized_division = 'Arco Olimpico'
-        elif 'compound' in division_lower and 'arco' not in division_lower:
-            normalized_division = 'Arco Compound'
-        elif 'nudo' in division_lower and 'arco' not in division_lower:
-            normalized_division = 'Arco Nudo'
-        
-        # Add available positions info if configured
-        ranking_positions = get_ranking_positions()
-        config = ranking_positions.get_positions(code, normalized_class, normalized_division)
-        
-        # Debug logging
-        current_app.logger.info(f"Original params: code={code}, class={class_name}, division={division}")
-        current_app.logger.info(f"Normalized params: class={normalized_class}, division={normalized_division}")
-        current_app.logger.info(f"Found config: {config}")
-        
-        # If config exists, add it to each entry
-        if config and isinstance(ranking_data, list):
-            for entry in ranking_data:
-                entry['max_positions'] = config['posti']
-                entry['min_score'] = config['min_score']
-            current_app.logger.info(f"Added max_positions={config['posti']}, min_score={config['min_score']} to {len(ranking_data)} entries")
+        ranking_data, etag = get_official_snapshot(
+            current_app._get_current_object(), client, code, class_name, division,
+            max_age=current_app.config.get('RANKING_SNAPSHOT_MAX_AGE', 900)
+        )
         
-        return jsonify(ranking_data)
+        response = jsonify(ranking_data)
+        if etag:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            response = response.make_conditional(request)
+        return response
     except Exception as e:
         current_app.logger.error(f"Error fetching official ranking: {e}")
         return jsonify({'error': 'Failed to fetch official ranking', 'details': str(e)}), 500
@@ -1310,8 +1195,10 @@ def reload_ranking_positions():
     
     try:
         ranking_positions = get_ranking_positions()
-        ranking_positions.reload()
-        return jsonify({'success': True, 'message': 'Ranking positions reloaded'})
+        counts = ranking_positions.reload()
+        return jsonify({'success': True, 'message': 'Ranking positions reloaded', **counts})
+    except ValueError as e:
+        return jsonify({'error': 'Invalid ranking positions CSV', 'details': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error reloading ranking positions: {e}")
         return jsonify({'error': 'Failed to reload ranking positions', 'details': str(e)}), 500
@@ -1336,22 +1223,32 @@ def upload_ranking_positions():
         return jsonify({'error': 'File must be a CSV'}), 400
     
     try:
-        # Save to data directory
-        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(app_dir, 'data')
-        os.makedirs(data_dir, exist_ok=True)
-        
-        file_path = os.path.join(data_dir, 'ranking_positions.csv')
-        file.save(file_path)
-        
-        # Reload the data
+        text = file.read().decode('utf-8')
+    except UnicodeDecodeError:
+        return jsonify({'error': 'Invalid ranking positions CSV', 'details': 'File must be UTF-8 encoded'}), 400
+    
+    rows, errors = parse_positions_csv(text)
+    if errors:
+        return jsonify({'error': 'Invalid ranking positions CSV', 'details': errors}), 400
+    
+    try:
+        # Apply only the rows that changed; every worker picks up the new generation
+        counts = apply_positions(rows)
         ranking_positions = get_ranking_positions()
-        ranking_positions.reload()
+        
+        # Keep the data directory copy in step (seed file for new databases).
+        # Best effort: the positions are already live, a read-only data directory must not fail the upload
+        try:
+            with open(ranking_positions.csv_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(positions_to_csv(ranking_positions.get_all_positions()))
+        except OSError as e:
+            current_app.logger.warning(f"Could not update seed file {ranking_positions.csv_path}: {e}")
         
         return jsonify({
             'success': True, 
             'message': 'Ranking positions CSV uploaded and loaded successfully',
-            'count': len(ranking_positions.positions)
+            'count': len(ranking_positions.positions),
+            **counts
         })
     except Exception as e:
         current_app.logger.error(f"Error uploading ranking positions: {e}")
@@ -1366,9 +1263,12 @@ def download_ranking_positions():
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(app_dir, 'data')
-        return send_from_directory(data_dir, 'ranking_positions.csv', as_attachment=True)
+        ranking_positions = get_ranking_positions()
+        return Response(
+            positions_to_csv(ranking_positions.get_all_positions()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=ranking_positions.csv'}
+        )
     except Exception as e:
         current_app.logger.error(f"Error downloading ranking positions: {e}")
         return jsonify({'error': 'Failed to download ranking positions', 'details': str(e)}), 500
@@ -1440,79 +1340,46 @@ def unlink_athlete_email():
 @login_required
 def sync_athlete_emails():
     """
-    Sync emails for authorized athletes.
+    Start syncing emails for authorized athletes (runs in the background).
     If user is admin: syncs ALL athletes from ALL users.
     If user is normal: syncs only their authorized athletes.
+    
+    Returns 202 with the job; poll /api/athlete/email/sync/<job_id> for
+    progress and the final report. A sync already running is returned
+    instead of starting another.
     """
-    client = OrionAPIClient()
-    synced_count = 0
-    errors = []
+    from app.mailer_sync import start_sync_job
     
-    # Check if user is admin
     if current_user.is_admin:
-        # Get ALL authorized athletes grouped by user
-        # We need to link each athlete to their respective user's email
-        from app.models import User
-        
-        # Get all users who have authorized athletes
-        users_with_athletes = db.session.query(User).join(
-            AuthorizedAthlete, User.id == AuthorizedAthlete.user_id
-        ).distinct().all()
-        
-        total_athletes = 0
-        for user in users_with_athletes:
-            if not user.email:
-                current_app.logger.warning(f"User {user.id} has no email, skipping their athletes")
-                continue
-            
-            authorized = AuthorizedAthlete.query.filter_by(user_id=user.id).all()
-            total_athletes += len(authorized)
-            
-            for athlete in authorized:
-                try:
-                    client._make_request('POST', '/api/mailer/link', data={
-                        'tessera': int(athlete.tessera_atleta),
-                        'email': user.email
-                    })
-                    synced_count += 1
-                except Exception as e:
-                    errors.append(f"Athlete {athlete.tessera_atleta} (User {user.email}): {str(e)}")
-                    current_app.logger.error(f"Error syncing athlete {athlete.tessera_atleta} for user {user.email}: {e}")
-        
-        response = {
-            'message': f'Admin sync: {synced_count} out of {total_athletes} athletes from {len(users_with_athletes)} users',
-            'synced': synced_count,
-            'total': total_athletes,
-            'users_synced': len(users_with_athletes)
-        }
+        scope = 'all'
     else:
         # Normal user - sync only their athletes
         if not current_user.email:
             return jsonify({'error': 'User has no email address'}), 400
         
-        authorized = AuthorizedAthlete.query.filter_by(user_id=current_user.id).all()
-        
-        if not authorized:
+        if not AuthorizedAthlete.query.filter_by(user_id=current_user.id).first():
             return jsonify({'message': 'No authorized athletes to sync', 'synced': 0}), 200
-        
-        for athlete in authorized:
-            try:
-                client._make_request('POST', '/api/mailer/link', data={
-                    'tessera': int(athlete.tessera_atleta),
-                    'email': current_user.email
-                })
-                synced_count += 1
-            except Exception as e:
-                errors.append(f"Athlete {athlete.tessera_atleta}: {str(e)}")
-                current_app.logger.error(f"Error syncing athlete {athlete.tessera_atleta}: {e}")
-        
-        response = {
-            'message': f'Synced {synced_count} out of {len(authorized)} athletes',
-            'synced': synced_count,
-            'total': len(authorized)
-        }
+        scope = 'user'
     
-    if errors:
-        response['errors'] = errors
+    job, created = start_sync_job(current_app._get_current_object(), current_user.id, scope)
+    if not created:
+        current_app.logger.info(f"Mailer sync {job.id} already running, not starting another")
+    
+    response = job.to_dict()
+    response['status_url'] = f'/archery/api/athlete/email/sync/{job.id}'
+    return jsonify(response), 202
+
+
+@bp.route('/api/athlete/email/sync/<job_id>')
+@login_required
+def get_athlete_email_sync(job_id):
+    """Progress and report of a mailer sync job"""
+    from app.models import MailerSyncJob
+    from app.mailer_sync import expire_abandoned_jobs
+    
+    expire_abandoned_jobs()
+    job = db.session.get(MailerSyncJob, job_id)
+    if job is None or (job.user_id != current_user.id and not current_user.is_admin):
+        return jsonify({'error': 'Sync job not found'}), 404
     
-    return jsonify(response)
+    return jsonify(job.to_dict())
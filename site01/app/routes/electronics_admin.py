@@ -2,7 +2,7 @@
 Electronics Admin Management Routes
 Admin-only portal for electronics inventory, boards, BOMs, production jobs, and file management
 """
-from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, flash, make_response
 from flask_login import login_required, current_user
 import requests
 import csv
@@ -10,6 +10,20 @@ import io
 import re
 from functools import wraps
 from app.api import OrionAPIClient
+from app.api.transport import get_session, get_timeout
+from app.api.resilience import guarded_request
+from app.json_provider import loads as json_loads
+from app.component_catalog import (
+    ensure_fresh, get_component as get_catalog_component, get_components_by_id, list_components,
+    mark_dirty, packages as catalog_packages, product_types as catalog_product_types,
+    record_created, record_deleted, record_updated
+)
+from app.order_matching import OrderMatcher
+from app.storage_proxy import StorageFetchError, get_storage_cache, proxy_file
+from app.board_files import filter_files, get_index as get_board_file_index, invalidate_index
+from app.stock_mutations import (
+    StockMutationConflict, apply_planned, idempotency_key, reserve_stock, start_order_import
+)
 
 # Try to import openpyxl, provide helpful error if missing
 try:
@@ -74,18 +88,23 @@ def api_request(endpoint, method='GET', data=None, params=None):
     else:
         current_app.logger.warning(f"[Electronics API] No CF Access credentials configured")
     
+    if method not in ('GET', 'POST', 'PATCH', 'DELETE'):
+        current_app.logger.error(f"[Electronics API] Invalid method: {method}")
+        return None
+    
     try:
-        if method == 'GET':
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-        elif method == 'POST':
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-        elif method == 'PATCH':
-            response = requests.patch(url, headers=headers, json=data, timeout=10)
-        elif method == 'DELETE':
-            response = requests.delete(url, headers=headers, timeout=10)
-        else:
-            current_app.logger.error(f"[Electronics API] Invalid method: {method}")
-            return None
+        session = get_session(current_app.config)
+        response = guarded_request(
+            session,
+            method,
+            url,
+            endpoint,
+            current_app.config,
+            headers=headers,
+            params=params if method == 'GET' else None,
+            json=data if method in ('POST', 'PATCH') else None,
+            timeout=get_timeout(endpoint, current_app.config)
+        )
         
         current_app.logger.info(f"[Electronics API] Response status: {response.status_code}")
         
@@ -93,17 +112,21 @@ def api_request(endpoint, method='GET', data=None, params=None):
             current_app.logger.error(f"[Electronics API] Error response: {response.text}")
             # Forward error details (especially 422 validation errors) instead of swallowing them
             try:
-                error_body = response.json()
+                error_body = json_loads(response.content)
             except Exception:
                 error_body = {'detail': response.text}
             return {'_error': True, '_status': response.status_code, '_body': error_body}
         
-        result = response.json()
-        current_app.logger.info(f"[Electronics API] Success: {len(str(result))} bytes")
+        result = json_loads(response.content)
+        current_app.logger.info(f"[Electronics API] Success: {len(response.content)} bytes")
         return result
     except requests.exceptions.RequestException as e:
         current_app.logger.error(f"[Electronics API] Request failed: {str(e)}")
         return None
+    except ValueError as e:
+        # Empty (204) or non-JSON (e.g. Cloudflare Access HTML) body
+        current_app.logger.error(f"[Electronics API] Invalid JSON response: {str(e)}")
+        return None
 
 def api_result(result, error_msg='API request failed'):
     """Handle api_request result: return proper JSON response with correct status code.
@@ -119,6 +142,65 @@ def api_result(result, error_msg='API request failed'):
         return jsonify(result['_body']), result['_status']
     return jsonify(result)
 
+def api_succeeded(result):
+    """Whether an api_request call was accepted by the API"""
+    return result is not None and not (isinstance(result, dict) and result.get('_error'))
+
+def write_through(result, apply):
+    """Mirror an API write in the local component replica
+    
+    Accepted writes are applied. If the outcome is unknown (api_request
+    returned None: timeout, or an empty/non-JSON body such as a 204), the
+    replica is flagged for re-sync instead.
+    """
+    if result is None:
+        mark_dirty()
+    elif api_succeeded(result):
+        apply()
+
+def sync_component_catalog(wait=False):
+    """Bring the local component replica up to date enough to read from (see app.component_catalog)"""
+    ensure_fresh(current_app._get_current_object(), OrionAPIClient(),
+                 current_app.config.get('COMPONENT_CATALOG_MAX_AGE', 300), wait=wait)
+
+def reserve_stock_once(job_id):
+    """Reserve stock for a job at most once per Idempotency-Key header (see app.stock_mutations)"""
+    try:
+        key = idempotency_key(request.headers.get('Idempotency-Key'))
+        result, replayed = reserve_stock(
+            key, job_id, lambda: api_request(f'/api/elec/jobs/{job_id}/reserve_stock', method='POST')
+        )
+    except StockMutationConflict as e:
+        return jsonify({'error': str(e)}), e.status_code
+    
+    if not replayed:
+        write_through(result, mark_dirty)
+    response = make_response(api_result(result, 'Failed to reserve stock'))
+    response.headers['Idempotency-Key'] = key
+    return response
+
+def invalidate_board_files(result):
+    """Drop the cached all-boards file index after a board/file write that succeeded or may have"""
+    if result is None or api_succeeded(result):
+        invalidate_index(OrionAPIClient())
+
+def local_component_page(params):
+    """Serve an unfiltered components page from the replica
+    
+    Returns:
+        List of components, or None if the request needs the API (search/filters)
+    """
+    if set(params) - {'limit', 'offset'}:
+        return None
+    try:
+        limit = int(params.get('limit') or 100)
+        offset = int(params.get('offset') or 0)
+        sync_component_catalog()
+        return list_components(limit, offset)
+    except Exception as e:
+        current_app.logger.warning(f"[Component Catalog] Serving from API: {e}")
+        return None
+
 @bp.route('/')
 @admin_required
 def index():
@@ -146,6 +228,10 @@ def get_components():
     # Remove empty params
     params = {k: v for k, v in params.items() if v}
     
+    components = local_component_page(params)
+    if components is not None:
+        return jsonify(components)
+    
     current_app.logger.info(f"[Electronics] Calling API with params: {params}")
     result = api_request('/api/elec/components', params=params)
     return api_result(result, 'Failed to fetch components')
@@ -164,6 +250,7 @@ def create_component():
     """Create new component"""
     data = request.get_json()
     result = api_request('/api/elec/components', method='POST', data=data)
+    write_through(result, lambda: record_created(data, result))
     return api_result(result, 'Failed to create component')
 
 @bp.route('/api/components/<component_id>', methods=['PATCH'])
@@ -172,6 +259,7 @@ def update_component(component_id):
     """Update component (e.g., quantity, price)"""
     data = request.get_json()
     result = api_request(f'/api/elec/components/{component_id}', method='PATCH', data=data)
+    write_through(result, lambda: record_updated(component_id, data, result))
     return api_result(result, 'Failed to update component')
 
 @bp.route('/api/components/<component_id>', methods=['DELETE'])
@@ -179,6 +267,7 @@ def update_component(component_id):
 def delete_component(component_id):
     """Delete component"""
     result = api_request(f'/api/elec/components/{component_id}', method='DELETE')
+    write_through(result, lambda: record_deleted(component_id))
     return api_result(result, 'Failed to delete component')
 
 # ============================================================================
@@ -198,6 +287,7 @@ def create_board():
     """Create new board"""
     data = request.get_json()
     result = api_request('/api/elec/boards', method='POST', data=data)
+    invalidate_board_files(result)
     return api_result(result, 'Failed to create board')
 
 @bp.route('/api/boards/<board_id>', methods=['PATCH'])
@@ -206,6 +296,7 @@ def update_board(board_id):
     """Update board info"""
     data = request.get_json()
     result = api_request(f'/api/elec/boards/{board_id}', method='PATCH', data=data)
+    invalidate_board_files(result)  # Files carry the board name/version
     return api_result(result, 'Failed to update board')
 
 @bp.route('/api/boards/<board_id>', methods=['DELETE'])
@@ -213,6 +304,7 @@ def update_board(board_id):
 def delete_board(board_id):
     """Delete board"""
     result = api_request(f'/api/elec/boards/{board_id}', method='DELETE')
+    invalidate_board_files(result)
     return api_result(result, 'Failed to delete board')
 
 @bp.route('/api/boards/<board_id>/bom', methods=['GET'])
@@ -279,6 +371,7 @@ def update_job(job_id):
     """Update job status/quantity/due_date"""
     data = request.get_json()
     result = api_request(f'/api/elec/jobs/{job_id}', method='PATCH', data=data)
+    write_through(result, mark_dirty)  # Job status changes may consume stock
     return api_result(result, 'Failed to update job')
 
 @bp.route('/api/jobs/<job_id>/check_stock', methods=['GET'])
@@ -292,8 +385,7 @@ def check_job_stock(job_id):
 @admin_required
 def reserve_job_stock(job_id):
     """Reserve components for job (atomic operation)"""
-    result = api_request(f'/api/elec/jobs/{job_id}/reserve_stock', method='POST')
-    return api_result(result, 'Failed to reserve stock')
+    return reserve_stock_once(job_id)
 
 @bp.route('/api/jobs/<job_id>/missing_bom', methods=['GET'])
 @admin_required
@@ -319,6 +411,7 @@ def register_board_file(board_id):
     """Register file metadata (file must already exist on nginx storage)"""
     data = request.get_json()
     result = api_request(f'/api/elec/boards/{board_id}/files', method='POST', data=data)
+    invalidate_board_files(result)
     return api_result(result, 'Failed to register file')
 
 @bp.route('/api/boards/<board_id>/files/<file_id>', methods=['DELETE'])
@@ -326,6 +419,7 @@ def register_board_file(board_id):
 def delete_board_file(board_id, file_id):
     """Delete file metadata"""
     result = api_request(f'/api/elec/boards/{board_id}/files/{file_id}', method='DELETE')
+    invalidate_board_files(result)
     return api_result(result, 'Failed to delete file')
 
 @bp.route('/api/files/types', methods=['GET'])
@@ -367,7 +461,8 @@ def export_bom():
         headers['CF-Access-Client-Secret'] = cf_secret
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        session = get_session(current_app.config)
+        response = session.get(url, headers=headers, params=params, timeout=get_timeout('/api/elec/bom/export', current_app.config))
         response.raise_for_status()
         
         from flask import Response
@@ -390,8 +485,12 @@ def export_bom():
 @api_bp.route('/components', methods=['GET'])
 @login_required
 def api_proxy_get_components():
-    """Proxy: Get components list"""
-    result = api_request('/api/elec/components', params=request.args.to_dict())
+    """Proxy: Get components list (unfiltered pages come from the local replica)"""
+    params = request.args.to_dict()
+    components = local_component_page(params)
+    if components is not None:
+        return jsonify(components)
+    result = api_request('/api/elec/components', params=params)
     return api_result(result, 'Failed to fetch components')
 
 @api_bp.route('/components/search', methods=['GET'])
@@ -410,22 +509,10 @@ def api_proxy_search_components():
 @api_bp.route('/components/types', methods=['GET'])
 @login_required
 def get_component_types():
-    """Get unique component types from database"""
+    """Get unique component types from the local catalogue"""
     try:
-        api_client = OrionAPIClient()
-        components = api_client.get_components(limit=10000)
-        
-        if not isinstance(components, list):
-            return jsonify([])
-        
-        # Extract unique types/categories
-        types = set()
-        for comp in components:
-            comp_type = comp.get('product_type') or comp.get('category')
-            if comp_type:
-                types.add(comp_type)
-        
-        return jsonify(sorted(list(types)))
+        sync_component_catalog()
+        return jsonify(catalog_product_types())
     except Exception as e:
         current_app.logger.error(f"[Component Types] Error: {e}")
         return jsonify([])
@@ -433,22 +520,10 @@ def get_component_types():
 @api_bp.route('/components/packages', methods=['GET'])
 @login_required
 def get_component_packages():
-    """Get unique component packages/footprints from database"""
+    """Get unique component packages/footprints from the local catalogue"""
     try:
-        api_client = OrionAPIClient()
-        components = api_client.get_components(limit=10000)
-        
-        if not isinstance(components, list):
-            return jsonify([])
-        
-        # Extract unique packages
-        packages = set()
-        for comp in components:
-            pkg = comp.get('package')
-            if pkg:
-                packages.add(pkg)
-        
-        return jsonify(sorted(list(packages)))
+        sync_component_catalog()
+        return jsonify(catalog_packages())
     except Exception as e:
         current_app.logger.error(f"[Component Packages] Error: {e}")
         return jsonify([])
@@ -457,27 +532,32 @@ def get_component_packages():
 @login_required
 def api_proxy_create_component():
     """Proxy: Create component"""
-    result = api_request('/api/elec/components', method='POST', data=request.get_json())
+    data = request.get_json()
+    result = api_request('/api/elec/components', method='POST', data=data)
+    write_through(result, lambda: record_created(data, result))
     return api_result(result, 'Failed to create component')
 
 @api_bp.route('/components/<component_id>', methods=['GET'])
 @login_required
 def api_proxy_get_component(component_id):
-    """Proxy: Get single component by ID - fetches from full list"""
+    """Proxy: Get single component by ID from the local catalogue"""
     # The Orion API doesn't have a GET endpoint for single components
-    # So we fetch all and filter
-    result = api_request('/api/elec/components', params={'limit': 10000})
-    if result and isinstance(result, list):
-        component = next((c for c in result if c.get('id') == int(component_id)), None)
-        if component:
-            return jsonify(component)
+    try:
+        sync_component_catalog()
+        component = get_catalog_component(component_id)
+    except ValueError:
+        component = None
+    if component:
+        return jsonify(component)
     return (jsonify({'error': 'Component not found'}), 404)
 
 @api_bp.route('/components/<component_id>', methods=['PATCH'])
 @login_required
 def api_proxy_update_component(component_id):
     """Proxy: Update component"""
-    result = api_request(f'/api/elec/components/{component_id}', method='PATCH', data=request.get_json())
+    data = request.get_json()
+    result = api_request(f'/api/elec/components/{component_id}', method='PATCH', data=data)
+    write_through(result, lambda: record_updated(component_id, data, result))
     return api_result(result, 'Failed to update component')
 
 @api_bp.route('/components/<component_id>', methods=['DELETE'])
@@ -485,6 +565,7 @@ def api_proxy_update_component(component_id):
 def api_proxy_delete_component(component_id):
     """Proxy: Delete component"""
     result = api_request(f'/api/elec/components/{component_id}', method='DELETE')
+    write_through(result, lambda: record_deleted(component_id))
     return api_result(result, 'Failed to delete component')
 
 @api_bp.route('/boards', methods=['GET'])
@@ -499,6 +580,7 @@ def api_proxy_get_boards():
 def api_proxy_create_board():
     """Proxy: Create board"""
     result = api_request('/api/elec/boards', method='POST', data=request.get_json())
+    invalidate_board_files(result)
     return api_result(result, 'Failed to create board')
 
 @api_bp.route('/boards/<board_id>', methods=['GET'])
@@ -570,6 +652,7 @@ def api_proxy_check_job_stock(job_id):
 def api_proxy_update_job(job_id):
     """Proxy: Update job status/quantity/due_date"""
     result = api_request(f'/api/elec/jobs/{job_id}', method='PATCH', data=request.get_json())
+    write_through(result, mark_dirty)  # Job status changes may consume stock
     return api_result(result, 'Failed to update job')
 
 @api_bp.route('/pnp', methods=['GET'])
@@ -613,8 +696,7 @@ def api_proxy_delete_pnp(pnp_id):
 @login_required
 def api_proxy_reserve_stock(job_id):
     """Proxy: Reserve stock for job"""
-    result = api_request(f'/api/elec/jobs/{job_id}/reserve_stock', method='POST')
-    return api_result(result, 'Failed to reserve stock')
+    return reserve_stock_once(job_id)
 
 @api_bp.route('/jobs/<job_id>/missing_bom', methods=['GET'])
 @login_required
@@ -626,37 +708,28 @@ def api_proxy_missing_bom(job_id):
 @api_bp.route('/files', methods=['GET'])
 @login_required
 def api_proxy_get_files():
-    """Proxy: Get files list - aggregates files from all boards"""
+    """Proxy: Get files list - all boards come from the cached file index (see app.board_files)
+    
+    Query params: board_id, category (file type), q (filename search), limit, offset
+    """
     try:
-        # Get board_id filter if provided
         board_id = request.args.get('board_id')
         
         if board_id:
             # Get files for specific board
-            result = api_request(f'/api/elec/boards/{board_id}/files')
+            files = api_request(f'/api/elec/boards/{board_id}/files')
             # API might return None for empty or missing endpoint
-            if result is None:
-                return jsonify([])
+            if not isinstance(files, list):
+                files = []
         else:
-            # Get all boards and aggregate their files
-            boards = api_request('/api/elec/boards')
-            if not boards:
-                return jsonify([])
-            
-            all_files = []
-            for board in boards:
-                board_files = api_request(f'/api/elec/boards/{board["id"]}/files')
-                # Handle empty or None responses
-                if board_files:
-                    # Add board info to each file
-                    for file in board_files:
-                        file['board_name'] = board.get('name', 'Unknown')
-                        file['board_version'] = board.get('version', '')
-                    all_files.extend(board_files)
-            
-            result = all_files
+            files = get_board_file_index(OrionAPIClient())
         
-        return jsonify(result if result is not None else [])
+        files = filter_files(files, category=request.args.get('category'), q=request.args.get('q'))
+        
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = request.args.get('limit', type=int)
+        files = files[offset:offset + limit] if limit else files[offset:]
+        return jsonify(files)
     except Exception as e:
         current_app.logger.error(f"[Files Proxy] Exception: {e}", exc_info=True)
         return jsonify([])
@@ -676,6 +749,7 @@ def api_proxy_register_file():
     data_copy.pop('board_id', None)
     
     result = api_request(f'/api/elec/boards/{board_id}/files', method='POST', data=data_copy)
+    invalidate_board_files(result)
     return api_result(result, 'Failed to register file')
 
 @api_bp.route('/files/<file_id>', methods=['DELETE'])
@@ -688,6 +762,7 @@ def api_proxy_delete_file(file_id):
         return jsonify({'error': 'board_id query parameter is required'}), 400
     
     result = api_request(f'/api/elec/boards/{board_id}/files/{file_id}', method='DELETE')
+    invalidate_board_files(result)
     return api_result(result, 'Failed to delete file')
 
 # ==================== ORDER IMPORTER ====================
@@ -748,36 +823,11 @@ def parse_order_file():
         matched = []
         unmatched = []
         
-        api_client = OrionAPIClient()
-        components_result = api_client.get_components(limit=10000)
-        all_components = components_result if isinstance(components_result, list) else []
+        sync_component_catalog()
+        matcher = OrderMatcher.from_catalog()
         
         for item in items:
-            # Try to match by seller_code or manufacturer_code
-            matched_comp = None
-            
-            # Match by seller code first (safely)
-            seller_code = item.get('seller_code', '').strip() if item.get('seller_code') else ''
-            if seller_code:
-                matched_comp = next((c for c in all_components 
-                                   if str(c.get('seller_code', '')).strip().lower() == seller_code.lower()), None)
-                
-                # Also try 'supplier_code' field
-                if not matched_comp:
-                    matched_comp = next((c for c in all_components 
-                                       if str(c.get('supplier_code', '')).strip().lower() == seller_code.lower()), None)
-            
-            # If not found, try manufacturer code (safely)
-            if not matched_comp:
-                mfg_code = item.get('manufacturer_code', '').strip() if item.get('manufacturer_code') else ''
-                if mfg_code:
-                    matched_comp = next((c for c in all_components 
-                                       if str(c.get('manufacturer_code', '')).strip().lower() == mfg_code.lower()), None)
-                    
-                    # Also try 'mpn' field
-                    if not matched_comp:
-                        matched_comp = next((c for c in all_components 
-                                           if str(c.get('mpn', '')).strip().lower() == mfg_code.lower()), None)
+            matched_comp = matcher.match(item)
             
             if matched_comp:
                 matched.append({
@@ -799,7 +849,8 @@ def parse_order_file():
                     'description': item.get('description', ''),
                     'quantity': item['quantity'],
                     'unit_price': item['unit_price'],
-                    'total_price': item['quantity'] * item['unit_price']
+                    'total_price': item['quantity'] * item['unit_price'],
+                    'candidates': matcher.candidates(item)
                 })
         
         return jsonify({
@@ -816,7 +867,11 @@ def parse_order_file():
 @api_bp.route('/orders/import', methods=['POST'])
 @login_required
 def import_order():
-    """Import order and update component stock quantities"""
+    """Import order and update component stock quantities
+    
+    Retrying with the same Idempotency-Key header (or idempotency_key field)
+    only re-sends the stock updates the API has not accepted yet.
+    """
     data = request.get_json()
     
     if not data or 'matched' not in data:
@@ -824,51 +879,25 @@ def import_order():
     
     try:
         api_client = OrionAPIClient()
+        key = idempotency_key(request.headers.get('Idempotency-Key') or data.get('idempotency_key'))
         
-        # Get all components first to check current stock
-        all_components_result = api_client.get_components(limit=10000)
-        all_components = all_components_result if isinstance(all_components_result, list) else []
-        components_by_id = {c['id']: c for c in all_components}
-        
-        updated_count = 0
+        def load_components(component_ids):
+            # New stock is written back as an absolute value: re-sync first so it starts from current quantities
+            ensure_fresh(current_app._get_current_object(), api_client, force=True)
+            return get_components_by_id(component_ids)
         
-        # Update stock for each matched component
-        for item in data['matched']:
-            component_id = item['component_id']
-            quantity_to_add = item['quantity']
-            unit_price = item['unit_price']
-            
-            # Get current component data
-            current_comp = components_by_id.get(component_id)
-            if not current_comp:
-                current_app.logger.warning(f"[Order Import] Component {component_id} not found, skipping")
-                continue
-            
-            # Calculate new stock (add to existing) - handle NULL/None values safely
-            current_stock = current_comp.get('qty_left') or current_comp.get('stock_qty') or 0
-            # Ensure current_stock is an integer (could be None, null, or string)
-            try:
-                current_stock = int(current_stock) if current_stock is not None else 0
-            except (ValueError, TypeError):
-                current_stock = 0
-            
-            new_stock = current_stock + quantity_to_add
-            
-            current_app.logger.info(f"[Order Import] Updating component {component_id}: {current_stock} + {quantity_to_add} = {new_stock}")
-            
-            # Update component stock and price
-            update_data = {
-                'qty_left': new_stock,
-                'stock_qty': new_stock,  # Update both fields for compatibility
-                'price': float(unit_price),
-                'unit_price': float(unit_price)  # Update both fields for compatibility
-            }
-            
-            api_client.update_component(component_id, **update_data)
-            updated_count += 1
+        mutation, result = start_order_import(key, data['matched'], load_components)
+        if result is None:
+            result = apply_planned(mutation, api_client,
+                                   current_app.config.get('STOCK_UPDATE_CONCURRENCY', 8),
+                                   on_applied=record_updated)
         
-        return jsonify({'success': True, 'updated': updated_count})
+        response = jsonify(result)
+        response.headers['Idempotency-Key'] = key
+        return response
         
+    except StockMutationConflict as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         current_app.logger.error(f"[Order Import] Error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1117,7 +1146,8 @@ def list_storage_directory():
         url = f"{storage_url}/{folder_path}/"
         current_app.logger.info(f"[Storage List] Fetching: {url}")
         
-        response = requests.get(url, timeout=10)
+        session = get_session(current_app.config)
+        response = session.get(url, timeout=(current_app.config.get('API_CONNECT_TIMEOUT', 5), 10))
         
         if response.status_code != 200:
             current_app.logger.error(f"[Storage List] HTTP {response.status_code} from {url}")
@@ -1167,6 +1197,8 @@ def fetch_storage_file():
     """
     Proxy endpoint to fetch file contents from storage
     Bypasses CORS issues when loading BOM/PnP files
+
+    Supports Range and conditional (If-None-Match/If-Modified-Since) requests
     """
     file_path = request.args.get('path', '')
     
@@ -1180,19 +1212,23 @@ def fetch_storage_file():
     file_path = file_path.strip('/')
     
     try:
-        # Fetch file content
         url = f"{storage_url}/{file_path}"
         current_app.logger.info(f"[Storage Fetch] Fetching: {url}")
-        
-        response = requests.get(url, timeout=30)
-        
-        if response.status_code != 200:
-            current_app.logger.error(f"[Storage Fetch] HTTP {response.status_code} from {url}")
-            return jsonify({'error': f'Storage returned {response.status_code}'}), response.status_code
-        
-        # Return file content as text (for CSV/text files)
-        return response.text, 200, {'Content-Type': 'text/plain; charset=utf-8'}
-        
+
+        # Bytes are streamed through (Range/ETag aware) and kept in the storage cache
+        return proxy_file(
+            request,
+            get_session(current_app.config),
+            url,
+            file_path,
+            get_storage_cache(current_app.config),
+            current_app.config.get('STORAGE_CACHE_FRESH_SECONDS', 300),
+            (current_app.config.get('API_CONNECT_TIMEOUT', 5), 30)
+        )
+
+    except StorageFetchError as e:
+        current_app.logger.error(f"[Storage Fetch] HTTP {e.status_code} from {url}")
+        return jsonify({'error': f'Storage returned {e.status_code}'}), e.status_code
     except requests.RequestException as e:
         current_app.logger.error(f"[Storage Fetch] Request failed: {e}")
         return jsonify({'error': f'Failed to fetch file: {str(e)}'}), 500
@@ -1205,7 +1241,7 @@ def _get_usd_eur_rate():
     """Fetch current USD→EUR exchange rate with fallback."""
     FALLBACK_RATE = 0.92  # reasonable fallback
     try:
-        r = requests.get(
+        r = get_session(current_app.config).get(
             'https://open.er-api.com/v6/latest/USD',
             timeout=5
         )
@@ -1242,7 +1278,7 @@ def fetch_lcsc_price():
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
         }
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = get_session(current_app.config).get(url, headers=headers, timeout=15)
         
         if resp.status_code != 200:
             current_app.logger.error(f'[LCSC Price] HTTP {resp.status_code}')
@@ -322,12 +322,26 @@ async function analyzeResults() {
         statsSection.classList.remove('hidden');
         showLoading(statsGrid, t('messages.loading_statistics'));
         
-        // Fetch results for all selected athletes
-        const resultsPromises = selectedAthletes.map(athlete => 
-            fetchAthleteResults(athlete.id, competitionType, category, startDate, endDate, includeAverage)
-        );
+        if (selectedAthletes.length === 1) {
+            // Single athlete: results, career and filtered statistics come from one request
+            const athlete = selectedAthletes[0];
+            const analytics = await fetchAthleteAnalytics(athlete.id, competitionType, category, startDate, endDate, includeAverage);
+            
+            chartContainer.innerHTML = '<canvas id="results-chart"></canvas>';
+            initializeChart();
+            updateChart([{
+                athleteId: athlete.id,
+                athleteName: athlete.name,
+                results: analytics.results || [],
+                includeAverage
+            }], includeAverage);
+            
+            renderStatistics(analytics, competitionType, category, startDate, endDate);
+            return;
+        }
         
-        const allResults = await Promise.all(resultsPromises);
+        // Multiple athletes: one server-side comparison (aligned chart + summaries)
+        const comparison = await fetchComparison(selectedAthletes, competitionType, category, startDate, endDate, includeAverage);
         
         // Restore canvas
         chartContainer.innerHTML = '<canvas id="results-chart"></canvas>';
@@ -335,17 +349,16 @@ async function analyzeResults() {
         // Reinitialize chart after canvas recreation
         initializeChart();
         
-        // Update chart with data
-        updateChart(allResults, includeAverage);
+        // Update chart with the pre-aligned datasets
+        updateChartFromDatasets(comparison.chart, includeAverage);
         
-        // Load statistics - different behavior for single vs multiple athletes
-        if (selectedAthletes.length === 1) {
-            // Single athlete: show detailed statistics with career and filtered
-            await loadStatistics(selectedAthletes[0].id, competitionType, category, startDate, endDate);
-        } else {
-            // Multiple athletes: show comparison statistics
-            await loadComparisonStatistics(selectedAthletes, competitionType, category, startDate, endDate);
-        }
+        const hasFilters = competitionType || category || startDate || endDate;
+        const allStats = comparison.athletes.map(entry => ({
+            career: entry.career || {},
+            filtered: entry.filtered || null,
+            athleteName: (selectedAthletes.find(a => String(a.id) === String(entry.athlete_id)) || {}).name || entry.athlete_id
+        }));
+        renderComparisonStatistics(allStats, hasFilters);
     } catch (error) {
         console.error('Error analyzing results:', error);
         showError(chartContainer, `${t('errors.loading_results')}. ${t('common.please_try_again')}`);
@@ -353,61 +366,45 @@ async function analyzeResults() {
     }
 }
 
-async function fetchAthleteResults(athleteId, competitionType, category, startDate, endDate, includeAverage) {
-    // Call the Flask backend results endpoint. The backend will call the external API and return
-    // a normalized array of result objects.
-    let url = `/archery/api/athlete/${athleteId}/results?`;
+async function fetchAthleteAnalytics(athleteId, competitionType, category, startDate, endDate, includeAverage) {
+    // Single request for results, career/filtered statistics and chart data
+    let url = `/archery/api/athlete/${athleteId}/analytics?`;
     if (competitionType) url += `competition_type=${encodeURIComponent(competitionType)}&`;
     if (category) url += `category=${encodeURIComponent(category)}&`;
     if (startDate) url += `start_date=${startDate}&`;
     if (endDate) url += `end_date=${endDate}&`;
     if (includeAverage) url += `include_average=true&`;
-
-    // Trim trailing separators
     url = url.replace(/[&?]+$/g, '');
 
     const response = await fetch(url);
+    const data = await response.json();
 
-    if (!response.ok) {
-        // Try to extract JSON error or plain text for better debugging
-        let details = '';
-        try {
-            details = JSON.stringify(await response.json());
-        } catch (e) {
-            try { details = await response.text(); } catch (e2) { details = '<unreadable response>'; }
-        }
-        console.error('Error fetching athlete results', response.status, details);
-        throw new Error(`HTTP error ${response.status}: ${details}`);
+    if (!response.ok || (data && data.error)) {
+        const details = data && data.details ? `: ${data.details}` : '';
+        throw new Error(`Server error: ${(data && data.error) || response.status}${details}`);
     }
 
-    // Ensure we parse JSON safely
-    let data;
-    try {
-        data = await response.json();
-    } catch (err) {
-        console.error('Invalid JSON from results endpoint', err);
-        const txt = await response.text().catch(() => '<no body>');
-        console.error('Raw response:', txt.substring(0, 400));
-        throw new Error('Invalid JSON in response from server');
-    }
+    return data;
+}
 
-    // The backend returns either an array of results or an object with 'error'
-    if (data && data.error) {
-        const details = data.details ? `: ${data.details}` : '';
-        throw new Error(`Server error: ${data.error}${details}`);
-    }
+async function fetchComparison(athletes, competitionType, category, startDate, endDate, includeAverage) {
+    let url = `/archery/api/compare?athletes=${athletes.map(a => encodeURIComponent(a.id)).join(',')}&`;
+    if (competitionType) url += `competition_type=${encodeURIComponent(competitionType)}&`;
+    if (category) url += `category=${encodeURIComponent(category)}&`;
+    if (startDate) url += `start_date=${startDate}&`;
+    if (endDate) url += `end_date=${endDate}&`;
+    if (includeAverage) url += `include_average=true&`;
+    url = url.replace(/[&?]+$/g, '');
 
-    if (!Array.isArray(data)) {
-        console.error('Unexpected payload for athlete results:', data);
-        throw new Error('Unexpected response format from server');
+    const response = await fetch(url);
+    const data = await response.json();
+
+    if (!response.ok || (data && data.error)) {
+        const details = data && data.details ? `: ${data.details}` : '';
+        throw new Error(`Server error: ${(data && data.error) || response.status}${details}`);
     }
 
-    return {
-        athleteId,
-        athleteName: (selectedAthletes.find(a => a.id === athleteId) || {}).name || 'Unknown',
-        results: data,
-        includeAverage
-    };
+    return data;
 }
 
 function initializeChart() {
@@ -543,10 +540,10 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-function updateChart(allResults, includeAverage = false) {
+function getChartColors() {
     // Subtle colors that work well in dark mode
     const isDarkMode = document.documentElement.classList.contains('dark');
-    const colors = isDarkMode ? [
+    return isDarkMode ? [
         'rgb(167, 139, 250)',  // light purple
         'rgb(251, 146, 60)',   // orange
         'rgb(96, 165, 250)',   // light blue
@@ -559,6 +556,36 @@ function updateChart(allResults, includeAverage = false) {
         'rgb(16, 185, 129)',   // green
         'rgb(236, 72, 153)'    // pink
     ];
+}
+
+function formatChartDate(normalizedDate) {
+    if (!normalizedDate) return 'Invalid Date';
+    const date = new Date(normalizedDate);
+    return date.toLocaleDateString('it-IT', { day: '2-digit', month: '2-digit', year: 'numeric' });
+}
+
+function updateChartFromDatasets(chart, includeAverage = false) {
+    // Datasets come from /archery/api/compare already aligned on chart.labels
+    const colors = getChartColors();
+    
+    resultsChart.data.labels = chart.labels.map(formatChartDate);
+    resultsChart.data.datasets = chart.datasets.map((dataset, index) => ({
+        label: (selectedAthletes.find(a => String(a.id) === String(dataset.athlete_id)) || {}).name || dataset.athlete_id,
+        data: dataset.data,
+        borderColor: colors[index % colors.length],
+        backgroundColor: colors[index % colors.length] + '20',
+        tension: 0.1,
+        borderWidth: 2,
+        spanGaps: true // Connect line across null values
+    }));
+    resultsChart.options.scales.y.title.text = includeAverage ? t('archery.average_per_arrow') : t('archery.score');
+    resultsChart.update();
+    
+    showResetZoomButton();
+}
+
+function updateChart(allResults, includeAverage = false) {
+    const colors = getChartColors();
     
     // Helper function to normalize date strings to YYYY-MM-DD format
     const normalizeDate = (dateStr) => {
@@ -607,13 +634,6 @@ function updateChart(allResults, includeAverage = false) {
         return null;
     };
     
-    // Format date for display
-    const formatDateForDisplay = (normalizedDate) => {
-        if (!normalizedDate) return 'Invalid Date';
-        const date = new Date(normalizedDate);
-        return date.toLocaleDateString('it-IT', { day: '2-digit', month: '2-digit', year: 'numeric' });
-    };
-    
     // Collect all unique dates from all athletes and sort them
     const allDates = new Set();
     allResults.forEach(athleteData => {
@@ -657,7 +677,7 @@ function updateChart(allResults, includeAverage = false) {
     });
     
     // Format dates for display
-    const labels = sortedDates.map(formatDateForDisplay);
+    const labels = sortedDates.map(formatChartDate);
     
     // Update Y-axis label based on what we're showing
     const yAxisLabel = includeAverage ? t('archery.average_per_arrow') : t('archery.score');
@@ -671,18 +691,8 @@ function updateChart(allResults, includeAverage = false) {
     showResetZoomButton();
 }
 
-async function loadStatistics(athleteId, competitionType, category, startDate, endDate) {
+function renderStatistics(data, competitionType, category, startDate, endDate) {
     try {
-        // Build URL with filters
-        let url = `/archery/api/athlete/${athleteId}/statistics?`;
-        if (competitionType) url += `competition_type=${encodeURIComponent(competitionType)}&`;
-        if (category) url += `category=${encodeURIComponent(category)}&`;
-        if (startDate) url += `start_date=${startDate}&`;
-        if (endDate) url += `end_date=${endDate}&`;
-        
-        const response = await fetch(url);
-        const data = await response.json();
-        
         const statsSection = document.getElementById('statistics-section');
         const statsGrid = document.getElementById('statistics-grid');
         
@@ -751,28 +761,15 @@ async function loadStatistics(athleteId, competitionType, category, startDate, e
         statsGrid.innerHTML = careerHtml + filteredHtml;
         statsSection.classList.remove('hidden');
     } catch (error) {
-        console.error('Error loading statistics:', error);
+        console.error('Error rendering statistics:', error);
     }
 }
 
-async function loadComparisonStatistics(athletes, competitionType, category, startDate, endDate) {
+function renderComparisonStatistics(allStats, hasFilters) {
     try {
-        // Build URL with filters for each athlete
-        const statsPromises = athletes.map(athlete => {
-            let url = `/archery/api/athlete/${athlete.id}/statistics?`;
-            if (competitionType) url += `competition_type=${encodeURIComponent(competitionType)}&`;
-            if (category) url += `category=${encodeURIComponent(category)}&`;
-            if (startDate) url += `start_date=${startDate}&`;
-            if (endDate) url += `end_date=${endDate}&`;
-            return fetch(url).then(r => r.json()).then(data => ({ ...data, athleteName: athlete.name }));
-        });
-        
-        const allStats = await Promise.all(statsPromises);
-        
         const statsSection = document.getElementById('statistics-section');
         const statsGrid = document.getElementById('statistics-grid');
         
-        const hasFilters = competitionType || category || startDate || endDate;
         
         // Create comparison table
         let html = `
@@ -848,7 +845,7 @@ async function loadComparisonStatistics(athletes, competitionType, category, sta
         statsGrid.innerHTML = html;
         statsSection.classList.remove('hidden');
     } catch (error) {
-        console.error('Error loading comparison statistics:', error);
+        console.error('Error rendering comparison statistics:', error);
     }
 }
 
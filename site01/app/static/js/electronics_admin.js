@@ -3229,23 +3229,33 @@ async function checkJobStock() {
     }
 }
 
+let pendingReservation = null;  // {jobId, key} of a reservation whose outcome is unknown
+
 async function reserveStock() {
     if (!confirm('Reserve stock for this job? This will deduct from available inventory.')) return;
     
+    if (!pendingReservation || pendingReservation.jobId !== currentJobId) {
+        pendingReservation = {jobId: currentJobId, key: newIdempotencyKey()};
+    }
+    
     try {
         const response = await fetch(`${ELECTRONICS_API_BASE}/jobs/${currentJobId}/reserve_stock`, {
-            method: 'POST'
+            method: 'POST',
+            headers: {'Idempotency-Key': pendingReservation.key}
         });
+        // The server answered: a new click is a new reservation
+        pendingReservation = null;
         
         if (response.ok) {
             showToast('Stock reserved successfully', 'success');
             checkJobStock();
         } else {
-            throw new Error('Failed to reserve stock');
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.error || errorData.detail || 'Failed to reserve stock');
         }
     } catch (error) {
         console.error('Error reserving stock:', error);
-        showToast('Failed to reserve stock', 'error');
+        showToast(error.message || 'Failed to reserve stock', 'error');
     }
 }
 
@@ -3317,14 +3327,18 @@ async function loadFiles() {
     try {
         const boardFilter = document.getElementById('files-board-filter')?.value || '';
         const categoryFilter = document.getElementById('files-type-filter')?.value || '';
+        const searchQuery = document.getElementById('files-search')?.value.trim() || '';
         
-        // Smart pagination - increase limit until we get less than requested
-        let limit = 100;
+        // Page through the server-side file index until a short page comes back
+        const limit = 500;
+        let offset = 0;
+        allFiles = [];
         
         while (true) {
-            let url = `${ELECTRONICS_API_BASE}/files?limit=${limit}`;
-            if (boardFilter) url += `&board_id=${boardFilter}`;
-            if (categoryFilter) url += `&category=${categoryFilter}`;
+            let url = `${ELECTRONICS_API_BASE}/files?limit=${limit}&offset=${offset}`;
+            if (boardFilter) url += `&board_id=${encodeURIComponent(boardFilter)}`;
+            if (categoryFilter) url += `&category=${encodeURIComponent(categoryFilter)}`;
+            if (searchQuery) url += `&q=${encodeURIComponent(searchQuery)}`;
             
             const response = await fetch(url);
             
@@ -3349,26 +3363,16 @@ async function loadFiles() {
             // Ensure data is an array
             if (!Array.isArray(data)) {
                 console.error('[Files] Expected array, got:', typeof data);
-                allFiles = [];
                 break;
             }
             
-            const count = data.length;
-            console.log('[Files] Loaded:', count, 'files');
+            console.log('[Files] Loaded:', data.length, 'files');
+            allFiles = allFiles.concat(data);
             
-            // API returns array directly
-            if (count < limit) {
-                // Got all data
-                allFiles = data;
-                break;
-            }
-            
-            // Might be more data
-            limit += 100;
-            if (limit > 10000) {
-                allFiles = data;
+            if (data.length < limit) {
                 break;
             }
+            offset += limit;
         }
         
         console.log('[Files] Loaded files:', allFiles.length, 'Sample:', allFiles[0]);
@@ -4268,6 +4272,15 @@ async function exportStockReport() {
 
 let currentOrderData = null;
 
+// Idempotency keys: a retried request (e.g. after a timeout) reuses its key so
+// the server does not apply the same stock change twice
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
 async function processOrderFile() {
     const fileInput = document.getElementById('order-file-input');
     const supplierSelect = document.getElementById('order-supplier-select');
@@ -4392,6 +4405,12 @@ function displayOrderResults(data) {
                 <td class="px-4 py-3 text-sm text-right text-gray-900 dark:text-gray-100">${item.quantity}</td>
                 <td class="px-4 py-3 text-sm text-right text-gray-700 dark:text-gray-300">€${item.unit_price.toFixed(4)}</td>
                 <td class="px-4 py-3 text-sm text-center">
+                    ${item.candidates && item.candidates.length > 0 ? `
+                    <button onclick="useOrderCandidate(${index})" 
+                            title="${item.candidates[0].manufacturer_code || ''} ${item.candidates[0].package || ''} ${item.candidates[0].value || ''}"
+                            class="px-3 py-1 mb-1 bg-green-600 hover:bg-green-700 text-white rounded text-xs font-medium transition">
+                        <i class="fas fa-link mr-1"></i>${item.candidates[0].seller_code || item.candidates[0].manufacturer_code || '#' + item.candidates[0].component_id} (${Math.round(item.candidates[0].confidence * 100)}%)
+                    </button>` : ''}
                     <button onclick="openQuickAddModal(${index})" 
                             class="px-3 py-1 bg-blue-600 hover:bg-blue-700 text-white rounded text-xs font-medium transition">
                         <i class="fas fa-plus mr-1"></i>Add
@@ -4404,6 +4423,16 @@ function displayOrderResults(data) {
     }
 }
 
+function useOrderCandidate(unmatchedIndex) {
+    // Accept the best fuzzy match suggested by the server for an unmatched line
+    const item = currentOrderData.unmatched[unmatchedIndex];
+    item.component_id = item.candidates[0].component_id;
+    currentOrderData.matched.push(item);
+    currentOrderData.unmatched.splice(unmatchedIndex, 1);
+    currentOrderData.idempotency_key = null;  // Different import now
+    displayOrderResults(currentOrderData);
+}
+
 function openQuickAddModal(unmatchedIndex) {
     const item = currentOrderData.unmatched[unmatchedIndex];
     
@@ -4482,6 +4511,7 @@ async function saveQuickAddComponent() {
         orderItem.component_id = newComponent.id;
         currentOrderData.matched.push(orderItem);
         currentOrderData.unmatched.splice(unmatchedIndex, 1);
+        currentOrderData.idempotency_key = null;  // Different import now
         
         // Refresh display
         displayOrderResults(currentOrderData);
@@ -4507,15 +4537,27 @@ async function confirmImportOrder() {
         }
     }
     
+    // Kept until the import fully succeeds, so retrying does not add the stock twice
+    if (!currentOrderData.idempotency_key) {
+        currentOrderData.idempotency_key = newIdempotencyKey();
+    }
+    
     try {
         const response = await fetch(`${ELECTRONICS_API_BASE}/orders/import`, {
             method: 'POST',
-            headers: {'Content-Type': 'application/json'},
+            headers: {'Content-Type': 'application/json', 'Idempotency-Key': currentOrderData.idempotency_key},
             body: JSON.stringify(currentOrderData)
         });
         
         if (!response.ok) {
-            throw new Error('Failed to import order');
+            const errorData = await response.json().catch(() => ({}));
+            throw new Error(errorData.error || 'Failed to import order');
+        }
+        
+        const result = await response.json();
+        if (!result.success) {
+            showToast(`Updated ${result.updated} component(s), ${result.failed.length} failed. Import again to retry the failed ones.`, 'error');
+            return;
         }
         
         showToast('Order imported successfully!', 'success');
@@ -0,0 +1,284 @@
+"""
+Bulk stock mutations with idempotency keys
+
+Order imports used to PATCH one component at a time in a serial loop, and a
+timed-out import or stock reservation could not be retried safely: the retry
+added the same quantities again. Both now go through a stock_mutations row
+keyed on the client's idempotency key (Idempotency-Key header):
+
+- order import: new absolute stock/price values are computed once from the
+  local catalogue and stored with the mutation, then sent as a bounded
+  concurrent fan-out of PATCHes (the API has no batch endpoint). A retry
+  with the same key re-sends only the lines the API has not accepted yet,
+  with the stored values, so nothing is counted twice.
+- job reservation: a single atomic call upstream. A retry returns the
+  stored result; if the first attempt's outcome is unknown (timeout) the
+  retry is refused rather than reserving twice.
+
+Responses report per-line failures; a partial import can be retried with
+the same key.
+"""
+import hashlib
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.json_provider import dumps as json_dumps
+from app.models import StockMutation
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = 8             # Default concurrent PATCH requests per import
+STALE_SECONDS = 300         # A running mutation without heartbeat for this long died with its worker
+PROGRESS_SECONDS = 1        # Progress is written at most this often
+KEY_MAX_LENGTH = 64
+
+
+class StockMutationConflict(Exception):
+    """Raised when a mutation cannot run for its idempotency key"""
+
+    def __init__(self, message, status_code=409):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def request_hash(payload) -> str:
+    """Fingerprint of a mutation request (same key + different payload is an error)"""
+    return hashlib.sha256(json_dumps(payload).encode('utf-8')).hexdigest()
+
+
+def idempotency_key(value: Optional[str]) -> str:
+    """Validated client key, or a new one when the client sent none
+
+    Raises:
+        StockMutationConflict: If the key is too long
+    """
+    value = (value or '').strip()
+    if not value:
+        return uuid.uuid4().hex
+    if len(value) > KEY_MAX_LENGTH:
+        raise StockMutationConflict(f'Idempotency-Key longer than {KEY_MAX_LENGTH} characters', 400)
+    return value
+
+
+def begin(key: str, kind: str, payload_hash: str, take_over: bool = True) -> Tuple[StockMutation, bool]:
+    """Create the mutation for key, or pick up the existing one
+
+    Args:
+        take_over: Whether a mutation whose worker stopped while running may
+                   be resumed. If not, it is marked 'unknown' instead.
+
+    Returns:
+        Tuple (mutation, created). An existing mutation is returned as is if
+        it finished (done/failed: replay its result; partial: resume it) or
+        if its worker stopped while running (its claim is taken over).
+
+    Raises:
+        StockMutationConflict: If the key belongs to another request or a
+                               mutation with this key is still running
+    """
+    mutation = StockMutation(idempotency_key=key, kind=kind, request_hash=payload_hash, status='running',
+                             applied=[])
+    db.session.add(mutation)
+    try:
+        db.session.commit()
+        return mutation, True
+    except IntegrityError:
+        db.session.rollback()
+
+    mutation = db.session.get(StockMutation, key)
+    if mutation.kind != kind or mutation.request_hash != payload_hash:
+        raise StockMutationConflict('Idempotency-Key already used for a different request', 422)
+
+    if mutation.status == 'running':
+        now = datetime.utcnow()
+        claimed = (StockMutation.query
+                   .filter_by(idempotency_key=key, status='running')
+                   .filter(StockMutation.updated_at < now - timedelta(seconds=STALE_SECONDS))
+                   .update({'updated_at': now}, synchronize_session=False))
+        db.session.commit()
+        if not claimed:
+            raise StockMutationConflict('A request with this Idempotency-Key is still running')
+        db.session.refresh(mutation)
+        if not take_over:
+            _finish(mutation, 'unknown', {})
+    return mutation, False
+
+
+def _finish(mutation: StockMutation, status: str, result: Dict) -> Dict:
+    result = dict(result, idempotency_key=mutation.idempotency_key)
+    mutation.status = status
+    mutation.result = result
+    mutation.updated_at = datetime.utcnow()
+    db.session.commit()
+    return result
+
+
+# ---- Order import ----
+
+def plan_order_import(matched: Iterable[Dict], components_by_id: Dict[int, Dict]) -> Tuple[Dict[str, Dict], List]:
+    """Absolute field values to write for an order import
+
+    Lines for the same component are added together (the last unit price
+    wins).
+
+    Returns:
+        Tuple (component_id as str -> PATCH fields, ids of unknown components)
+    """
+    quantities = {}
+    prices = {}
+    skipped = []
+    for item in matched:
+        component_id = item['component_id']
+        if components_by_id.get(component_id) is None:
+            logger.warning(f"[Order Import] Component {component_id} not found, skipping")
+            skipped.append(component_id)
+            continue
+        quantities[component_id] = quantities.get(component_id, 0) + item['quantity']
+        prices[component_id] = float(item['unit_price'])
+
+    planned = {}
+    for component_id, quantity in quantities.items():
+        current_comp = components_by_id[component_id]
+        # Handle NULL/None/string stock values safely
+        current_stock = current_comp.get('qty_left') or current_comp.get('stock_qty') or 0
+        try:
+            current_stock = int(current_stock)
+        except (ValueError, TypeError):
+            current_stock = 0
+
+        new_stock = current_stock + quantity
+        logger.info(f"[Order Import] Component {component_id}: {current_stock} + {quantity} = {new_stock}")
+        planned[str(component_id)] = {
+            'qty_left': new_stock,
+            'stock_qty': new_stock,  # Update both fields for compatibility
+            'price': prices[component_id],
+            'unit_price': prices[component_id]  # Update both fields for compatibility
+        }
+    return planned, skipped
+
+
+def apply_planned(mutation: StockMutation, client, concurrency: int = CONCURRENCY, on_applied=None) -> Dict:
+    """PATCH the planned components the API has not accepted yet
+
+    Args:
+        mutation: Mutation with planned values (from begin + plan_order_import)
+        client: OrionAPIClient
+        concurrency: Concurrent PATCH requests
+        on_applied: Called with (component_id, fields, response) for each accepted PATCH
+
+    Returns:
+        Response body: success, updated, failed (per line), skipped, idempotency_key
+    """
+    applied = set(mutation.applied or [])
+    pending = {cid: fields for cid, fields in (mutation.planned or {}).items() if cid not in applied}
+    failed = []
+    last_write = datetime.utcnow()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending) or 1))) as pool:
+        futures = {pool.submit(client.update_component, int(cid), **fields): cid for cid, fields in pending.items()}
+        for future in as_completed(futures):
+            cid = futures[future]
+            try:
+                response = future.result()
+            except Exception as e:
+                logger.error(f"[Order Import] Updating component {cid} failed: {e}")
+                failed.append({'component_id': int(cid), 'error': str(e)})
+                continue
+            applied.add(cid)
+            if on_applied is not None:
+                on_applied(int(cid), pending[cid], response)
+
+            # Record progress so a retry after a crash skips accepted lines
+            now = datetime.utcnow()
+            mutation.applied = sorted(applied)
+            mutation.updated_at = now
+            if (now - last_write).total_seconds() >= PROGRESS_SECONDS:
+                db.session.commit()
+                last_write = now
+    mutation.applied = sorted(applied)
+
+    skipped = (mutation.result or {}).get('skipped', [])
+    result = {
+        'success': not failed,
+        'updated': len(applied),
+        'failed': sorted(failed, key=lambda f: f['component_id']),
+        'skipped': skipped
+    }
+    if failed:
+        status = 'partial' if applied else 'failed'
+    else:
+        status = 'done'
+    return _finish(mutation, status, result)
+
+
+def start_order_import(key: str, matched: List[Dict], load_components) -> Tuple[StockMutation, Optional[Dict]]:
+    """Begin an order import, planning it on first use
+
+    Args:
+        key: Idempotency key
+        matched: Matched order lines (component_id, quantity, unit_price)
+        load_components: Called with the component ids, returns id -> current component
+
+    Returns:
+        Tuple (mutation, stored result to replay or None if there is work left)
+    """
+    lines = [{'component_id': item['component_id'], 'quantity': item['quantity'],
+              'unit_price': item['unit_price']} for item in matched]
+    mutation, created = begin(key, 'order_import', request_hash(lines))
+    if not created:
+        if mutation.status == 'done':
+            return mutation, dict(mutation.result, replayed=True)
+        if mutation.planned is not None:
+            return mutation, None  # Resume: planned values stay as computed the first time
+
+    planned, skipped = plan_order_import(lines, load_components(item['component_id'] for item in lines))
+    mutation.planned = planned
+    mutation.result = {'skipped': skipped}
+    mutation.updated_at = datetime.utcnow()
+    db.session.commit()
+    return mutation, None
+
+
+# ---- Job reservation ----
+
+def reserve_stock(key: str, job_id, send) -> Tuple[object, bool]:
+    """Run a job's stock reservation once per idempotency key
+
+    Args:
+        key: Idempotency key
+        job_id: Job to reserve stock for
+        send: Performs the upstream call and returns api_request's result
+              (None on connection error, {'_error': True, ...} on HTTP error)
+
+    Returns:
+        Tuple (api_request-style result, replayed)
+
+    Raises:
+        StockMutationConflict: If a previous attempt with this key may have
+                               reserved the stock already
+    """
+    # A reservation whose worker died may have reached the API: never send it again
+    mutation, created = begin(key, 'reserve_stock', request_hash({'job_id': str(job_id)}), take_over=False)
+    if not created:
+        if mutation.status == 'done':
+            return mutation.result.get('response'), True
+        if mutation.status == 'unknown':
+            raise StockMutationConflict('The previous reservation with this Idempotency-Key timed out or was '
+                                        'interrupted and may have been applied; check the stock before '
+                                        'reserving again')
+
+    result = send()
+    if result is None:
+        _finish(mutation, 'unknown', {})
+    elif isinstance(result, dict) and result.get('_error'):
+        # The API refused (e.g. 409 insufficient stock): nothing was reserved, a retry may run again
+        _finish(mutation, 'failed', {'status': result.get('_status'), 'response': result.get('_body')})
+    else:
+        _finish(mutation, 'done', {'response': result})
+    return result, False
@@ -0,0 +1,314 @@
+"""
+Streaming proxy for electronics storage files
+
+/electronics/api/storage/fetch used to download the whole file from
+ELECTRONICS_STORAGE_URL, decode it as text and return it as one string, so
+Gerber zips, interactive BOMs and PnP files were fully buffered in the
+worker. Files now pass through as bytes in chunks:
+
+- Range, If-Range, If-None-Match and If-Modified-Since are forwarded, and
+  status (200/206/304/416), Content-Range, ETag and Last-Modified relayed.
+- Complete 200 responses up to STORAGE_CACHE_MAX_FILE_BYTES are written to a
+  bounded on-disk cache keyed by path (with the file's ETag) while they
+  stream. Repeat opens are served from disk (with Range and conditional GET
+  support) and revalidated upstream once older than
+  STORAGE_CACHE_FRESH_SECONDS, with the ETag/Last-Modified the storage
+  server sent; a changed file's 200 replaces the copy as it is served.
+- The least recently used entries are evicted beyond STORAGE_CACHE_MAX_BYTES.
+
+The cache directory is shared by all workers: entries are written to a
+temporary file and renamed into place.
+"""
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, Optional
+
+from flask import Response, send_file
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_FILE_BYTES = 64 * 1024 * 1024
+DEFAULT_FRESH_SECONDS = 300
+
+# Request headers forwarded to the storage server, and response headers relayed back
+FORWARD_REQUEST_HEADERS = ('Range', 'If-Range', 'If-None-Match', 'If-Modified-Since')
+RELAY_RESPONSE_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges', 'ETag', 'Last-Modified')
+
+
+class StorageFetchError(Exception):
+    """Raised when the storage server answers with an error status"""
+
+    def __init__(self, status_code):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+
+
+def content_type(upstream_type: Optional[str], path: str) -> str:
+    """Content type to serve: binary types pass through, text is served as plain text (never rendered)"""
+    value = upstream_type or mimetypes.guess_type(path)[0] or 'text/plain'
+    mime, _, params = value.partition(';')
+    if mime.strip().startswith('text/'):
+        charset = params.strip() if 'charset' in params else 'charset=utf-8'
+        return f'text/plain; {charset}'
+    return value
+
+
+class StorageCache:
+    """Bounded on-disk cache of storage files (data file + JSON metadata per path)"""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_file_bytes: int = DEFAULT_MAX_FILE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, path: str):
+        digest = hashlib.sha256(path.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + '.data', base + '.json'
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Metadata of the cached copy of path (with 'file'), None if missing"""
+        data_file, meta_file = self._paths(path)
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('path') != path or os.path.getsize(data_file) != meta.get('size'):
+                return None
+        except (OSError, ValueError):
+            return None
+        meta['file'] = data_file
+        return meta
+
+    def touch(self, path: str, validated: bool = False):
+        """Mark an entry as used (LRU), and revalidated upstream if validated"""
+        data_file, meta_file = self._paths(path)
+        try:
+            if validated:
+                meta = self.get(path)
+                if meta is not None:
+                    meta.pop('file')
+                    meta['validated_at'] = time.time()
+                    self._write_meta(meta_file, meta)
+            os.utime(data_file)
+        except OSError:
+            pass
+
+    def remove(self, path: str):
+        for file in self._paths(path):
+            try:
+                os.remove(file)
+            except OSError:
+                pass
+
+    def _write_meta(self, meta_file, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_file)
+
+    def store(self, path: str, chunks: Iterator[bytes], headers) -> Iterator[bytes]:
+        """Yield chunks while writing them to the cache
+
+        The entry is only kept if the whole body arrived and fits in
+        max_file_bytes.
+        """
+        data_file, meta_file = self._paths(path)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        size = 0
+        digest = hashlib.sha256()
+        complete = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    yield chunk
+                    if f is None:
+                        continue
+                    size += len(chunk)
+                    if size > self.max_file_bytes:
+                        f = None  # Too large: keep streaming, stop caching
+                        continue
+                    f.write(chunk)
+                    digest.update(chunk)
+                complete = f is not None
+        finally:
+            if complete:
+                meta = {
+                    'path': path,
+                    'size': size,
+                    # Files served without an ETag get one from their content
+                    'etag': headers.get('ETag') or f'"sha256-{digest.hexdigest()[:32]}"',
+                    'upstream_etag': headers.get('ETag'),
+                    'last_modified': headers.get('Last-Modified'),
+                    'content_type': headers.get('Content-Type'),
+                    'validated_at': time.time()
+                }
+                try:
+                    os.replace(tmp, data_file)
+                    self._write_meta(meta_file, meta)
+                    self.evict()
+                except OSError as e:
+                    logger.warning(f"[Storage Cache] Could not store {path}: {e}")
+            else:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.data'):
+                continue
+            file = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+            total += stat.st_size
+
+        for _, size, file in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for victim in (file, file[:-len('.data')] + '.json'):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            total -= size
+
+
+_caches = {}
+
+
+def get_storage_cache(config) -> Optional[StorageCache]:
+    """Cache for the configured directory (None if STORAGE_CACHE_MAX_BYTES is 0)"""
+    max_bytes = int(config.get('STORAGE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    if max_bytes <= 0:
+        return None
+    directory = config['STORAGE_CACHE_DIR']
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = StorageCache(
+            directory, max_bytes, int(config.get('STORAGE_CACHE_MAX_FILE_BYTES', DEFAULT_MAX_FILE_BYTES))
+        )
+    return cache
+
+
+def _iter_upstream(upstream) -> Iterator[bytes]:
+    try:
+        for chunk in upstream.raw.stream(CHUNK_SIZE, decode_content=True):
+            if chunk:
+                yield chunk
+    finally:
+        upstream.close()
+
+
+def serve_cached(request, meta: Dict) -> Response:
+    """Serve a cached file with Range and conditional GET support"""
+    response = send_file(meta['file'], conditional=False, etag=False)
+    # send_file would add a second charset and name the cache file in Content-Disposition
+    response.headers['Content-Type'] = content_type(meta.get('content_type'), meta['path'])
+    response.headers.pop('Content-Disposition', None)
+    response.headers['ETag'] = meta['etag']
+    if meta.get('last_modified'):
+        response.headers['Last-Modified'] = meta['last_modified']
+    response.headers['X-Storage-Cache'] = 'HIT'
+    return response.make_conditional(request.environ, accept_ranges=True, complete_length=meta['size'])
+
+
+def proxy_file(request, session, url: str, path: str, cache: Optional[StorageCache], fresh_seconds: int,
+               timeout) -> Response:
+    """Serve a storage file from the cache or stream it from the storage server
+
+    Args:
+        request: Incoming Flask request (Range/conditional headers)
+        session: Pooled requests session
+        url: Storage URL of the file
+        path: Storage path (cache key)
+        cache: StorageCache, or None to always stream
+        fresh_seconds: Age after which a cached copy is revalidated upstream
+        timeout: requests timeout
+
+    Raises:
+        StorageFetchError: If the storage server answers with an error status
+        requests.RequestException: If the storage server cannot be reached
+    """
+    client_headers = {h: request.headers[h] for h in FORWARD_REQUEST_HEADERS if h in request.headers}
+
+    meta = cache.get(path) if cache is not None else None
+    if meta is not None:
+        if time.time() - meta.get('validated_at', 0) < fresh_seconds:
+            cache.touch(path)
+            return serve_cached(request, meta)
+
+        # Only validators the storage server sent can match (not our content-derived ETag)
+        validators = {}
+        if meta.get('upstream_etag'):
+            validators['If-None-Match'] = meta['upstream_etag']
+        if meta.get('last_modified'):
+            validators['If-Modified-Since'] = meta['last_modified']
+        upstream = session.get(url, headers=validators, stream=True, timeout=timeout)
+        if upstream.status_code == 304:
+            upstream.close()
+            cache.touch(path, validated=True)
+            return serve_cached(request, meta)
+
+        cache.remove(path)
+        if upstream.status_code == 200:
+            # Changed upstream: this response replaces the copy
+            if 'Range' not in client_headers:
+                return _relay(upstream, path, cache)
+            if _known_to_fit(upstream, cache):
+                for _ in cache.store(path, _iter_upstream(upstream), upstream.headers):
+                    pass
+                meta = cache.get(path)
+                if meta is not None:
+                    return serve_cached(request, meta)
+        # Gone, or a range of a file of unknown or too large size: pass the client's request through
+        upstream.close()
+
+    upstream = session.get(url, headers=client_headers, stream=True, timeout=timeout)
+    return _relay(upstream, path, cache if 'Range' not in client_headers else None)
+
+
+def _fits(upstream, cache: StorageCache) -> bool:
+    return int(upstream.headers.get('Content-Length') or 0) <= cache.max_file_bytes
+
+
+def _known_to_fit(upstream, cache: StorageCache) -> bool:
+    """Whether the response declares a (decoded) size within max_file_bytes"""
+    length = upstream.headers.get('Content-Length')
+    return (length is not None and length.isdigit() and not upstream.headers.get('Content-Encoding')
+            and int(length) <= cache.max_file_bytes)
+
+
+def _relay(upstream, path: str, cache: Optional[StorageCache]) -> Response:
+    """Stream an upstream response to the client, storing a complete 200 in cache if given"""
+    if upstream.status_code not in (200, 206, 304, 416):
+        upstream.close()
+        raise StorageFetchError(upstream.status_code)
+
+    relayed = {h: upstream.headers[h] for h in RELAY_RESPONSE_HEADERS if h in upstream.headers}
+    if upstream.headers.get('Content-Encoding'):
+        relayed.pop('Content-Length', None)  # Body is decoded on the way through
+
+    body = _iter_upstream(upstream)
+    if cache is not None and upstream.status_code == 200 and _fits(upstream, cache):
+        body = cache.store(path, body, upstream.headers)
+        relayed['X-Storage-Cache'] = 'MISS'
+
+    return Response(body, status=upstream.status_code, headers=relayed,
+                    content_type=content_type(upstream.headers.get('Content-Type'), path),
+                    direct_passthrough=True)
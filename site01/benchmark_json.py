@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+JSON encoding benchmark: Flask's stdlib provider vs the orjson provider
+Usage: python benchmark_json.py [--repeat N]
+
+Times, on synthetic payloads shaped like our largest responses:
+- encode: app.json.response() (what jsonify does) with each provider
+- decode: parsing the upstream body (response.json() before, json_provider.loads now)
+
+Also checks that both providers produce the same JSON document.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.json_provider import ORJSON_AVAILABLE, OrjsonProvider, loads
+
+
+def athlete_results(count=500):
+    """/archery/api/athlete/<tessera>/results"""
+    start = datetime(2015, 1, 1)
+    return [{
+        'codice_gara': f'G{i:05d}',
+        'nome_gara': f'Trofeo Città di Treviso {i}',
+        'data_gara': (start + timedelta(days=7 * i)).strftime('%Y-%m-%d'),
+        'tipo_gara': ['18 m', '70 m', '25 m', '50 m'][i % 4],
+        'categoria': 'CO',
+        'classe': 'SM',
+        'posizione': i % 40 + 1,
+        'punteggio': 500 + i % 90,
+        'punteggio1': 250 + i % 45,
+        'punteggio2': 250 + i % 45,
+        'ori': i % 30,
+        'x': i % 12,
+        'average_arrow': round((500 + i % 90) / 60, 3),
+        'luogo': 'Treviso (TV)',
+    } for i in range(count)]
+
+
+def official_ranking(count=2000):
+    """/archery/api/ranking/official (annotated rows)"""
+    return [{
+        'posizione': i + 1,
+        'tessera': f'{100000 + i:06d}',
+        'atleta': f'Rossi Mario {i}',
+        'societa': 'Arcieri della Marca Trevigiana',
+        'punteggio1': 290 - i % 50,
+        'punteggio2': 288 - i % 50,
+        'punteggio3': None,
+        'punteggio4': None,
+        'totale': 578 - i % 100,
+        'data_qualificazione': '2025-11-15',
+        'data_aggiornamento': '2025-12-10T15:30:00',
+        'max_positions': 24,
+        'min_score': 540,
+        'within_positions': i < 24,
+        'meets_min_score': 578 - i % 100 >= 540,
+        'qualified': i < 24,
+        'gap_to_cutoff': -(i % 100),
+        'gap_to_min_score': 38 - i % 100,
+    } for i in range(count)]
+
+
+def components(count=10000):
+    """/electronics/api/components?limit=10000"""
+    return [{
+        'id': i,
+        'seller': 'LCSC',
+        'seller_code': f'C{25000 + i}',
+        'manufacturer': 'Yageo',
+        'manufacturer_code': f'RC0402FR-07{i % 1000}KL',
+        'smd_footprint': 'RESC1005',
+        'package': '0402',
+        'product_type': 'Resistor',
+        'value': f'{i % 1000}k',
+        'price': 0.0012 + (i % 7) / 1000,
+        'qty_left': i % 5000,
+    } for i in range(count)]
+
+
+def subscriptions_export(count=20000):
+    """/archery/api/iscrizioni?export=full (filtered/ndjson exports re-encode each record)"""
+    return [{
+        'id': i,
+        'codice_gara': f'G{i % 300:05d}',
+        'tessera_atleta': str(100000 + i % 4000),
+        'categoria': ['CO', 'OL', 'AN'][i % 3],
+        'classe': 'SM',
+        'turno': i % 3 + 1,
+        'stato': 'confermato',
+        'note': 'Turno mattutino – già pagato' if i % 9 == 0 else '',
+        'created_at': '2025-10-01T10:00:00',
+    } for i in range(count)]
+
+
+PAYLOADS = (
+    ('athlete results (500)', athlete_results),
+    ('official ranking (2000)', official_ranking),
+    ('components (10000)', components),
+    ('subscriptions export (20000)', subscriptions_export),
+)
+
+
+def best_of(repeat, func):
+    """Best wall time of repeat runs, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    if not ORJSON_AVAILABLE:
+        print("❌ orjson is not installed (pip install orjson)")
+        return 1
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+
+    print(f"{'payload':<30} {'size':>9} {'encode std':>11} {'orjson':>9} {'decode std':>11} {'orjson':>9}")
+    with app.app_context():
+        for name, build in PAYLOADS:
+            payload = build()
+            std_body = stdlib.response(payload).get_data()
+            fast_body = fast.response(payload).get_data()
+            if json.loads(std_body) != json.loads(fast_body):
+                print(f"❌ {name}: providers produced different documents")
+                return 1
+
+            encode_std = best_of(args.repeat, lambda: stdlib.response(payload).get_data())
+            encode_fast = best_of(args.repeat, lambda: fast.response(payload).get_data())
+            decode_std = best_of(args.repeat, lambda: json.loads(std_body))
+            decode_fast = best_of(args.repeat, lambda: loads(std_body))
+
+            print(f"{name:<30} {len(std_body) / 1024:>7.0f}KB {encode_std:>9.1f}ms {encode_fast:>7.1f}ms "
+                  f"{decode_std:>9.1f}ms {decode_fast:>7.1f}ms")
+
+    print("✅ Same documents from both providers")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
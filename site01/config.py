@@ -19,7 +19,62 @@ class Config:
     API_PORT = os.environ.get('API_PORT') or '9090'
     CF_ACCESS_ID = os.environ.get('CF_ACCESS_ID') or ''
     CF_ACCESS_SECRET = os.environ.get('CF_ACCESS_SECRET') or ''
-    
+
+    # Upstream HTTP transport (shared keep-alive pool per gunicorn worker)
+    API_POOL_CONNECTIONS = int(os.environ.get('API_POOL_CONNECTIONS') or 4)
+    API_POOL_MAXSIZE = int(os.environ.get('API_POOL_MAXSIZE') or 8)
+    API_CONNECT_TIMEOUT = float(os.environ.get('API_CONNECT_TIMEOUT') or 5)
+    API_READ_TIMEOUT = float(os.environ.get('API_READ_TIMEOUT') or 30)
+    # Per-endpoint read timeouts, keyed by path prefix (merged over transport defaults)
+    API_ENDPOINT_TIMEOUTS = {}
+
+    # Circuit breaker per endpoint family (archery, elec, mail, materiali):
+    # open after N consecutive failures, probe again after the reset delay
+    API_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('API_CIRCUIT_FAILURE_THRESHOLD') or 5)
+    API_CIRCUIT_RESET_SECONDS = float(os.environ.get('API_CIRCUIT_RESET_SECONDS') or 30)
+
+    # Response cache for read-only API endpoints (SQLite file shared by all workers)
+    API_CACHE_ENABLED = (os.environ.get('API_CACHE_ENABLED') or 'true').lower() == 'true'
+    API_CACHE_PATH = os.environ.get('API_CACHE_PATH') or os.path.join(basedir, 'api_cache.db')
+    # Per-endpoint overrides: path -> (fresh seconds, stale seconds)
+    API_CACHE_POLICIES = {}
+
+    # Transformed athlete results are memoized per worker for this many seconds
+    ATHLETE_RESULTS_MEMO_SECONDS = int(os.environ.get('ATHLETE_RESULTS_MEMO_SECONDS') or 60)
+    # Local results warehouse: serve athlete results from the `results` table
+    # when synced within this many seconds (flask sync-results keeps it fresh)
+    RESULTS_WAREHOUSE_ENABLED = (os.environ.get('RESULTS_WAREHOUSE_ENABLED') or 'true').lower() == 'true'
+    RESULTS_WAREHOUSE_MAX_AGE = int(os.environ.get('RESULTS_WAREHOUSE_MAX_AGE') or 6 * 3600)
+
+    # Subscription/interest emails are queued in notification_outbox and sent by a
+    # background thread in each worker (disable to run `flask dispatch-notifications` instead)
+    NOTIFICATION_DISPATCHER_ENABLED = (os.environ.get('NOTIFICATION_DISPATCHER_ENABLED') or 'true').lower() == 'true'
+    NOTIFICATION_POLL_SECONDS = int(os.environ.get('NOTIFICATION_POLL_SECONDS') or 30)
+
+    # Competition/turn catalogue used by notification emails (delta refresh interval)
+    COMPETITION_CATALOG_REFRESH_SECONDS = int(os.environ.get('COMPETITION_CATALOG_REFRESH_SECONDS') or 600)
+
+    # Concurrent Orion mailer requests per background email-link sync
+    MAILER_SYNC_CONCURRENCY = int(os.environ.get('MAILER_SYNC_CONCURRENCY') or 8)
+
+    # Official ranking snapshots are re-fetched in the background after this many seconds
+    RANKING_SNAPSHOT_MAX_AGE = int(os.environ.get('RANKING_SNAPSHOT_MAX_AGE') or 900)
+    # Athlete rankings come from the local index only while sweeps this recent cover every qualifica
+    RANKING_INDEX_MAX_AGE = int(os.environ.get('RANKING_INDEX_MAX_AGE') or 86400)
+
+    # Local electronics component replica is re-synced in the background after this many seconds
+    COMPONENT_CATALOG_MAX_AGE = int(os.environ.get('COMPONENT_CATALOG_MAX_AGE') or 300)
+
+    # Concurrent component PATCH requests per order import
+    STOCK_UPDATE_CONCURRENCY = int(os.environ.get('STOCK_UPDATE_CONCURRENCY') or 8)
+
+    # JSON responses use orjson when installed; set to keep Flask's stdlib
+    # encoder and byte-identical output
+    JSON_COMPAT_MODE = (os.environ.get('JSON_COMPAT_MODE') or 'false').lower() == 'true'
+
+    # Maximum number of athletes accepted by /archery/api/compare
+    COMPARE_MAX_ATHLETES = 5
+
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
@@ -44,6 +99,11 @@ class Config:
     
     # Electronics file storage (external nginx server)
     ELECTRONICS_STORAGE_URL = os.environ.get('ELECTRONICS_STORAGE_URL') or 'https://elec.orion-project.it'
+    # On-disk cache of proxied storage files (app/storage_proxy.py); 0 disables it
+    STORAGE_CACHE_DIR = os.environ.get('STORAGE_CACHE_DIR') or os.path.join(basedir, 'storage_cache')
+    STORAGE_CACHE_MAX_BYTES = int(os.environ.get('STORAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    STORAGE_CACHE_MAX_FILE_BYTES = int(os.environ.get('STORAGE_CACHE_MAX_FILE_BYTES', 64 * 1024 * 1024))
+    STORAGE_CACHE_FRESH_SECONDS = int(os.environ.get('STORAGE_CACHE_FRESH_SECONDS', 300))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -62,6 +122,9 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    API_CACHE_ENABLED = False
+    RESULTS_WAREHOUSE_ENABLED = False
+    NOTIFICATION_DISPATCHER_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
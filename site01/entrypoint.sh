@@ -17,6 +17,66 @@ if [ -f "/app/site01/migrations/add_classe_field.py" ]; then
     python /app/site01/migrations/add_classe_field.py || true
 fi
 
+# Run add_results_warehouse migration if needed
+if [ -f "/app/site01/migrations/add_results_warehouse.py" ]; then
+    echo "  → Running add_results_warehouse migration..."
+    python /app/site01/migrations/add_results_warehouse.py || true
+fi
+
+# Run add_career_stats migration if needed
+if [ -f "/app/site01/migrations/add_career_stats.py" ]; then
+    echo "  → Running add_career_stats migration..."
+    python /app/site01/migrations/add_career_stats.py || true
+fi
+
+# Run add_notification_outbox migration if needed
+if [ -f "/app/site01/migrations/add_notification_outbox.py" ]; then
+    echo "  → Running add_notification_outbox migration..."
+    python /app/site01/migrations/add_notification_outbox.py || true
+fi
+
+# Run add_competition_catalog migration if needed
+if [ -f "/app/site01/migrations/add_competition_catalog.py" ]; then
+    echo "  → Running add_competition_catalog migration..."
+    python /app/site01/migrations/add_competition_catalog.py || true
+fi
+
+# Run add_mailer_sync_jobs migration if needed
+if [ -f "/app/site01/migrations/add_mailer_sync_jobs.py" ]; then
+    echo "  → Running add_mailer_sync_jobs migration..."
+    python /app/site01/migrations/add_mailer_sync_jobs.py || true
+fi
+
+# Run add_ranking_positions_store migration if needed
+if [ -f "/app/site01/migrations/add_ranking_positions_store.py" ]; then
+    echo "  → Running add_ranking_positions_store migration..."
+    python /app/site01/migrations/add_ranking_positions_store.py || true
+fi
+
+# Run add_ranking_snapshots migration if needed
+if [ -f "/app/site01/migrations/add_ranking_snapshots.py" ]; then
+    echo "  → Running add_ranking_snapshots migration..."
+    python /app/site01/migrations/add_ranking_snapshots.py || true
+fi
+
+# Run add_ranking_athlete_index migration if needed
+if [ -f "/app/site01/migrations/add_ranking_athlete_index.py" ]; then
+    echo "  → Running add_ranking_athlete_index migration..."
+    python /app/site01/migrations/add_ranking_athlete_index.py || true
+fi
+
+# Run add_component_catalog migration if needed
+if [ -f "/app/site01/migrations/add_component_catalog.py" ]; then
+    echo "  → Running add_component_catalog migration..."
+    python /app/site01/migrations/add_component_catalog.py || true
+fi
+
+# Run add_stock_mutations migration if needed
+if [ -f "/app/site01/migrations/add_stock_mutations.py" ]; then
+    echo "  → Running add_stock_mutations migration..."
+    python /app/site01/migrations/add_stock_mutations.py || true
+fi
+
 echo "✅ Migrations complete!"
 
 # Clear any runtime Python cache aggressively
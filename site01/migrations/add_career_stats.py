@@ -0,0 +1,71 @@
+"""
+Migration: Materialized athlete career statistics
+Created: 2026-10-17
+
+Creates the athlete_career_stats table and backfills it for every athlete
+already stored in the results warehouse.
+
+Usage:
+    python migrations/add_career_stats.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create athlete_career_stats and backfill it from results"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import AthleteCareerStats, Result
+        from app.career_stats import rebuild_career_stats
+
+        print("Creating athlete_career_stats table...")
+
+        try:
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='athlete_career_stats'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'athlete_career_stats' already exists, skipping...")
+                return
+
+            AthleteCareerStats.__table__.create(db.engine)
+            print("✅ Table 'athlete_career_stats' created")
+
+            athlete_ids = [a for (a,) in db.session.query(Result.athlete_id).distinct() if a]
+            for athlete_id in athlete_ids:
+                rebuild_career_stats(athlete_id)
+            db.session.commit()
+            print(f"✅ Career stats backfilled for {len(athlete_ids)} athlete(s)")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop athlete_career_stats table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping athlete_career_stats table...")
+        db.session.execute(text("DROP TABLE IF EXISTS athlete_career_stats"))
+        db.session.commit()
+        print("✅ Table dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,89 @@
+"""
+Migration: Local competition and turn catalogue
+Created: 2026-10-17
+
+Adds payload/synced_at/turns_synced_at columns to the competitions table and
+creates the competition_turns table used by app/competition_catalog.py.
+
+Usage:
+    python migrations/add_competition_catalog.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+NEW_COLUMNS = (
+    ('payload', 'JSON'),
+    ('synced_at', 'DATETIME'),
+    ('turns_synced_at', 'DATETIME'),
+)
+
+def upgrade():
+    """Add catalogue columns to competitions and create competition_turns"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import CompetitionTurn
+
+        print("Adding catalogue columns to competitions table...")
+
+        try:
+            for name, column_type in NEW_COLUMNS:
+                result = db.session.execute(text(f"""
+                    SELECT COUNT(*) FROM pragma_table_info('competitions')
+                    WHERE name='{name}'
+                """))
+
+                if result.scalar() > 0:
+                    print(f"⚠️  Column '{name}' already exists, skipping...")
+                    continue
+
+                db.session.execute(text(f"ALTER TABLE competitions ADD COLUMN {name} {column_type}"))
+                print(f"✅ Column '{name}' added")
+
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_competitions_synced_at ON competitions (synced_at)
+            """))
+            db.session.commit()
+
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='competition_turns'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'competition_turns' already exists, skipping...")
+                return
+
+            CompetitionTurn.__table__.create(db.engine)
+            print("✅ Table 'competition_turns' created")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop competition_turns table (catalogue columns are left in place)"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping competition_turns table...")
+        db.session.execute(text("DROP TABLE IF EXISTS competition_turns"))
+        db.session.commit()
+        print("✅ Table dropped")
+        print("⚠️  SQLite doesn't support DROP COLUMN; competitions catalogue columns were kept.")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
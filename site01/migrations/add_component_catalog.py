@@ -0,0 +1,69 @@
+"""
+Migration: Local electronics component catalogue
+Created: 2026-10-17
+
+Creates the component_catalog table (replica of /api/elec/components indexed
+on id, part codes, package and type) and the component_catalog_state table.
+
+Usage:
+    python migrations/add_component_catalog.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create component_catalog and component_catalog_state tables"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import CatalogComponent, ComponentCatalogState
+
+        for model in (CatalogComponent, ComponentCatalogState):
+            table = model.__tablename__
+            print(f"Creating {table} table...")
+
+            try:
+                result = db.session.execute(text("""
+                    SELECT COUNT(*) FROM sqlite_master
+                    WHERE type='table' AND name=:name
+                """), {'name': table})
+
+                if result.scalar() > 0:
+                    print(f"⚠️  Table '{table}' already exists, skipping...")
+                    continue
+
+                model.__table__.create(db.engine)
+                print(f"✅ Table '{table}' created")
+
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error: {e}")
+                raise
+
+        print("ℹ️  The catalogue fills on first use, or run 'flask sync-components'")
+
+def downgrade():
+    """Drop component_catalog and component_catalog_state tables"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping component catalogue tables...")
+        db.session.execute(text("DROP TABLE IF EXISTS component_catalog"))
+        db.session.execute(text("DROP TABLE IF EXISTS component_catalog_state"))
+        db.session.commit()
+        print("✅ Tables dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,64 @@
+"""
+Migration: Mailer link sync jobs
+Created: 2026-10-17
+
+Creates the mailer_sync_jobs table that records progress and reports of
+background athlete email-link syncs.
+
+Usage:
+    python migrations/add_mailer_sync_jobs.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create mailer_sync_jobs table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import MailerSyncJob
+
+        print("Creating mailer_sync_jobs table...")
+
+        try:
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='mailer_sync_jobs'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'mailer_sync_jobs' already exists, skipping...")
+                return
+
+            MailerSyncJob.__table__.create(db.engine)
+            print("✅ Table 'mailer_sync_jobs' created")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop mailer_sync_jobs table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping mailer_sync_jobs table...")
+        db.session.execute(text("DROP TABLE IF EXISTS mailer_sync_jobs"))
+        db.session.commit()
+        print("✅ Table dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
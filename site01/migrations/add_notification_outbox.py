@@ -0,0 +1,64 @@
+"""
+Migration: Notification outbox
+Created: 2026-10-17
+
+Creates the notification_outbox table used to send subscription and
+interest emails in the background.
+
+Usage:
+    python migrations/add_notification_outbox.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create notification_outbox table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import NotificationOutbox
+
+        print("Creating notification_outbox table...")
+
+        try:
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='notification_outbox'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'notification_outbox' already exists, skipping...")
+                return
+
+            NotificationOutbox.__table__.create(db.engine)
+            print("✅ Table 'notification_outbox' created")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop notification_outbox table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping notification_outbox table...")
+        db.session.execute(text("DROP TABLE IF EXISTS notification_outbox"))
+        db.session.commit()
+        print("✅ Table dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
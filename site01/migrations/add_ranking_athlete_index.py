@@ -0,0 +1,71 @@
+"""
+Migration: Athlete index of official rankings
+Created: 2026-10-17
+
+Creates the ranking_athlete_entries table (tessera -> ranking rows), the
+ranking_index_state table recording full sweeps and the ranking_index_coverage
+table recording which qualifiche a sweep covered.
+
+Usage:
+    python migrations/add_ranking_athlete_index.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create ranking_athlete_entries, ranking_index_state and ranking_index_coverage tables"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import RankingAthleteEntry, RankingIndexCoverage, RankingIndexState
+
+        for model in (RankingAthleteEntry, RankingIndexState, RankingIndexCoverage):
+            table = model.__tablename__
+            print(f"Creating {table} table...")
+
+            try:
+                result = db.session.execute(text("""
+                    SELECT COUNT(*) FROM sqlite_master
+                    WHERE type='table' AND name=:name
+                """), {'name': table})
+
+                if result.scalar() > 0:
+                    print(f"⚠️  Table '{table}' already exists, skipping...")
+                    continue
+
+                model.__table__.create(db.engine)
+                print(f"✅ Table '{table}' created")
+
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error: {e}")
+                raise
+
+        print("ℹ️  Run 'flask refresh-rankings --all' to populate the index")
+
+def downgrade():
+    """Drop ranking_athlete_entries, ranking_index_state and ranking_index_coverage tables"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping ranking index tables...")
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_athlete_entries"))
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_index_state"))
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_index_coverage"))
+        db.session.commit()
+        print("✅ Tables dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
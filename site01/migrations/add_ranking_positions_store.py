@@ -0,0 +1,76 @@
+"""
+Migration: Ranking positions store
+Created: 2026-10-17
+
+Creates the ranking_positions and ranking_positions_state tables and imports
+app/data/ranking_positions.csv into them.
+
+Usage:
+    python migrations/add_ranking_positions_store.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create ranking positions tables and import the CSV"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import RankingPosition, RankingPositionsState
+        from app.ranking_positions import import_csv_file, default_csv_path
+
+        print("Creating ranking positions tables...")
+
+        try:
+            for model in (RankingPosition, RankingPositionsState):
+                table = model.__tablename__
+                result = db.session.execute(text(f"""
+                    SELECT COUNT(*) FROM sqlite_master
+                    WHERE type='table' AND name='{table}'
+                """))
+
+                if result.scalar() > 0:
+                    print(f"⚠️  Table '{table}' already exists, skipping...")
+                    continue
+
+                model.__table__.create(db.engine)
+                print(f"✅ Table '{table}' created")
+
+            if RankingPosition.query.first() is not None:
+                print("⚠️  Ranking positions already imported, skipping...")
+                return
+
+            if os.path.exists(default_csv_path()):
+                counts = import_csv_file()
+                print(f"✅ Imported {counts['inserted']} ranking position(s) (generation {counts['generation']})")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop ranking positions tables"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping ranking positions tables...")
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_positions"))
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_positions_state"))
+        db.session.commit()
+        print("✅ Tables dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,63 @@
+"""
+Migration: Official ranking snapshots
+Created: 2026-10-17
+
+Creates the ranking_snapshots table caching annotated official rankings.
+
+Usage:
+    python migrations/add_ranking_snapshots.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create ranking_snapshots table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import RankingSnapshot
+
+        print("Creating ranking_snapshots table...")
+
+        try:
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='ranking_snapshots'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'ranking_snapshots' already exists, skipping...")
+                return
+
+            RankingSnapshot.__table__.create(db.engine)
+            print("✅ Table 'ranking_snapshots' created")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop ranking_snapshots table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping ranking_snapshots table...")
+        db.session.execute(text("DROP TABLE IF EXISTS ranking_snapshots"))
+        db.session.commit()
+        print("✅ Table dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
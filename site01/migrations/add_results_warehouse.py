@@ -0,0 +1,107 @@
+"""
+Migration: Local results warehouse
+Created: 2026-10-17
+
+Adds club columns and upsert/date indexes to the results table and creates
+the result_sync_state table used by `flask sync-results`.
+
+Usage:
+    python migrations/add_results_warehouse.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+NEW_COLUMNS = [
+    ('club_code', 'VARCHAR(16)'),
+    ('club_name', 'VARCHAR(256)'),
+    ('organizer_code', 'VARCHAR(16)'),
+    ('organizer_name', 'VARCHAR(256)'),
+    ('updated_at', 'DATETIME'),
+]
+
+def table_exists(name):
+    result = db.session.execute(text(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=:name"
+    ), {'name': name})
+    return result.scalar() > 0
+
+def upgrade():
+    """Add warehouse columns, indexes and the result_sync_state table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import Result, ResultSyncState
+
+        print("Setting up results warehouse...")
+
+        try:
+            if not table_exists('results'):
+                Result.__table__.create(db.engine)
+                print("✅ Table 'results' created")
+            else:
+                for column, column_type in NEW_COLUMNS:
+                    result = db.session.execute(text("""
+                        SELECT COUNT(*) as count
+                        FROM pragma_table_info('results')
+                        WHERE name=:name
+                    """), {'name': column})
+
+                    if result.scalar() > 0:
+                        print(f"⚠️  Column '{column}' already exists, skipping...")
+                        continue
+
+                    db.session.execute(text(f"ALTER TABLE results ADD COLUMN {column} {column_type}"))
+                    print(f"✅ Column '{column}' added")
+
+                db.session.execute(text("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS uq_results_athlete_competition
+                    ON results (athlete_id, competition_id, competition_type)
+                """))
+                db.session.execute(text("""
+                    CREATE INDEX IF NOT EXISTS ix_results_athlete_date
+                    ON results (athlete_id, date)
+                """))
+                db.session.commit()
+                print("✅ Indexes on 'results' ready")
+
+            if not table_exists('result_sync_state'):
+                ResultSyncState.__table__.create(db.engine)
+                print("✅ Table 'result_sync_state' created")
+            else:
+                print("⚠️  Table 'result_sync_state' already exists, skipping...")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop the result_sync_state table and warehouse indexes"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Removing results warehouse tables and indexes...")
+
+        db.session.execute(text("DROP TABLE IF EXISTS result_sync_state"))
+        db.session.execute(text("DROP INDEX IF EXISTS uq_results_athlete_competition"))
+        db.session.execute(text("DROP INDEX IF EXISTS ix_results_athlete_date"))
+        db.session.commit()
+
+        # SQLite doesn't support DROP COLUMN directly
+        print("⚠️  Club columns on 'results' are left in place (SQLite can't drop columns).")
+        print("✅ Done")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,64 @@
+"""
+Migration: Idempotent stock mutations
+Created: 2026-10-17
+
+Creates the stock_mutations table (order imports and job reservations keyed
+on the client's Idempotency-Key).
+
+Usage:
+    python migrations/add_stock_mutations.py
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db
+from sqlalchemy import text
+
+def upgrade():
+    """Create stock_mutations table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        from app.models import StockMutation
+
+        print("Creating stock_mutations table...")
+
+        try:
+            result = db.session.execute(text("""
+                SELECT COUNT(*) FROM sqlite_master
+                WHERE type='table' AND name='stock_mutations'
+            """))
+
+            if result.scalar() > 0:
+                print("⚠️  Table 'stock_mutations' already exists, skipping...")
+                return
+
+            StockMutation.__table__.create(db.engine)
+            print("✅ Table 'stock_mutations' created")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error: {e}")
+            raise
+
+def downgrade():
+    """Drop stock_mutations table"""
+
+    app = create_app(os.getenv('FLASK_ENV', 'production'))
+    with app.app_context():
+        print("Dropping stock_mutations table...")
+        db.session.execute(text("DROP TABLE IF EXISTS stock_mutations"))
+        db.session.commit()
+        print("✅ Table dropped")
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()